@@ -62,197 +62,28 @@ from sales.models import (
     DailySalesSummary, 
     UnusualTransaction
 )
+from core.dashboard import DashboardSnapshot
 from django.db.models import Q
 
 @login_required
 def dashboard(request):
     """Main dashboard with real data"""
-    today = timezone.now().date()
-    current_week_start = today - timedelta(days=today.weekday())
-    current_month_start = today.replace(day=1)
-    yesterday = today - timedelta(days=1)
-
-    # Get today's summary
-    today_summary = DailySalesSummary.objects.filter(date=today).first()
-
-    # Calculate today's metrics
-    today_orders = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    )
-
-    today_sales = today_orders.aggregate(total=Sum('final_amount'))['total'] or 0
-    today_transactions = today_orders.count()
-    today_customers = today_orders.aggregate(
-        count=Count('customer_name', distinct=True)
-    )['count'] or 0
-
-    # Calculate averages
-    avg_order_value = today_orders.aggregate(avg=Avg('final_amount'))['avg'] or 0
-
-    # Calculate weekly metrics
-    weekly_orders = POSOrder.objects.filter(
-        created_at__date__gte=current_week_start,
-        created_at__date__lte=today,
-        status='completed'
-    )
-    weekly_sales = weekly_orders.aggregate(total=Sum('final_amount'))['total'] or 0
-    weekly_transactions = weekly_orders.count()
-
-    # Calculate monthly metrics
-    monthly_orders = POSOrder.objects.filter(
-        created_at__date__gte=current_month_start,
-        created_at__date__lte=today,
-        status='completed'
+    context = DashboardSnapshot().widgets(
+        'today_sales', 'periods', 'inventory', 'users',
+        'top_items', 'breakdowns', 'recent_activity',
     )
-    monthly_sales = monthly_orders.aggregate(total=Sum('final_amount'))['total'] or 0
-    monthly_transactions = monthly_orders.count()
-
-    # Inventory metrics
-    total_inventory = Product.objects.count()
-    low_stock_products = Product.objects.filter(
-        stock_status='low_stock'
-    ).count()
-    out_of_stock_products = Product.objects.filter(
-        stock_status='out_of_stock'
-    ).count()
-
-    # User metrics
-    total_users = CustomUser.objects.count()
-    active_users = CustomUser.objects.filter(is_active=True).count()
-
-    # Top selling items (today)
-    top_selling_items = POSOrderItem.objects.filter(
-        order__created_at__date=today,
-        order__status='completed'
-    ).values('product__name', 'product__sku').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('total_price')
-    ).order_by('-total_quantity')[:5]
-
-    # Payment method breakdown
-    payment_breakdown = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).values('payment_method').annotate(
-        total=Sum('final_amount'),
-        count=Count('id')
-    ).order_by('-total')
-
-    # Recent orders
-    recent_orders = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).order_by('-created_at')[:5]
-
-    # Best customers (today)
-    best_customers = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed',
-        customer_name__isnull=False
-    ).values('customer_name').annotate(
-        total_spent=Sum('final_amount'),
-        orders=Count('id')
-    ).order_by('-total_spent')[:5]
-
-    # Unusual transactions
-    unusual_transactions = UnusualTransaction.objects.filter(
-        order__created_at__date=today
-    ).select_related('order')[:5]
-
-    # Sales trend (last 7 days)
-    sales_trend = []
-    for i in range(7):
-        date = today - timedelta(days=i)
-        day_sales = POSOrder.objects.filter(
-            created_at__date=date,
-            status='completed'
-        ).aggregate(total=Sum('final_amount'))['total'] or 0
-        sales_trend.append({
-            'date': date.strftime('%a'),
-            'sales': float(day_sales)
-        })
-    sales_trend.reverse()  # Most recent first
-
-    # Product categories performance
-    category_performance = POSOrderItem.objects.filter(
-        order__created_at__date=today,
-        order__status='completed'
-    ).values('product__category__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('total_price')
-    ).order_by('-total_revenue')[:5]
-
-    # Cashier performance
-    cashier_performance = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).values('cashier').annotate(
-        total_sales=Sum('final_amount'),
-        total_orders=Count('id')
-    ).order_by('-total_sales')
-
-    # Calculate in-stock products
-    in_stock_products = total_inventory - low_stock_products - out_of_stock_products
-
-    # Yesterday's summary
-    yesterday_summary = DailySalesSummary.objects.filter(date=yesterday).first()
-    yesterday_sales = yesterday_summary.total_revenue if yesterday_summary else 0
-    yesterday_transactions = yesterday_summary.total_transactions if yesterday_summary else 0
 
     # Sales growth percentage
-    sales_growth_percentage = (
-        ((today_sales - yesterday_sales) / yesterday_sales) * 100
+    yesterday_sales = context['yesterday_sales']
+    context['sales_growth_percentage'] = (
+        ((context['today_sales'] - yesterday_sales) / yesterday_sales) * 100
         if yesterday_sales > 0 else 0
     )
 
-    context = {
-        # Sales metrics
-        'today_sales': today_sales,
-        'today_transactions': today_transactions,
-        'today_customers': today_customers,
-        'avg_order_value': avg_order_value,
-        'in_stock_products': in_stock_products,
-
-        'weekly_sales': weekly_sales,
-        'weekly_transactions': weekly_transactions,
-        'monthly_sales': monthly_sales,
-        'monthly_transactions': monthly_transactions,
-
-        # Inventory metrics
-        'total_inventory': total_inventory,
-        'low_stock_products': low_stock_products,
-        'out_of_stock_products': out_of_stock_products,
-
-        # User metrics
-        'total_users': total_users,
-        'active_users': active_users,
-
-        # Top items
-        'top_selling_items': top_selling_items,
-
-        # Payment methods
-        'payment_breakdown': payment_breakdown,
-
-        # Recent data
-        'recent_orders': recent_orders,
-        'best_customers': best_customers,
-        'unusual_transactions': unusual_transactions,
-
-        # Trends
-        'sales_trend': sales_trend,
-        'category_performance': category_performance,
-        'cashier_performance': cashier_performance,
-
-        # Yesterday's data
-        'yesterday_sales': yesterday_sales,
-        'yesterday_transactions': yesterday_transactions,
-        'sales_growth_percentage': sales_growth_percentage,
-
-        # User info
+    context.update({
         'user_role': request.user.role,
         'user_name': request.user.get_full_name() or request.user.username,
-    }
+    })
     return render(request, 'accounts/dashboard.html', context)
 
 
@@ -7,6 +7,7 @@ from .models import (
     SystemSettings,
     SubscriptionPlan,
     License,
+    ExportJob,
 )
 
 @admin.register(FieldCategory)
@@ -62,4 +63,10 @@ class LicenseAdmin(admin.ModelAdmin):
         "started_at",
     )
     list_filter = ("plan", "is_active", "expires_at")
-    search_fields = ("license_key", "system__business_name")
\ No newline at end of file
+    search_fields = ("license_key", "system__business_name")
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("dataset", "status", "rows_written", "total_rows", "bytes_written", "requested_by", "created_at", "finished_at")
+    list_filter = ("status", "dataset")
+    readonly_fields = ("fingerprint", "data_version", "params", "file", "error")
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        from . import signals  # noqa: F401
+
+        # Each app declares its CSV exports in an exports module.
+        autodiscover_modules('exports')
@@ -0,0 +1,260 @@
+# core/dashboard.py
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+
+from accounts.models import CustomUser
+from inventory.catalog import current_catalog_version
+from inventory.models import InventoryTransaction, Product
+from sales.business_day import business_clock, business_day_bounds, business_today
+from sales.models import POSOrder, UnusualTransaction
+from sales.periods import Period, period_sales
+from sales.rollups import category_performance, top_products
+
+from .models import SystemSettings
+
+CACHE_PREFIX = 'dashboard'
+TTL_KEY = f'{CACHE_PREFIX}:ttl'
+DEFAULT_TTL = 30
+# The refresh rate and topic tokens are cleared or replaced by signals in
+# the process that made the change. With a per-process cache (the default
+# LocMemCache) other workers only see it once their copy expires, so these
+# are kept for a bounded time rather than forever; see CACHES in settings.
+TTL_TIMEOUT = 60
+TOKEN_TIMEOUT = 60 * 60
+
+# What a widget's data depends on: tokens kept in the cache and replaced by
+# invalidate_dashboard(). 'inventory' also follows the catalog version,
+# which product edits bump; stock changes replace its token instead.
+TOPICS = ['sales', 'users', 'inventory']
+
+WIDGETS = {}
+
+
+def widget(*topics):
+    """Register a widget function ``func(day) -> dict`` under its name."""
+    def register(func):
+        WIDGETS[func.__name__] = (topics, func)
+        return func
+    return register
+
+
+def invalidate_dashboard(*topics):
+    """Drop cached widgets that depend on ``topics`` (all of them when none given)."""
+    cache.set_many(
+        {f'{CACHE_PREFIX}:token:{topic}': time.time_ns() for topic in (topics or TOPICS)},
+        timeout=TOKEN_TIMEOUT,
+    )
+
+
+def invalidate_dashboard_on_commit(*topics):
+    transaction.on_commit(lambda: invalidate_dashboard(*topics))
+
+
+def refresh_rate():
+    """``SystemSettings.analytics_refresh_rate`` in seconds, cached until the settings change (or TTL_TIMEOUT)."""
+    ttl = cache.get(TTL_KEY)
+    if ttl is None:
+        ttl = SystemSettings.objects.values_list('analytics_refresh_rate', flat=True).first() or DEFAULT_TTL
+        cache.set(TTL_KEY, ttl, timeout=TTL_TIMEOUT)
+    return ttl
+
+
+def _completed(day):
+    return POSOrder.objects.filter(business_date=day, status='completed')
+
+
+@widget('sales')
+def today_sales(day):
+    totals = _completed(day).aggregate(
+        sales=Sum('final_amount'),
+        transactions=Count('id'),
+        customers=Count('customer_name', distinct=True),
+        average=Avg('final_amount'),
+    )
+    return {
+        'today_sales': totals['sales'] or 0,
+        'today_transactions': totals['transactions'],
+        'today_customers': totals['customers'],
+        'avg_order_value': totals['average'] or 0,
+    }
+
+
+@widget('sales')
+def periods(day):
+    week, month, trend = period_sales(
+        [Period.week(day), Period.month(day), Period.last_days(day, 7)],
+        compare=['previous'],
+        daily=True,
+    )
+    _, yesterday_sales, yesterday_transactions = trend['days'][-2]
+    return {
+        'weekly_sales': week['total_sales'],
+        'weekly_transactions': week['total_transactions'],
+        'weekly_sales_change': week['vs_previous']['sales_change'],
+        'monthly_sales': month['total_sales'],
+        'monthly_transactions': month['total_transactions'],
+        'monthly_sales_change': month['vs_previous']['sales_change'],
+        'yesterday_sales': yesterday_sales,
+        'yesterday_transactions': yesterday_transactions,
+        # Oldest first
+        'sales_trend': [
+            {'date': date.strftime('%a'), 'sales': float(sales)}
+            for date, sales, _ in trend['days']
+        ],
+    }
+
+
+@widget('inventory')
+def inventory(day):
+    counts = Product.objects.aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(stock_status='low_stock')),
+        out_of_stock=Count('id', filter=Q(stock_status='out_of_stock')),
+    )
+    return {
+        'total_inventory': counts['total'],
+        'low_stock_products': counts['low_stock'],
+        'out_of_stock_products': counts['out_of_stock'],
+        'in_stock_products': counts['total'] - counts['low_stock'] - counts['out_of_stock'],
+    }
+
+
+@widget('users')
+def users(day):
+    counts = CustomUser.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+    return {'total_users': counts['total'], 'active_users': counts['active']}
+
+
+@widget('sales')
+def top_items(day):
+    return {
+        'top_selling_items': top_products(day, day),
+        'category_performance': category_performance(day, day),
+    }
+
+
+@widget('sales')
+def breakdowns(day):
+    completed = _completed(day)
+    return {
+        'payment_breakdown': list(
+            completed.values('payment_method')
+            .annotate(total=Sum('final_amount'), count=Count('id'))
+            .order_by('-total')
+        ),
+        'best_customers': list(
+            completed.filter(customer_name__isnull=False)
+            .values('customer_name')
+            .annotate(total_spent=Sum('final_amount'), orders=Count('id'))
+            .order_by('-total_spent')[:5]
+        ),
+        'cashier_performance': list(
+            completed.values('cashier')
+            .annotate(total_sales=Sum('final_amount'), total_orders=Count('id'))
+            .order_by('-total_sales')
+        ),
+    }
+
+
+@widget('sales')
+def recent_activity(day):
+    return {
+        'recent_orders': list(_completed(day).order_by('-created_at')[:5]),
+        'unusual_transactions': list(
+            UnusualTransaction.objects.filter(order__business_date=day).select_related('order')[:5]
+        ),
+    }
+
+
+@widget('sales', 'inventory', 'users')
+def timeline(day):
+    # Only orders carry a business_date; the rest are bounded by the same
+    # trading day's window, and ordered by moment since it can span midnight.
+    window = business_day_bounds(day)
+    events = []
+    for order in _completed(day).order_by('-created_at')[:3]:
+        events.append((order.created_at, {
+            'type': 'sale',
+            'title': f'POS Sale #{order.order_number}',
+            'amount': order.final_amount,
+            'time': business_clock(order.created_at),
+            'icon': 'fas fa-cash-register',
+            'color': 'primary'
+        }))
+    for update in InventoryTransaction.objects.filter(
+        created_at__gte=window[0], created_at__lt=window[1]
+    ).select_related('product').order_by('-created_at')[:3]:
+        events.append((update.created_at, {
+            'type': 'inventory',
+            'title': f'Inventory {update.transaction_type.title()}',
+            'product': update.product.name,
+            'quantity': update.quantity,
+            'time': business_clock(update.created_at),
+            'icon': 'fas fa-box',
+            'color': 'success'
+        }))
+    for user in CustomUser.objects.filter(
+        date_joined__gte=window[0], date_joined__lt=window[1]
+    ).order_by('-date_joined')[:3]:
+        events.append((user.date_joined, {
+            'type': 'user',
+            'title': f'New User: {user.username}',
+            'time': business_clock(user.date_joined),
+            'icon': 'fas fa-user-plus',
+            'color': 'info'
+        }))
+    events.sort(key=lambda event: event[0], reverse=True)
+    return {'timeline_activities': [activity for _, activity in events[:6]]}
+
+
+class DashboardSnapshot:
+    """
+    Dashboard widgets for one business day, each computed at most once per
+    refresh interval and shared by every tab and user.
+
+    A widget is cached under its name, the day and the current token of
+    each topic it depends on, for ``analytics_refresh_rate`` seconds, so a
+    relevant write makes the next request recompute it. Cached values must
+    be picklable (lists, not querysets).
+    """
+
+    def __init__(self, day=None):
+        self.day = day or business_today()
+        self._tokens = None
+
+    def _topic_tokens(self, topics):
+        if self._tokens is None:
+            keys = {f'{CACHE_PREFIX}:token:{topic}': topic for topic in TOPICS}
+            found = cache.get_many(list(keys))
+            self._tokens = {topic: found.get(key, 0) for key, topic in keys.items()}
+        tokens = []
+        for topic in topics:
+            if topic == 'inventory':
+                if 'catalog' not in self._tokens:
+                    self._tokens['catalog'] = current_catalog_version()
+                tokens.append(str(self._tokens['catalog']))
+            tokens.append(str(self._tokens[topic]))
+        return tokens
+
+    def _key(self, name):
+        topics, _ = WIDGETS[name]
+        return ':'.join([CACHE_PREFIX, name, self.day.isoformat(), *self._topic_tokens(topics)])
+
+    def widgets(self, *names):
+        """The merged context of the named widgets, computing only the missing ones."""
+        keys = {self._key(name): name for name in names}
+        cached = cache.get_many(list(keys))
+        missing = {}
+        for key, name in keys.items():
+            if key not in cached:
+                missing[key] = WIDGETS[name][1](self.day)
+        if missing:
+            cache.set_many(missing, timeout=refresh_rate())
+
+        context = {}
+        for key in keys:
+            context.update(cached[key] if key in cached else missing[key])
+        return context
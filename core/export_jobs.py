@@ -0,0 +1,318 @@
+# core/export_jobs.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORTS, ExportError, encode, parquet_available
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = 'exports'
+# Bytes read per chunk when serving an artifact.
+READ_CHUNK_SIZE = 64 * 1024
+# A running job with no progress saved for this long lost its worker.
+STALLED_AFTER = timedelta(minutes=15)
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _fingerprint(key, options, version):
+    payload = json.dumps([key, options, version], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _artifact_path(job):
+    return os.path.join(settings.MEDIA_ROOT, job.file.name) if job.file else None
+
+
+def artifact_exists(job):
+    path = _artifact_path(job)
+    return bool(path and os.path.exists(path))
+
+
+def _active_job(active_key):
+    return ExportJob.objects.filter(active_key=active_key).first()
+
+
+def request_export(key, params, user=None):
+    """
+    The job producing export ``key`` for ``params``, and whether it is new.
+
+    A queued, running or finished job the same user requested with the
+    same options and data version is returned as is; otherwise a new job
+    is queued and the worker woken. Raises ExportError for unknown exports
+    or parameters.
+    """
+    dataset = EXPORTS.get(key)
+    if dataset is None:
+        raise ExportError(f'No export named {key}')
+    if 'since' in params:
+        raise ExportError('Change exports (since) are served directly, not as background jobs')
+    options = dataset.options(params)
+    if options['format'] == 'parquet' and not parquet_available():
+        raise ExportError('Parquet exports need the pyarrow package installed')
+    rows, version = dataset.version(options)
+    fingerprint = _fingerprint(key, options, version)
+    requester = user if user is not None and user.is_authenticated else None
+    active_key = f'{fingerprint}:{requester.pk if requester else "-"}'
+
+    job = _active_job(active_key)
+    if job is not None:
+        if job.status != 'finished' or artifact_exists(job):
+            return job, False
+        # Its file has expired: free the key for a fresh job.
+        ExportJob.objects.filter(pk=job.pk, active_key=active_key).update(active_key=None)
+
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                dataset=key,
+                params=options,
+                data_version=version,
+                fingerprint=fingerprint,
+                active_key=active_key,
+                total_rows=rows,
+                requested_by=requester,
+            )
+    except IntegrityError:
+        # An identical request queued its job between our lookup and insert.
+        return ExportJob.objects.get(active_key=active_key), False
+    transaction.on_commit(start_worker)
+    return job, True
+
+
+def claim_next_job():
+    """Mark the oldest queued job running and return it (None when the queue is empty)."""
+    for pk in ExportJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        # Another worker may claim the same job; only one update wins.
+        if ExportJob.objects.filter(pk=pk, status='queued').update(status='running', started_at=now, updated_at=now):
+            return ExportJob.objects.get(pk=pk)
+    return None
+
+
+def _save(job, **fields):
+    fields['updated_at'] = timezone.now()
+    ExportJob.objects.filter(pk=job.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_job(job):
+    """
+    Write ``job``'s export to a file, saving rows and bytes written as it
+    goes: gzip-compressed CSV or NDJSON, or Parquet (compressed already).
+    The file is written beside its final name and renamed when complete,
+    so a served artifact is never partial.
+    """
+    format_name = job.params.get('format', 'csv')
+    extension = EXPORT_FORMATS.get(format_name, EXPORT_FORMATS['csv'])[1]
+    if format_name != 'parquet':
+        extension += '.gz'
+    name = f'{EXPORT_DIR}/{job.dataset}-{job.pk}-{job.fingerprint[:12]}.{extension}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    partial = f'{path}.part'
+    count = 0
+    try:
+        dataset = EXPORTS.get(job.dataset)
+        if dataset is None:
+            raise ExportError(f'No export named {job.dataset}')
+        columns, rows = dataset.rows(job.params)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(partial, 'wb') as raw:
+
+            def counted():
+                nonlocal count
+                for row in rows:
+                    yield row
+                    count += 1
+                    if count % EXPORT_CHUNK_SIZE == 0:
+                        _save(job, rows_written=count, bytes_written=raw.tell())
+
+            chunks = encode(dataset, format_name, columns, counted())
+            if format_name == 'parquet':
+                for chunk in chunks:
+                    raw.write(chunk)
+            else:
+                with gzip.GzipFile(filename=os.path.basename(path)[:-3], mode='wb', fileobj=raw) as compressed:
+                    for chunk in chunks:
+                        compressed.write(chunk.encode('utf-8'))
+        os.replace(partial, path)
+        job.file.name = name
+        _save(
+            job,
+            status='finished',
+            file=name,
+            rows_written=count,
+            bytes_written=os.path.getsize(path),
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        logger.exception('Export job %s failed', job.pk)
+        if os.path.exists(partial):
+            os.remove(partial)
+        _save(job, status='failed', active_key=None, error=str(e), finished_at=timezone.now())
+
+
+def run_queued_jobs(limit=None):
+    """Claim and run queued jobs until none are left (or ``limit`` ran); returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+def requeue_stalled_jobs(older_than):
+    """Queue again running jobs whose worker saved no progress for ``older_than`` (it died)."""
+    cutoff = timezone.now() - older_than
+    return ExportJob.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='queued', rows_written=0, bytes_written=0, started_at=None, updated_at=timezone.now()
+    )
+
+
+def purge_expired_jobs(older_than=None):
+    """Delete finished and failed jobs (and their files) older than the retention period."""
+    if older_than is None:
+        older_than = timedelta(hours=getattr(settings, 'POS_EXPORT_RETENTION_HOURS', 24))
+    expired = ExportJob.objects.filter(
+        status__in=['finished', 'failed'], finished_at__lt=timezone.now() - older_than
+    )
+    count = 0
+    for job in expired.iterator():
+        path = _artifact_path(job)
+        if path and os.path.exists(path):
+            os.remove(path)
+        job.delete()
+        count += 1
+    return count
+
+
+_lock = threading.Lock()
+_worker = None
+_wanted = False
+
+
+def _work():
+    global _worker, _wanted
+    try:
+        while True:
+            with _lock:
+                if not _wanted:
+                    _worker = None
+                    return
+                _wanted = False
+            try:
+                requeue_stalled_jobs(STALLED_AFTER)
+                run_queued_jobs()
+                purge_expired_jobs()
+            except Exception:
+                logger.exception('Export worker failed')
+    finally:
+        connection.close()
+
+
+def start_worker():
+    """
+    Run queued jobs on a background thread of this process, unless
+    ``POS_EXPORT_WORKER_THREAD`` is off (then ``run_export_jobs`` does).
+    A request made while the thread is busy is picked up before it exits.
+    """
+    global _worker, _wanted
+    if not getattr(settings, 'POS_EXPORT_WORKER_THREAD', True):
+        return
+    with _lock:
+        _wanted = True
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name='export-worker', daemon=True)
+            _worker.start()
+
+
+def job_json(job):
+    return {
+        'id': job.pk,
+        'dataset': job.dataset,
+        'params': job.params,
+        'status': job.status,
+        'total_rows': job.total_rows,
+        'rows_written': job.rows_written,
+        'bytes_written': job.bytes_written,
+        'progress': job.progress,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(READ_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def artifact_response(request, job):
+    """
+    Serve a finished job's file, honouring a single ``Range: bytes=``
+    request (and ``If-Range``) so an interrupted download can resume.
+    """
+    path = _artifact_path(job)
+    size = os.path.getsize(path)
+    etag = f'"{job.fingerprint}"'
+    start, end = 0, size - 1
+    partial = False
+
+    requested = request.headers.get('Range', '').strip()
+    if_range = request.headers.get('If-Range')
+    if requested and (if_range is None or if_range == etag):
+        match = _RANGE.match(requested)
+        # Anything else (several ranges, other units) gets the whole file.
+        if match and (match[1] or match[2]):
+            if match[1]:
+                start = int(match[1])
+                if match[2]:
+                    end = min(int(match[2]), size - 1)
+            else:
+                start = max(size - int(match[2]), 0)
+            if start >= size or start > end:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            partial = True
+
+    dataset = EXPORTS.get(job.dataset)
+    stem = (dataset.filename or dataset.key) if dataset else job.dataset
+    extension = os.path.basename(path).split('.', 1)[1]
+    response = StreamingHttpResponse(
+        _read(path, start, end - start + 1),
+        status=206 if partial else 200,
+        content_type='application/gzip' if extension.endswith('.gz') else EXPORT_FORMATS['parquet'][0],
+    )
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = (
+        f'attachment; filename="{stem}_{job.created_at.date().isoformat()}.{extension}"'
+    )
+    if partial:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,577 @@
+# core/exports.py
+import csv
+import datetime
+import importlib.util
+import json
+import os
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Callable, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.db.models.signals import post_delete
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Tombstone
+
+# Rows read per query while streaming an export.
+EXPORT_CHUNK_SIZE = 2000
+# Rows per Parquet row group; rows are converted in EXPORT_CHUNK_SIZE batches.
+PARQUET_ROW_GROUP_SIZE = 65536
+# Change exports stop this far short of now: a row stamped more recently
+# may belong to a transaction that hasn't committed yet.
+CHANGES_SETTLE = datetime.timedelta(seconds=60)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class _Echo:
+    """File-like object whose write() hands the CSV line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def keyset_rows(queryset, fields, order_by='-pk', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield ``values_list(*fields)`` tuples for the whole queryset, ordered by
+    ``order_by`` then pk, one page of ``chunk_size`` rows at a time.
+
+    Each page continues after the last row of the previous one rather than
+    using OFFSET, and only one page is held in memory. ``.iterator()`` on
+    its own isn't enough here: the MySQL drivers buffer a whole result set
+    on the client.
+    """
+    descending = order_by.startswith('-')
+    field = order_by.lstrip('-')
+    after = 'lt' if descending else 'gt'
+    ordering = [order_by] if field == 'pk' else [order_by, '-pk' if descending else 'pk']
+    extra = ['pk'] if field == 'pk' else [field, 'pk']
+    rows = queryset.order_by(*ordering).values_list(*fields, *extra)
+
+    last = None
+    while True:
+        page = rows
+        if last is not None:
+            if field == 'pk':
+                page = rows.filter(**{f'pk__{after}': last[0]})
+            else:
+                page = rows.filter(
+                    Q(**{f'{field}__{after}': last[0]}) | Q(**{field: last[0], f'pk__{after}': last[1]})
+                )
+        count = 0
+        for row in page[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last = row[len(fields):]
+            yield row[:len(fields)]
+        if count < chunk_size:
+            return
+
+
+def csv_lines(header, rows):
+    """``header`` and then ``rows`` as CSV lines, written as the rows are produced."""
+    writer = csv.writer(_Echo())
+    return (writer.writerow(row) for row in chain([header], rows))
+
+
+def csv_response(filename, header, rows):
+    """
+    Stream ``header`` and then ``rows`` as a CSV attachment. Lines are
+    written as the rows are produced, so the first bytes go out at once and
+    memory stays flat however large the export.
+    """
+    response = StreamingHttpResponse(csv_lines(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def ndjson_lines(header, rows):
+    """One JSON object per row; decimals as strings, dates and times in ISO format."""
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+class ExportError(ValueError):
+    """Export parameters that can't be honoured (unknown column, bad date...)."""
+
+
+def encode_watermark(moment, pk):
+    """An opaque, URL-safe cursor for the change ``(moment, pk)``."""
+    return f'{(moment - _EPOCH) // datetime.timedelta(microseconds=1)}-{pk}'
+
+
+def decode_watermark(value):
+    """``(moment, pk)`` for a watermark; ``0`` (or empty) means from the beginning."""
+    if value in ('', '0'):
+        return _EPOCH, 0
+    try:
+        micros, pk = value.split('-')
+        return _EPOCH + datetime.timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise ExportError('since must be a watermark returned by an earlier export')
+
+
+def _after(field, id_field, mark):
+    moment, pk = mark
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, f'{id_field}__gt': pk})
+
+
+def _upto(field, id_field, mark):
+    moment, pk = mark
+    return Q(**{f'{field}__lt': moment}) | Q(**{field: moment, f'{id_field}__lte': pk})
+
+
+def local_date(value):
+    return timezone.localtime(value).date() if value else None
+
+
+def local_time(value):
+    return timezone.localtime(value).time().replace(microsecond=0) if value else None
+
+
+# Value kinds, for the typed formats: what a column's format produces,
+# or else what its model field holds (fields with choices are 'category').
+FORMAT_KINDS = {local_date: 'date', local_time: 'time'}
+FIELD_KINDS = {
+    'AutoField': 'int',
+    'BigAutoField': 'int',
+    'IntegerField': 'int',
+    'BigIntegerField': 'int',
+    'SmallIntegerField': 'int',
+    'PositiveIntegerField': 'int',
+    'PositiveBigIntegerField': 'int',
+    'PositiveSmallIntegerField': 'int',
+    'FloatField': 'float',
+    'DecimalField': 'decimal',
+    'BooleanField': 'bool',
+    'DateField': 'date',
+    'DateTimeField': 'datetime',
+    'TimeField': 'time',
+}
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    One export column. ``source`` is the values_list path it is read
+    from (the name by default); several columns may share a source.
+    ``kind`` overrides the value kind otherwise worked out from the format
+    or the model field.
+    """
+    name: str
+    source: Optional[str] = None
+    format: Optional[Callable] = None
+    default: bool = True
+    kind: Optional[str] = None
+
+    @property
+    def path(self):
+        return self.source or self.name
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    A declared export: where the rows come from, which columns it offers
+    and which filters a client may apply.
+
+    ``filters`` maps request parameters to lookups (``{'status':
+    'order__status'}``); ``date_field`` is the date path ``from``/``to``
+    restrict; ``search`` lists the fields ``q`` matches. Only the columns
+    requested are read from the database. ``changed_field`` is the
+    timestamp an edit to a row (or to what its columns read) moves forward,
+    for the data version. ``incremental`` datasets, whose changed_field is
+    on the model itself, also offer change exports (see ``changes``).
+    """
+    key: str
+    title: str
+    queryset: Callable
+    columns: tuple
+    section: str = ''
+    description: str = ''
+    icon: str = 'fas fa-file-csv'
+    filename: str = ''
+    order_by: str = '-pk'
+    date_field: Optional[str] = None
+    filters: dict = field(default_factory=dict)
+    search: tuple = ()
+    changed_field: Optional[str] = None
+    incremental: bool = False
+    listed: bool = True
+
+    @property
+    def model(self):
+        return self.queryset().model
+
+    def default_columns(self):
+        return [column for column in self.columns if column.default]
+
+    def filter_choices(self):
+        """``[(param, label, choices)]`` for the filters whose field has choices."""
+        found = []
+        for param, lookup in self.filters.items():
+            model_field = _resolve(self.model, lookup)
+            if model_field is not None and model_field.choices:
+                found.append((param, model_field.verbose_name, list(model_field.flatchoices)))
+        return found
+
+    def select_columns(self, names):
+        if not names:
+            return self.default_columns()
+        by_name = {column.name: column for column in self.columns}
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ExportError(f"Unknown column(s) for {self.key}: {', '.join(unknown)}")
+        return [by_name[name] for name in names]
+
+    def filtered(self, params):
+        queryset = self.queryset()
+        if self.date_field:
+            for param, lookup in (('from', 'gte'), ('to', 'lte')):
+                value = params.get(param)
+                if value:
+                    try:
+                        day = parse_date(value)
+                    except ValueError:
+                        day = None
+                    if day is None:
+                        raise ExportError(f'{param} must be a date (YYYY-MM-DD)')
+                    queryset = queryset.filter(**{f'{self.date_field}__{lookup}': day})
+        for param, lookup in self.filters.items():
+            value = params.get(param)
+            if value:
+                model_field = _resolve(self.model, lookup)
+                if model_field is not None and model_field.choices and value not in dict(model_field.flatchoices):
+                    raise ExportError(f'Unknown {param}: {value}')
+                queryset = queryset.filter(**{lookup: value})
+        query = (params.get('q') or '').strip()
+        if query and self.search:
+            matches = Q()
+            for search_field in self.search:
+                matches |= Q(**{f'{search_field}__icontains': query})
+            queryset = queryset.filter(matches)
+        return queryset
+
+    @staticmethod
+    def _column_names(params):
+        names = params.getlist('columns') if hasattr(params, 'getlist') else params.get('columns') or []
+        if isinstance(names, str):
+            names = [names]
+        # Accept both ?columns=a&columns=b and ?columns=a,b
+        return [name for value in names for name in value.split(',') if name]
+
+    def options(self, params):
+        """
+        The parameters that shape this export, validated, as a plain dict
+        (``columns`` always spelled out), so equal requests compare equal.
+        """
+        options = {'columns': [column.name for column in self.select_columns(self._column_names(params))]}
+        names = ['q', *self.filters]
+        if self.date_field:
+            names += ['from', 'to']
+        for name in names:
+            value = (params.get(name) or '').strip()
+            if value:
+                options[name] = value
+        options['format'] = export_format(params)
+        self.filtered(options)
+        return options
+
+    def version(self, params):
+        """
+        ``(rows, version)`` for the rows ``params`` select: their count and
+        a fingerprint that changes when rows are added or removed or, with
+        ``changed_field``, edited.
+        """
+        aggregates = {'rows': Count('pk'), 'last': Max('pk')}
+        if self.changed_field:
+            aggregates['changed'] = Max(self.changed_field)
+        found = self.filtered(params).aggregate(**aggregates)
+        changed = found.get('changed')
+        return found['rows'], f"{found['rows']}:{found['last'] or 0}:{changed.isoformat() if changed else ''}"
+
+    def kinds(self, columns):
+        """``(kind, model_field)`` for each of ``columns`` (the field is None when not read from one)."""
+        kinds = []
+        for column in columns:
+            kind = column.kind or FORMAT_KINDS.get(column.format)
+            model_field = None
+            if kind is None:
+                model_field = self.model._meta.pk if column.path == 'pk' else _resolve(self.model, column.path)
+                if model_field is None:
+                    kind = 'string'
+                elif model_field.choices:
+                    kind = 'category'
+                else:
+                    kind = FIELD_KINDS.get(model_field.get_internal_type(), 'string')
+            kinds.append((kind, model_field))
+        return kinds
+
+    def rows(self, params):
+        """The columns and a lazy row iterator for ``params`` (a QueryDict or dict)."""
+        columns = self.select_columns(self._column_names(params))
+        return columns, _project(self.filtered(params), columns, self.order_by)
+
+    def changes(self, params):
+        """
+        The columns, a lazy row iterator and the next watermark for the rows
+        changed or deleted after the ``since`` watermark, oldest first.
+
+        Rows are keyed on ``(changed_field, pk)``; each starts with
+        ``change`` ('upsert', or 'delete' with only the id) and ``id``.
+        Filters aren't accepted: a row edited out of a filter would
+        silently go missing downstream.
+        """
+        if not self.incremental:
+            raise ExportError(f'{self.key} has no change export')
+        used = [name for name in ('q', 'from', 'to', *self.filters) if params.get(name)]
+        if used:
+            raise ExportError(f"since can't be combined with {', '.join(used)}")
+        since = decode_watermark(params.get('since') or '')
+        columns = [Column('change', kind='category'), Column('id', 'pk')] + [
+            column for column in self.select_columns(self._column_names(params)) if column.name != 'id'
+        ]
+
+        horizon = timezone.now() - CHANGES_SETTLE
+        field = self.changed_field
+        changed = self.queryset().filter(_after(field, 'pk', since), **{f'{field}__lt': horizon})
+        deleted = Tombstone.objects.filter(
+            _after('deleted_at', 'object_id', since),
+            model=self.model._meta.label_lower,
+            deleted_at__lt=horizon,
+        )
+        # Fix the end of this batch before streaming, so rows changed
+        # meanwhile come in the next one rather than being skipped.
+        until = max([
+            since,
+            *(
+                tuple(last) for last in (
+                    changed.order_by(f'-{field}', '-pk').values_list(field, 'pk').first(),
+                    deleted.order_by('-deleted_at', '-object_id').values_list('deleted_at', 'object_id').first(),
+                ) if last
+            ),
+        ])
+        changed = changed.filter(_upto(field, 'pk', until))
+        deleted = deleted.filter(_upto('deleted_at', 'object_id', until))
+
+        def generate():
+            for row in _project(changed, columns[1:], field):
+                yield ['upsert', *row]
+            blanks = [None] * (len(columns) - 2)
+            for object_id, in keyset_rows(deleted, ['object_id'], order_by='deleted_at'):
+                yield ['delete', object_id, *blanks]
+
+        return columns, generate(), encode_watermark(*until)
+
+
+def _project(queryset, columns, order_by):
+    """Stream ``columns`` of ``queryset``, reading each source path once."""
+    paths = list(dict.fromkeys(column.path for column in columns))
+    positions = [paths.index(column.path) for column in columns]
+    formats = [column.format for column in columns]
+    for row in keyset_rows(queryset, paths, order_by=order_by):
+        yield [fmt(row[pos]) if fmt else row[pos] for pos, fmt in zip(positions, formats)]
+
+
+def _resolve(model, lookup):
+    """The model field a ``__`` lookup path ends on, or None."""
+    model_field = None
+    for part in lookup.split('__'):
+        if model is None:
+            return None
+        try:
+            model_field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = model_field.related_model
+    return model_field
+
+
+# format: (content type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def export_format(params):
+    name = params.get('format') or 'csv'
+    if name not in EXPORT_FORMATS:
+        raise ExportError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    return name
+
+
+def parquet_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+class _Sink:
+    """Write-only file that collects what pyarrow writes until take() hands it over."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(pa, kind, model_field):
+    if kind == 'decimal':
+        return pa.decimal128(model_field.max_digits, model_field.decimal_places)
+    if kind == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'date': pa.date32(),
+        'datetime': pa.timestamp('us', tz='UTC'),
+        'time': pa.time64('us'),
+    }.get(kind, pa.string())
+
+
+def parquet_chunks(header, kinds, rows):
+    """
+    ``rows`` as a Parquet file, yielded as bytes as each row group is
+    written. Rows become Arrow record batches of EXPORT_CHUNK_SIZE, so
+    at most one row group is held in memory. Decimals, dates and times
+    keep their types and choice fields are dictionary-encoded. Raises
+    ExportError at once when pyarrow isn't installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError('Parquet exports need the pyarrow package installed')
+
+    types = [_arrow_type(pa, kind, model_field) for kind, model_field in kinds]
+    schema = pa.schema([pa.field(name, arrow_type) for name, arrow_type in zip(header, types)])
+
+    def arrays(batch):
+        for position, ((kind, _), arrow_type) in enumerate(zip(kinds, types)):
+            values = [row[position] for row in batch]
+            if kind == 'category':
+                yield pa.array(values, pa.string()).dictionary_encode()
+            elif kind == 'string':
+                yield pa.array([None if value is None else str(value) for value in values], arrow_type)
+            else:
+                yield pa.array(values, arrow_type)
+
+    def generate():
+        sink = _Sink()
+        with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema) as writer:
+            batches, batched, batch = [], 0, []
+
+            def write_group():
+                # One dictionary per column across the group's batches.
+                writer.write_table(pa.Table.from_batches(batches, schema=schema).unify_dictionaries())
+
+            for row in rows:
+                batch.append(row)
+                if len(batch) == EXPORT_CHUNK_SIZE:
+                    batches.append(pa.record_batch(list(arrays(batch)), schema=schema))
+                    batched += len(batch)
+                    batch = []
+                    if batched >= PARQUET_ROW_GROUP_SIZE:
+                        write_group()
+                        batches, batched = [], 0
+                        yield sink.take()
+            if batch:
+                batches.append(pa.record_batch(list(arrays(batch)), schema=schema))
+            if batches:
+                write_group()
+        yield sink.take()
+
+    return generate()
+
+
+def encode(dataset, name, columns, rows):
+    """
+    The export in format ``name`` as an iterator of chunks: text for csv
+    and ndjson, bytes for parquet.
+    """
+    header = [column.name for column in columns]
+    if name == 'parquet':
+        return parquet_chunks(header, dataset.kinds(columns), rows)
+    if name == 'ndjson':
+        return ndjson_lines(header, rows)
+    return csv_lines(header, rows)
+
+
+EXPORTS = {}
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so change exports report the deleted row."""
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def register(dataset):
+    EXPORTS[dataset.key] = dataset
+    if dataset.incremental:
+        label = dataset.model._meta.label_lower
+        post_delete.connect(record_tombstone, sender=dataset.model, dispatch_uid=f'tombstone:{label}')
+    return dataset
+
+
+def export_response(dataset, params, filename=None):
+    """
+    Stream ``dataset`` in ``format`` (csv by default, ndjson or parquet)
+    for the request parameters ``columns``, ``from``/``to``, ``q`` and the
+    dataset's filters, or with ``since`` only the changes after that
+    watermark (the next one is sent in the ``X-Next-Watermark`` header).
+    Raises ExportError for parameters it can't honour.
+    """
+    name = export_format(params)
+    content_type, extension = EXPORT_FORMATS[name]
+    watermark = None
+    if 'since' in params:
+        columns, rows, watermark = dataset.changes(params)
+        stem = f'{dataset.filename or dataset.key}_changes'
+    else:
+        columns, rows = dataset.rows(params)
+        stem = dataset.filename or dataset.key
+    if filename:
+        filename = f'{os.path.splitext(filename)[0]}.{extension}'
+    else:
+        filename = f'{stem}_{datetime.date.today().isoformat()}.{extension}'
+
+    response = StreamingHttpResponse(encode(dataset, name, columns, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if watermark:
+        response['X-Next-Watermark'] = watermark
+    return response
+
+
+def serve_export(request, key, params=None, filename=None):
+    """Response for an export request: the export stream, or 400 for bad parameters."""
+    dataset = EXPORTS.get(key)
+    if dataset is None:
+        raise Http404(f'No export named {key}')
+    try:
+        return export_response(dataset, request.GET if params is None else params, filename)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -0,0 +1,40 @@
+# core/management/commands/run_export_jobs.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export_jobs import purge_expired_jobs, requeue_stalled_jobs, run_queued_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background export jobs, then delete artifacts older than '
+        'POS_EXPORT_RETENTION_HOURS. Use from cron, or with --loop as a worker process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new jobs instead of exiting once the queue is empty.')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds between polls with --loop (default: 5).')
+        parser.add_argument('--stalled-minutes', type=float, default=15,
+                            help='Requeue running jobs with no progress for this long (default: 15).')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive')
+        if options['stalled_minutes'] <= 0:
+            raise CommandError('--stalled-minutes must be positive')
+
+        while True:
+            requeued = requeue_stalled_jobs(timedelta(minutes=options['stalled_minutes']))
+            if requeued:
+                self.stdout.write(f'Requeued {requeued} stalled export job(s).')
+            ran = run_queued_jobs()
+            purged = purge_expired_jobs()
+            if ran or purged or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {ran} export job(s); purged {purged} expired.'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
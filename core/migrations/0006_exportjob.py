@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alter_license_options_alter_subscriptionplan_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=50)),
+                ('params', models.JSONField(default=dict)),
+                ('data_version', models.CharField(max_length=100)),
+                ('fingerprint', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('total_rows', models.PositiveBigIntegerField(default=0)),
+                ('rows_written', models.PositiveBigIntegerField(default=0)),
+                ('bytes_written', models.PositiveBigIntegerField(default=0)),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_export_status_2ad959_idx')],
+            },
+        ),
+    ]
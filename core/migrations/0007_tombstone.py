@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.model_name', max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'deleted_at', 'object_id'], name='core_tombst_model_d74e56_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='active_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_exportjob_active_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Catalog version the delete was published at (products only)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'catalog_version'], name='core_tombst_model_423688_idx'),
+        ),
+    ]
@@ -241,4 +241,79 @@ class License(models.Model):
         return bool(self.expires_at and self.expires_at < timezone.now().date())
 
     def __str__(self) -> str:
-        return f"{self.system.business_name} - {self.plan.name}"
\ No newline at end of file
+        return f"{self.system.business_name} - {self.plan.name}"
+
+class ExportJob(models.Model):
+    """
+    A registered export (core.exports) written to a gzip file under
+    MEDIA_ROOT by a background worker (core.export_jobs).
+
+    ``fingerprint`` covers the dataset, its options and the data version
+    they read, so a repeat request is served the same artifact until the
+    data changes. ``active_key`` (fingerprint and requester) is unique
+    while the job can still be served, so concurrent repeats share one job;
+    it is cleared when the job fails or its file expires.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+
+    dataset = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    data_version = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64, db_index=True)
+    active_key = models.CharField(max_length=100, null=True, blank=True, unique=True, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveBigIntegerField(default=0)
+    rows_written = models.PositiveBigIntegerField(default=0)
+    bytes_written = models.PositiveBigIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        'accounts.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.dataset} export #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of the rows written, or None while the total is unknown."""
+        if self.status == 'finished':
+            return 100
+        if not self.total_rows:
+            return None
+        return min(99, self.rows_written * 100 // self.total_rows)
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, so change exports (core.exports) and, for
+    products, catalog deltas (inventory.catalog) can report the deletion.
+    """
+    model = models.CharField(max_length=100, help_text="app_label.model_name")
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    catalog_version = models.PositiveBigIntegerField(
+        null=True, blank=True, help_text='Catalog version the delete was published at (products only)',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'object_id']),
+            models.Index(fields=['model', 'catalog_version']),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} #{self.object_id}"
@@ -0,0 +1,45 @@
+# core/signals.py
+from django.core.cache import cache
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import CustomUser
+from sales.models import UnusualTransaction
+from .dashboard import TTL_KEY, invalidate_dashboard
+from .models import SystemSettings
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_is_active(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred field isn't fetched here.
+    instance._loaded_is_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_widgets(sender, instance, created, update_fields=None, **kwargs):
+    """
+    The user widgets count users and active users, so only new users and
+    is_active changes matter, not logins or profile edits.
+    """
+    if update_fields is not None and 'is_active' not in update_fields and not created:
+        return
+    if created or instance.is_active != instance._loaded_is_active:
+        invalidate_dashboard('users')
+    instance._loaded_is_active = instance.is_active
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_user_widgets(sender, **kwargs):
+    invalidate_dashboard('users')
+
+
+@receiver(post_save, sender=UnusualTransaction)
+@receiver(post_delete, sender=UnusualTransaction)
+def invalidate_sales_widgets(sender, **kwargs):
+    invalidate_dashboard('sales')
+
+
+@receiver(post_save, sender=SystemSettings)
+def reset_refresh_rate(sender, **kwargs):
+    """Pick up a changed analytics_refresh_rate on the next dashboard load."""
+    cache.delete(TTL_KEY)
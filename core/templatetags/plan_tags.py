@@ -1,8 +1,8 @@
 from django import template
-from django.utils import timezone
 
 from core.models import SystemSettings, License
 from inventory.models import Product, ProductCategory
+from sales.business_day import business_today
 from sales.models import POSOrder
 
 register = template.Library()
@@ -26,12 +26,12 @@ def plan_usage():
         active = True
 
     plan = license_obj.plan
-    today = timezone.now().date()
+    today = business_today()
 
     products_count = Product.objects.count()
     categories_count = ProductCategory.objects.count()
     today_orders_count = POSOrder.objects.filter(
-        created_at__date=today,
+        business_date=today,
         status="completed",
     ).count()
 
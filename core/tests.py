@@ -1,3 +1,273 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import sys
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from inventory.models import InventoryTransaction, Product, ProductCategory
+from sales.models import POSOrder
+from . import export_jobs, exports
+from .dashboard import CACHE_PREFIX, timeline
+from .export_jobs import request_export
+from .exports import (
+    EXPORTS, ExportError, _after, _upto, decode_watermark, encode_watermark, keyset_rows, parquet_available,
+)
+from .models import ExportJob
+
+USERS_TOKEN = f'{CACHE_PREFIX}:token:users'
+
+
+class UserWidgetInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('cash', password='pw')
+
+    def test_creating_a_user_invalidates(self):
+        self.assertIsNotNone(cache.get(USERS_TOKEN))
+
+    def test_logins_and_edits_do_not_invalidate(self):
+        cache.delete(USERS_TOKEN)
+        update_last_login(None, self.user)
+        self.user.first_name = 'Ada'
+        self.user.save()
+        self.assertIsNone(cache.get(USERS_TOKEN))
+
+    def test_deactivating_invalidates(self):
+        cache.delete(USERS_TOKEN)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNotNone(cache.get(USERS_TOKEN))
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user('cash', password='pw', role='cashier')
+        self.job, _ = request_export('categories', {}, self.owner)
+
+    def get(self, username, name):
+        self.client.force_login(CustomUser.objects.get(username=username))
+        return self.client.get(reverse(name, args=[self.job.pk]))
+
+    def test_only_the_requester_and_admins_see_a_job(self):
+        CustomUser.objects.create_user('other', password='pw', role='cashier')
+        CustomUser.objects.create_user('boss', password='pw', role='admin')
+        for name in ('export_job_status', 'export_job_download'):
+            self.assertEqual(self.get('other', name).status_code, 404)
+        self.assertEqual(self.get('cash', 'export_job_status').status_code, 200)
+        self.assertEqual(self.get('boss', 'export_job_status').status_code, 200)
+        # Not finished yet, but found.
+        self.assertEqual(self.get('cash', 'export_job_download').status_code, 409)
+
+    def test_repeat_request_gets_the_same_job(self):
+        self.assertEqual(request_export('categories', {}, self.owner), (self.job, False))
+
+    def test_concurrent_repeat_shares_the_job(self):
+        # The other request's job was not there yet when this one looked.
+        with mock.patch.object(export_jobs, '_active_job', return_value=None):
+            self.assertEqual(request_export('categories', {}, self.owner), (self.job, False))
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_failed_job_is_not_reused(self):
+        export_jobs._save(self.job, status='failed', active_key=None)
+        job, created = request_export('categories', {}, self.owner)
+        self.assertTrue(created)
+        self.assertNotEqual(job.pk, self.job.pk)
+
+
+@override_settings(POS_BUSINESS_TIMEZONE='Africa/Lagos', POS_BUSINESS_DAY_CUTOFF_HOUR=4)
+class TimelineTests(TestCase):
+    def at(self, day, hour, minute=0):
+        return datetime.datetime(2026, 3, day, hour, minute, tzinfo=datetime.timezone.utc)
+
+    def test_activity_is_bounded_by_the_business_day(self):
+        coke = Product.objects.create(
+            name='Coke', sku='CC50', category=ProductCategory.objects.create(name='Drinks'),
+            price=Decimal('500'), cost_price=Decimal('300'), stock_quantity=20,
+        )
+        # Lagos is UTC+1: the 14th's trading day runs 03:00 UTC on the 14th to 03:00 UTC on the 15th.
+        moments = [self.at(14, 2, 59), self.at(14, 22), self.at(14, 23, 30), self.at(15, 2, 30), self.at(15, 3)]
+        for moment in moments:
+            movement = InventoryTransaction.objects.create(product=coke, transaction_type='in', quantity=1)
+            InventoryTransaction.objects.filter(pk=movement.pk).update(created_at=moment)
+        for name, moment in (('early', self.at(14, 1)), ('late', self.at(15, 1, 15))):
+            CustomUser.objects.create_user(name, password='pw', date_joined=moment)
+
+        activities = timeline(datetime.date(2026, 3, 14))['timeline_activities']
+        self.assertEqual(
+            [(activity['type'], activity['time']) for activity in activities],
+            [('inventory', '03:30'), ('user', '02:15'), ('inventory', '00:30'), ('inventory', '23:00')],
+        )
+
+
+def make_orders(count, stamped=None):
+    orders = [
+        POSOrder.objects.create(
+            order_number=f'A-{n}', total_amount=Decimal('100'), final_amount=Decimal('100'),
+            payment_method='cash', status='completed', cashier='cash',
+        )
+        for n in range(count)
+    ]
+    if stamped is not None:
+        POSOrder.objects.update(updated_at=stamped)
+    return orders
+
+
+class ExportFormatTests(TestCase):
+    params = {'columns': 'order_number,final_amount,business_date'}
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.client.force_login(self.user)
+        make_orders(2)
+        POSOrder.objects.update(business_date=datetime.date(2024, 2, 29))
+
+    def export(self, format_name):
+        return self.client.get(reverse('export_dataset', args=['orders']), {**self.params, 'format': format_name})
+
+    def test_ndjson_is_one_object_per_line(self):
+        response = self.export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        # Newest first, like the CSV.
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'order_number': 'A-1', 'final_amount': '100.00', 'business_date': '2024-02-29'},
+            {'order_number': 'A-0', 'final_amount': '100.00', 'business_date': '2024-02-29'},
+        ])
+
+    @skipUnless(parquet_available(), 'pyarrow is not installed')
+    def test_parquet_keeps_decimal_and_date_types(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        response = self.export('parquet')
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.schema.field('final_amount').type, pa.decimal128(10, 2))
+        self.assertEqual(table.schema.field('business_date').type, pa.date32())
+        self.assertEqual(table.to_pylist()[0], {
+            'order_number': 'A-1', 'final_amount': Decimal('100.00'), 'business_date': datetime.date(2024, 2, 29),
+        })
+
+    def test_parquet_without_pyarrow_is_a_bad_request(self):
+        with mock.patch.dict(sys.modules, {'pyarrow': None, 'pyarrow.parquet': None}):
+            response = self.export('parquet')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pyarrow', response.json()['error'])
+        with mock.patch.object(export_jobs, 'parquet_available', return_value=False):
+            with self.assertRaisesMessage(ExportError, 'pyarrow'):
+                request_export('orders', {'format': 'parquet'}, self.user)
+
+
+class ExportRegistryTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user('cash', password='pw', role='admin'))
+
+    def export(self, key, **params):
+        return self.client.get(reverse('export_dataset', args=[key]), params)
+
+    def test_unknown_columns_are_refused(self):
+        response = self.export('orders', columns='order_number,colour,size')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown column(s) for orders: colour, size')
+        with self.assertRaisesMessage(ExportError, 'colour'):
+            EXPORTS['orders'].options({'columns': ['order_number', 'colour']})
+
+    def test_filter_values_outside_the_choices_are_refused(self):
+        response = self.export('orders', status='lost')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown status: lost')
+        self.assertEqual(self.export('orders', status='completed').status_code, 200)
+
+    def test_bad_dates_and_formats_are_refused(self):
+        for params in ({'from': 'yesterday'}, {'to': '2026-02-30'}, {'format': 'xlsx'}):
+            self.assertEqual(self.export('orders', **params).status_code, 400, params)
+
+    def test_unknown_export(self):
+        self.assertEqual(self.export('salaries').status_code, 404)
+        with self.assertRaisesMessage(ExportError, 'No export named salaries'):
+            request_export('salaries', {})
+
+    def test_columns_in_either_spelling(self):
+        dataset = EXPORTS['orders']
+        self.assertEqual(
+            dataset.options({'columns': 'final_amount,order_number'})['columns'],
+            dataset.options({'columns': ['final_amount', 'order_number']})['columns'],
+        )
+
+
+class WatermarkTests(TestCase):
+    def test_round_trip(self):
+        moment = datetime.datetime(2026, 3, 14, 9, 30, 0, 123456, tzinfo=datetime.timezone.utc)
+        self.assertEqual(decode_watermark(encode_watermark(moment, 42)), (moment, 42))
+
+    def test_empty_and_zero_start_from_the_beginning(self):
+        self.assertEqual(decode_watermark(''), decode_watermark('0'))
+        self.assertEqual(decode_watermark('0')[1], 0)
+
+    def test_malformed_watermark(self):
+        for value in ('abc', '12', '1-2-3', '1-x'):
+            with self.assertRaises(ExportError):
+                decode_watermark(value)
+
+    def test_after_and_upto_split_ties_on_the_timestamp_by_pk(self):
+        moment = timezone.now() - datetime.timedelta(hours=1)
+        first, middle, last = make_orders(3, stamped=moment)
+        orders = POSOrder.objects.order_by('pk')
+        mark = (moment, middle.pk)
+
+        self.assertEqual(list(orders.filter(_after('updated_at', 'pk', mark))), [last])
+        self.assertEqual(list(orders.filter(_upto('updated_at', 'pk', mark))), [first, middle])
+
+
+class ChangeExportTests(TestCase):
+    def changes(self, since=''):
+        columns, rows, watermark = EXPORTS['orders'].changes({'since': since, 'columns': ['order_number']})
+        return [row[:2] for row in rows], watermark
+
+    def test_batches_cover_every_change_once_including_deletes(self):
+        first, second = make_orders(2, stamped=timezone.now() - datetime.timedelta(hours=1))
+        with mock.patch.object(exports, 'CHANGES_SETTLE', datetime.timedelta(0)):
+            rows, watermark = self.changes()
+            self.assertEqual(rows, [['upsert', first.pk], ['upsert', second.pk]])
+
+            deleted = second.pk
+            second.delete()
+            rows, watermark = self.changes(watermark)
+            self.assertEqual(rows, [['delete', deleted]])
+            self.assertEqual(self.changes(watermark)[0], [])
+
+    def test_a_later_row_tied_on_updated_at_comes_in_the_next_batch(self):
+        moment = timezone.now() - datetime.timedelta(hours=1)
+        make_orders(2, stamped=moment)
+        with mock.patch.object(exports, 'CHANGES_SETTLE', datetime.timedelta(0)):
+            _, watermark = self.changes()
+            late = POSOrder.objects.create(
+                order_number='B-1', total_amount=Decimal('5'), final_amount=Decimal('5'),
+                payment_method='cash', status='completed', cashier='cash',
+            )
+            POSOrder.objects.filter(pk=late.pk).update(updated_at=moment)
+            self.assertEqual(self.changes(watermark)[0], [['upsert', late.pk]])
+
+    def test_recent_rows_wait_for_the_settle_period(self):
+        make_orders(1)
+        self.assertEqual(self.changes()[0], [])
+
+
+class KeysetRowsTests(TestCase):
+    def test_pages_of_exactly_chunk_size(self):
+        orders = make_orders(4)
+        rows = list(keyset_rows(POSOrder.objects.all(), ['pk'], order_by='pk', chunk_size=2))
+        self.assertEqual(rows, [(order.pk,) for order in orders])
+
+    def test_ties_on_the_ordering_field_are_not_skipped(self):
+        orders = make_orders(5, stamped=timezone.now())
+        rows = list(keyset_rows(POSOrder.objects.all(), ['pk'], order_by='-updated_at', chunk_size=2))
+        self.assertEqual(rows, [(order.pk,) for order in reversed(orders)])
@@ -12,5 +12,10 @@ urlpatterns = [
     path('dynamic-form/', views.dynamic_form_test, name='dynamic_form_test'),
     path('api/form-data/<str:content_type>/<int:object_id>/', views.get_form_data, name='get_form_data'),
 
+    path('exports/<str:key>/', views.export_dataset, name='export_dataset'),
+    path('exports/<str:key>/jobs/', views.export_job_create, name='export_job_create'),
+    path('exports/jobs/<int:pk>/', views.export_job_status, name='export_job_status'),
+    path('exports/jobs/<int:pk>/download/', views.export_job_download, name='export_job_download'),
+
     path('offline/', views.offline, name='offline'),
 ]
@@ -9,6 +9,7 @@ from django.utils import timezone
 from .models import CustomField, FieldValue, DynamicFormData, FormDataEntry, SystemSettings, License
 from inventory.models import Product, ProductCategory
 from sales.models import POSOrder
+from sales.business_day import business_today
 
 
 class DynamicFormEngine:
@@ -310,7 +311,7 @@ def check_limit_or_block(limit_name: str):
 
     plan = license_obj.plan
 
-    today = timezone.now().date()
+    today = business_today()
 
     # Map each limit to current usage + allowed max
     if limit_name == "products":
@@ -321,7 +322,7 @@ def check_limit_or_block(limit_name: str):
         current = ProductCategory.objects.count()
     elif limit_name == "orders_per_day":
         max_allowed = plan.max_orders_per_day
-        current = POSOrder.objects.filter(created_at__date=today).count()
+        current = POSOrder.objects.filter(business_date=today).count()
     else:
         # Unknown limit; do nothing
         return
@@ -16,6 +16,13 @@ from datetime import datetime, timedelta
 from inventory.models import Product
 from accounts.models import CustomUser
 from sales.models import POSOrder, POSOrderItem, DailySalesSummary
+from .dashboard import DashboardSnapshot
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+from .export_jobs import artifact_exists, artifact_response, job_json, request_export
+from .exports import EXPORTS, ExportError, serve_export
+from .models import ExportJob
 
 @login_required
 def home(request):
@@ -26,98 +33,13 @@ def home(request):
 @login_required
 def dashboard(request):
     """Main dashboard with real data"""
-    today = timezone.now().date()
-    
-    # Get today's summary
-    today_summary = DailySalesSummary.objects.filter(date=today).first()
-    
-    # Calculate today's sales if summary doesn't exist
-    if not today_summary:
-        today_orders = POSOrder.objects.filter(
-            created_at__date=today,
-            status='completed'
-        )
-        today_sales = today_orders.aggregate(total=Sum('final_amount'))['total'] or 0
-        today_transactions = today_orders.count()
-    else:
-        today_sales = today_summary.total_revenue
-        today_transactions = today_summary.total_transactions
-    
-    # Get inventory data
-    total_inventory = Product.objects.count()
-    low_stock_products = Product.objects.filter(stock_status__in=['low_stock', 'out_of_stock']).count()
-    
-    # Get user data
-    total_users = CustomUser.objects.count()
-    active_users = CustomUser.objects.filter(is_active=True).count()
-    
-    # Get recent orders for timeline
-    recent_orders = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).order_by('-created_at')[:3]
-    
-    # Get recent inventory updates
-    from inventory.models import InventoryTransaction
-    recent_inventory_updates = InventoryTransaction.objects.filter(
-        created_at__date=today
-    ).order_by('-created_at')[:3]
-    
-    # Get recent user additions
-    recent_users = CustomUser.objects.filter(
-        date_joined__date=today
-    ).order_by('-date_joined')[:3]
-    
-    # Combine timeline activities
-    timeline_activities = []
-    
-    # Add recent orders
-    for order in recent_orders:
-        timeline_activities.append({
-            'type': 'sale',
-            'title': f'POS Sale #{order.order_number}',
-            'amount': order.final_amount,
-            'time': order.created_at.strftime('%H:%M'),
-            'icon': 'fas fa-cash-register',
-            'color': 'primary'
-        })
-    
-    # Add recent inventory updates
-    for update in recent_inventory_updates:
-        timeline_activities.append({
-            'type': 'inventory',
-            'title': f'Inventory {update.transaction_type.title()}',
-            'product': update.product.name,
-            'quantity': update.quantity,
-            'time': update.created_at.strftime('%H:%M'),
-            'icon': 'fas fa-box',
-            'color': 'success'
-        })
-    
-    # Add recent users
-    for user in recent_users:
-        timeline_activities.append({
-            'type': 'user',
-            'title': f'New User: {user.username}',
-            'time': user.date_joined.strftime('%H:%M'),
-            'icon': 'fas fa-user-plus',
-            'color': 'info'
-        })
-    
-    # Sort by time (most recent first)
-    timeline_activities.sort(key=lambda x: x['time'], reverse=True)
-    
-    context = {
-        'today_sales': today_sales,
-        'today_transactions': today_transactions,
-        'total_inventory': total_inventory,
-        'low_stock_products': low_stock_products,
-        'total_users': total_users,
-        'active_users': active_users,
-        'timeline_activities': timeline_activities[:6],  # Show only top 6
+    context = DashboardSnapshot().widgets('today_sales', 'inventory', 'users', 'timeline')
+    # This view counts low and out-of-stock products together
+    context['low_stock_products'] += context['out_of_stock_products']
+    context.update({
         'user_role': request.user.role,
         'user_name': request.user.get_full_name() or request.user.username,
-    }
+    })
     return render(request, 'accounts/dashboard.html', context)
 
     
@@ -261,4 +183,68 @@ def offline(request):
     """
     Shown when the service worker can't reach network and no cached page is available.
     """
-    return render(request, 'core/offline.html')
\ No newline at end of file
+    return render(request, 'core/offline.html')
+
+
+@login_required
+def export_dataset(request, key):
+    """
+    Any registered export as CSV. Accepts ``columns`` (subset, in order),
+    ``from``/``to`` dates, ``q`` and the dataset's own filters.
+    """
+    return serve_export(request, key)
+
+
+@login_required
+@require_POST
+def export_job_create(request, key):
+    """
+    Queue a registered export to be written in the background (same
+    parameters as export_dataset). An unchanged repeat of a request gets
+    the existing job and its file.
+    """
+    if key not in EXPORTS:
+        raise Http404(f'No export named {key}')
+    try:
+        job, created = request_export(key, request.POST, request.user)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'job': _export_job_json(job)}, status=202 if created else 200)
+
+
+# Roles that may follow any user's background export; others see only their own.
+EXPORT_JOB_ADMIN_ROLES = ('superadmin', 'admin')
+
+
+def _export_job(request, pk):
+    jobs = ExportJob.objects.all()
+    if request.user.role not in EXPORT_JOB_ADMIN_ROLES:
+        jobs = jobs.filter(requested_by=request.user)
+    return get_object_or_404(jobs, pk=pk)
+
+
+def _export_job_json(job):
+    data = job_json(job)
+    data['status_url'] = reverse('export_job_status', args=[job.pk])
+    data['download_url'] = reverse('export_job_download', args=[job.pk]) if job.status == 'finished' else None
+    return data
+
+
+@login_required
+@require_GET
+def export_job_status(request, pk):
+    """Progress of a background export, for polling."""
+    job = _export_job(request, pk)
+    return JsonResponse({'success': True, 'job': _export_job_json(job)})
+
+
+@login_required
+@require_GET
+def export_job_download(request, pk):
+    """The finished export as .csv.gz, with range requests for resuming."""
+    job = _export_job(request, pk)
+    if job.status != 'finished':
+        return JsonResponse({'success': False, 'error': f'Export is {job.status}'}, status=409)
+    if not artifact_exists(job):
+        return JsonResponse({'success': False, 'error': 'Export file has expired; request it again'}, status=410)
+    return artifact_response(request, job)
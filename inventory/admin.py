@@ -1,6 +1,6 @@
 # inventory/admin.py (updated)
 from django.contrib import admin
-from .models import ProductCategory, Product, ProductDynamicData, InventoryTransaction
+from .models import ProductCategory, Product, ProductDynamicData, InventoryTransaction, ProductBarcode
 
 @admin.register(ProductCategory)
 class ProductCategoryAdmin(admin.ModelAdmin):
@@ -8,12 +8,17 @@ class ProductCategoryAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('name', 'description')
 
+class ProductBarcodeInline(admin.TabularInline):
+    model = ProductBarcode
+    extra = 1
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'sku', 'category', 'price', 'stock_quantity', 'stock_status', 'status', 'created_at')
     list_filter = ('category', 'status', 'stock_status', 'created_at')
-    search_fields = ('name', 'sku', 'barcode')
+    search_fields = ('name', 'sku', 'barcode', 'alternate_barcodes__barcode')
     readonly_fields = ('stock_status',)
+    inlines = [ProductBarcodeInline]
 
 @admin.register(ProductDynamicData)
 class ProductDynamicDataAdmin(admin.ModelAdmin):
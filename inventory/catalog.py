@@ -0,0 +1,84 @@
+# inventory/catalog.py
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Tombstone
+from .models import Product, CatalogVersion
+
+CATALOG_FIELDS = ('id', 'name', 'sku', 'barcode', 'price', 'stock_quantity', 'status')
+
+
+def bump_catalog_version() -> int:
+    """
+    Increment the catalog version and return the new value.
+
+    The counter row stays locked until the surrounding transaction commits,
+    so versions become visible to readers in the order they were handed out
+    and a client never skips past a change that was still in flight.
+    """
+    with transaction.atomic():
+        updated = CatalogVersion.objects.filter(pk=1).update(value=F('value') + 1)
+        if not updated:
+            CatalogVersion.objects.get_or_create(pk=1, defaults={'value': 0})
+            CatalogVersion.objects.filter(pk=1).update(value=F('value') + 1)
+        return CatalogVersion.objects.values_list('value', flat=True).get(pk=1)
+
+
+def current_catalog_version() -> int:
+    return CatalogVersion.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+
+def product_tombstones():
+    """Tombstones of deleted products (core.Tombstone, which change exports share)."""
+    return Tombstone.objects.filter(model=Product._meta.label_lower)
+
+
+def _record(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'sku': row['sku'],
+        'barcode': row['barcode'],
+        'price': str(row['price']),
+        'stock_quantity': row['stock_quantity'],
+        'status': row['status'],
+    }
+
+
+def catalog_snapshot():
+    """Every active product, plus the version the snapshot reflects."""
+    with transaction.atomic():
+        version = current_catalog_version()
+        rows = Product.objects.filter(status='active').order_by('name').values(*CATALOG_FIELDS)
+        return {
+            'version': version,
+            'full': True,
+            'products': [_record(row) for row in rows],
+            'removed': [],
+        }
+
+
+def catalog_changes(since: int):
+    """
+    Products changed (including deactivated ones) and deleted after ``since``.
+
+    Falls back to a full snapshot when the client has no version yet or
+    holds a version the server never issued. Stock-only updates do not bump
+    the version (see inventory.stock), so ``stock_quantity`` is as of each
+    product's last catalog change.
+    """
+    with transaction.atomic():
+        version = current_catalog_version()
+        if since <= 0 or since > version:
+            return catalog_snapshot()
+
+        rows = Product.objects.filter(catalog_version__gt=since).values(*CATALOG_FIELDS)
+        removed = product_tombstones().filter(
+            catalog_version__gt=since
+        ).values_list('object_id', flat=True)
+        return {
+            'version': version,
+            'full': False,
+            'products': [_record(row) for row in rows],
+            'removed': list(removed),
+        }
@@ -0,0 +1,102 @@
+# inventory/exports.py
+from core.exports import Column, Dataset, register
+from .models import Product, ProductCategory, InventoryTransaction, StockAdjustment
+
+products = register(Dataset(
+    key='products',
+    title='Products',
+    description='All products with pricing & stock',
+    icon='fas fa-box',
+    section='inventory',
+    queryset=Product.objects.all,
+    columns=(
+        Column('id'),
+        Column('name'),
+        Column('sku'),
+        Column('category', 'category__name'),
+        Column('cost_price'),
+        Column('stock_quantity'),
+        Column('minimum_stock'),
+        Column('status'),
+        Column('stock_status'),
+        Column('created_at'),
+        Column('updated_at'),
+        Column('price', default=False),
+        Column('barcode', default=False),
+        Column('unit_of_measure', default=False),
+    ),
+    order_by='name',
+    filters={'status': 'status', 'stock_status': 'stock_status', 'category': 'category__name'},
+    search=('name', 'sku', 'barcode'),
+    changed_field='updated_at',
+))
+
+categories = register(Dataset(
+    key='categories',
+    title='Categories',
+    description='All product categories',
+    icon='fas fa-tags',
+    section='inventory',
+    queryset=ProductCategory.objects.all,
+    columns=(
+        Column('id'),
+        Column('name'),
+        Column('description'),
+        Column('color_code'),
+        Column('icon'),
+        Column('created_at'),
+        Column('updated_at'),
+    ),
+    order_by='name',
+    search=('name',),
+    changed_field='updated_at',
+))
+
+stock_movements = register(Dataset(
+    key='stock_movements',
+    title='Stock Movements',
+    description='Every stock in/out record',
+    icon='fas fa-arrows-rotate',
+    section='inventory',
+    filename='inventory_transactions',
+    queryset=InventoryTransaction.objects.all,
+    columns=(
+        Column('id'),
+        Column('product_name', 'product__name'),
+        Column('product_sku', 'product__sku'),
+        Column('transaction_type'),
+        Column('quantity'),
+        Column('reference'),
+        Column('notes'),
+        Column('created_by'),
+        Column('created_at'),
+    ),
+    date_field='created_at__date',
+    filters={'type': 'transaction_type'},
+    search=('product__name', 'product__sku', 'reference'),
+    changed_field='product__updated_at',
+))
+
+stock_adjustments = register(Dataset(
+    key='stock_adjustments',
+    title='Stock Adjustments',
+    description='Manual stock changes & reasons',
+    icon='fas fa-sliders-h',
+    section='inventory',
+    queryset=StockAdjustment.objects.all,
+    columns=(
+        Column('id'),
+        Column('product_name', 'product__name'),
+        Column('product_sku', 'product__sku'),
+        Column('adjustment_type'),
+        Column('quantity'),
+        Column('reason'),
+        Column('reference_number'),
+        Column('performed_by'),
+        Column('created_at'),
+    ),
+    date_field='created_at__date',
+    filters={'type': 'adjustment_type'},
+    search=('product__name', 'product__sku', 'reference_number'),
+    changed_field='updated_at',
+))
@@ -0,0 +1,109 @@
+# inventory/lookup.py
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from .catalog import current_catalog_version, product_tombstones
+from .models import Product, ProductBarcode
+
+IndexedProduct = namedtuple('IndexedProduct', 'id name sku price stock_quantity')
+
+
+class ProductIndex:
+    """
+    Per-process barcode/SKU -> product lookup table for the scan endpoint.
+
+    The index is built once and then kept current from the catalog version:
+    local Product writes mark it dirty through signals, and changes made by
+    other workers are picked up by comparing versions at most every
+    ``check_interval`` seconds. Only the rows changed since the last version
+    are re-read.
+    """
+    check_interval = 2.0
+    # Versions below the last one seen that are read again on each update,
+    # in case a write holding an earlier version committed after we looked.
+    overlap = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._dirty = True
+        # (by barcode, by SKU, product id -> its codes), replaced as a whole
+        # so lookups never see a half-applied update.
+        self._maps = ({}, {}, {})
+
+    def invalidate(self):
+        """Force a version check on the next lookup."""
+        self._dirty = True
+
+    def lookup(self, code):
+        """Resolve a scanned barcode, alternate barcode or SKU."""
+        code = (code or '').strip()
+        if not code:
+            return None
+        self._refresh()
+        by_barcode, by_sku, _ = self._maps
+        return by_barcode.get(code) or by_sku.get(code)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if not self._dirty and self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._dirty = False
+            self._checked_at = now
+            version = current_catalog_version()
+            if self._version is None or version < self._version:
+                self._rebuild(version)
+            elif version > self._version:
+                self._apply_changes(self._version, version)
+
+    def _rebuild(self, version):
+        maps = ({}, {}, {})
+        self._load(maps, Product.objects.filter(status='active'))
+        self._maps = maps
+        self._version = version
+
+    def _apply_changes(self, since, version):
+        since = max(since - self.overlap, 0)
+        changed = Product.objects.filter(catalog_version__gte=since)
+        removed = product_tombstones().filter(catalog_version__gte=since).values_list('object_id', flat=True)
+        maps = tuple(dict(m) for m in self._maps)
+        for product_id in list(changed.values_list('id', flat=True)) + list(removed):
+            self._forget(maps, product_id)
+        self._load(maps, changed.filter(status='active'))
+        self._maps = maps
+        self._version = version
+
+    @staticmethod
+    def _load(maps, queryset):
+        by_barcode, by_sku, codes = maps
+        rows = list(queryset.values_list('id', 'name', 'sku', 'barcode', 'price', 'stock_quantity'))
+        extra = {}
+        for product_id, barcode in ProductBarcode.objects.filter(
+            product_id__in=[row[0] for row in rows]
+        ).values_list('product_id', 'barcode'):
+            extra.setdefault(product_id, []).append(barcode)
+
+        for product_id, name, sku, barcode, price, stock in rows:
+            record = IndexedProduct(product_id, name, sku, Decimal(price), stock)
+            barcodes = [b for b in [barcode] + extra.get(product_id, []) if b]
+            for code in barcodes:
+                by_barcode[code] = record
+            by_sku[sku] = record
+            codes[product_id] = (barcodes, sku)
+
+    @staticmethod
+    def _forget(maps, product_id):
+        by_barcode, by_sku, codes = maps
+        barcodes, sku = codes.pop(product_id, ((), None))
+        for code in barcodes:
+            if getattr(by_barcode.get(code), 'id', None) == product_id:
+                del by_barcode[code]
+        if getattr(by_sku.get(sku), 'id', None) == product_id:
+            del by_sku[sku]
+
+
+product_index = ProductIndex()
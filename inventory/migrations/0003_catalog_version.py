@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    CatalogVersion = apps.get_model('inventory', 'CatalogVersion')
+    CatalogVersion.objects.get_or_create(pk=1, defaults={'value': 0})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stockadjustment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Catalog Version',
+                'verbose_name_plural': 'Catalog Version',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.PositiveBigIntegerField()),
+                ('catalog_version', models.PositiveBigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Product Tombstone',
+                'verbose_name_plural': 'Product Tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, help_text='Catalog version at which this product last changed'),
+        ),
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
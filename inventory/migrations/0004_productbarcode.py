@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductBarcode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alternate_barcodes', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Product Barcode',
+                'verbose_name_plural': 'Product Barcodes',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+from django.db import migrations
+
+
+def move_tombstones(apps, schema_editor):
+    # Product deletes are recorded as core.Tombstone rows from now on.
+    ProductTombstone = apps.get_model('inventory', 'ProductTombstone')
+    Tombstone = apps.get_model('core', 'Tombstone')
+    Tombstone.objects.bulk_create(
+        (
+            Tombstone(
+                model='inventory.product',
+                object_id=old.product_id,
+                deleted_at=old.deleted_at,
+                catalog_version=old.catalog_version,
+            )
+            for old in ProductTombstone.objects.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tombstone_catalog_version'),
+        ('inventory', '0004_productbarcode'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_tombstones, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ProductTombstone',
+        ),
+    ]
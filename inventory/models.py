@@ -1,5 +1,5 @@
 # inventory/models.py (updated)
-from django.db import models
+from django.db import models, transaction
 from core.models import CustomField, DynamicFormData
 
 class ProductCategory(models.Model):
@@ -52,6 +52,10 @@ class Product(models.Model):
     
     # Status and tracking
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='active')
+    catalog_version = models.PositiveBigIntegerField(
+        default=0, db_index=True, editable=False,
+        help_text='Catalog version at which this product last changed',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -64,6 +68,8 @@ class Product(models.Model):
         return f"{self.name} ({self.sku})"
     
     def save(self, *args, **kwargs):
+        from .catalog import bump_catalog_version
+
         # Update stock status based on quantity
         if self.stock_quantity == 0:
             self.stock_status = 'out_of_stock'
@@ -71,7 +77,40 @@ class Product(models.Model):
             self.stock_status = 'low_stock'
         else:
             self.stock_status = 'in_stock'
-        super().save(*args, **kwargs)
+        # One transaction, so the version is never visible before the row
+        # that carries it.
+        with transaction.atomic():
+            self.catalog_version = bump_catalog_version()
+            super().save(*args, **kwargs)
+
+class ProductBarcode(models.Model):
+    """
+    Additional barcodes that resolve to a product (multi-packs, supplier codes)
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='alternate_barcodes')
+    barcode = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Product Barcode'
+        verbose_name_plural = 'Product Barcodes'
+    
+    def __str__(self):
+        return f"{self.barcode} -> {self.product.name}"
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter bumped whenever a product changes, so POS clients
+    can ask for only the rows changed since the version they hold.
+    """
+    value = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Catalog Version'
+        verbose_name_plural = 'Catalog Version'
+    
+    def __str__(self):
+        return f"Catalog v{self.value}"
 
 class ProductDynamicData(models.Model):
     """
@@ -0,0 +1,45 @@
+# inventory/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tombstone
+from .catalog import bump_catalog_version
+from .lookup import product_index
+from .models import Product, ProductBarcode
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    """
+    Leave a tombstone so catalog deltas can tell clients to drop the
+    product. It is the one core.Tombstone for the delete, stamped with the
+    catalog version, so products must not also be registered as an
+    incremental export (that would record the delete again).
+    """
+    with transaction.atomic():
+        Tombstone.objects.create(
+            model=sender._meta.label_lower,
+            object_id=instance.pk,
+            catalog_version=bump_catalog_version(),
+        )
+
+
+@receiver(post_save, sender=ProductBarcode)
+@receiver(post_delete, sender=ProductBarcode)
+def touch_product_for_barcode(sender, instance, **kwargs):
+    """Alternate barcodes are part of the product's catalog entry."""
+    with transaction.atomic():
+        Product.objects.filter(pk=instance.product_id).update(
+            catalog_version=bump_catalog_version(),
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductBarcode)
+@receiver(post_delete, sender=ProductBarcode)
+def invalidate_product_index(sender, **kwargs):
+    product_index.invalidate()
@@ -0,0 +1,137 @@
+# inventory/stock.py
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField, CharField
+from django.utils import timezone
+
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    """Raised when a reservation cannot be met for one or more products."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        names = ', '.join(
+            f"{s['name']} (available: {s['available']})" for s in shortages
+        )
+        super().__init__(f'Insufficient stock for {names}')
+
+
+def _per_product(values):
+    """CASE id WHEN ... THEN <value> END for a {product_id: int} mapping."""
+    return Case(
+        *[When(pk=product_id, then=Value(value)) for product_id, value in values.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _stock_status_after(deltas):
+    """
+    Stock status expression for the quantity *after* applying deltas.
+
+    Expressed against the current column value so it does not matter
+    whether the backend evaluates SET clauses against old or new values
+    (MySQL uses the new value for columns assigned earlier in the list).
+    """
+    negated = _per_product({pk: -delta for pk, delta in deltas.items()})
+    return Case(
+        When(stock_quantity__lte=negated, then=Value('out_of_stock')),
+        When(stock_quantity__lte=F('minimum_stock') + negated, then=Value('low_stock')),
+        default=Value('in_stock'),
+        output_field=CharField(),
+    )
+
+
+def _apply_deltas(deltas, guard):
+    """
+    Apply signed stock deltas to many products in one UPDATE.
+
+    Only the stock columns and updated_at (so exports pick up the new
+    quantities) are written; Product.save() and its signals are bypassed.
+    Returns the number of rows updated.
+
+    The catalog version is deliberately not bumped: that is one counter
+    row, and bumping it here would hold its lock until each checkout
+    commits, so every till would queue behind it. Catalog clients get
+    stock as of the last product edit; the reservation guard is what
+    enforces it.
+    """
+    from core.dashboard import invalidate_dashboard_on_commit
+
+    queryset = Product.objects.filter(pk__in=list(deltas))
+    if guard:
+        queryset = queryset.filter(stock_quantity__gte=_per_product({
+            pk: -delta for pk, delta in deltas.items()
+        }))
+    # stock_status must come first so MySQL evaluates it before the
+    # quantity column is reassigned.
+    updated = queryset.update(
+        stock_status=_stock_status_after(deltas),
+        stock_quantity=F('stock_quantity') + _per_product(deltas),
+        updated_at=timezone.now(),
+    )
+    invalidate_dashboard_on_commit('inventory')
+    return updated
+
+
+def _merge(quantities):
+    """Normalise a mapping or (product_id, quantity) pairs, summing repeats."""
+    if hasattr(quantities, 'items'):
+        quantities = quantities.items()
+    merged = {}
+    for product_id, quantity in quantities:
+        quantity = int(quantity)
+        if quantity > 0:
+            merged[int(product_id)] = merged.get(int(product_id), 0) + quantity
+    return merged
+
+
+def _shortages(quantities):
+    products = Product.objects.in_bulk(list(quantities))
+    shortages = []
+    for product_id, requested in quantities.items():
+        product = products.get(product_id)
+        available = product.stock_quantity if product else 0
+        if available < requested:
+            shortages.append({
+                'product_id': product_id,
+                'name': product.name if product else f'product #{product_id}',
+                'requested': requested,
+                'available': available,
+            })
+    return shortages
+
+
+class _PartialReservation(Exception):
+    pass
+
+
+def reserve_stock(quantities):
+    """
+    Atomically take stock for a whole cart.
+
+    ``quantities`` maps product id to quantity (or is an iterable of
+    ``(product_id, quantity)`` pairs). Either every product has
+    enough stock and all are decremented in a single conditional UPDATE,
+    or nothing changes and InsufficientStock is raised.
+    """
+    quantities = _merge(quantities)
+    if not quantities:
+        return
+
+    try:
+        with transaction.atomic():
+            updated = _apply_deltas({pk: -qty for pk, qty in quantities.items()}, guard=True)
+            if updated != len(quantities):
+                # Roll back the rows that did have enough stock.
+                raise _PartialReservation
+    except _PartialReservation:
+        raise InsufficientStock(_shortages(quantities))
+
+
+def release_stock(quantities):
+    """Return previously reserved stock for many products in one UPDATE."""
+    quantities = _merge(quantities)
+    if quantities:
+        _apply_deltas(quantities, guard=False)
@@ -1,3 +1,136 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Tombstone
+from .catalog import bump_catalog_version, catalog_changes, current_catalog_version, product_tombstones
+from .exports import products as products_export
+from .lookup import ProductIndex
+from .stock import InsufficientStock, release_stock, reserve_stock
+from .models import Product, ProductBarcode, ProductCategory
+
+
+def make_product(name, sku, stock=20, **fields):
+    category, _ = ProductCategory.objects.get_or_create(name='Drinks')
+    return Product.objects.create(
+        name=name, sku=sku, barcode=sku, category=category,
+        price=Decimal('500'), cost_price=Decimal('300'),
+        stock_quantity=stock, minimum_stock=5, **fields,
+    )
+
+
+class CatalogVersionTests(TestCase):
+    def test_failed_save_does_not_bump_the_version(self):
+        make_product('Coke', 'CC50')
+        version = current_catalog_version()
+        with self.assertRaises(IntegrityError):
+            make_product('Coke again', 'CC50')
+        self.assertEqual(current_catalog_version(), version)
+
+    def test_barcode_changes_touch_the_product(self):
+        coke = make_product('Coke', 'CC50')
+        ProductBarcode.objects.create(product=coke, barcode='999')
+        coke.refresh_from_db()
+        self.assertEqual(coke.catalog_version, current_catalog_version())
+
+    def test_stock_changes_touch_updated_at(self):
+        coke = make_product('Coke', 'CC50')
+        reserve_stock({coke.pk: 2})
+        changed = Product.objects.get(pk=coke.pk)
+        self.assertEqual(changed.stock_quantity, 18)
+        self.assertGreater(changed.updated_at, coke.updated_at)
+
+    def test_stock_changes_leave_the_catalog_version_alone(self):
+        # Checkouts from every till would otherwise queue on the one counter row.
+        coke = make_product('Coke', 'CC50')
+        version = current_catalog_version()
+        with CaptureQueriesContext(connection) as queries:
+            reserve_stock({coke.pk: 2})
+            release_stock({coke.pk: 1})
+        self.assertFalse([q for q in queries if 'catalogversion' in q['sql'].lower()])
+        self.assertEqual(current_catalog_version(), version)
+
+    def test_stock_changes_move_the_products_export_version(self):
+        coke = make_product('Coke', 'CC50')
+        options = products_export.options({})
+        _, before = products_export.version(options)
+        reserve_stock({coke.pk: 2})
+        self.assertNotEqual(products_export.version(options)[1], before)
+
+
+class ProductTombstoneTests(TestCase):
+    def test_a_delete_is_recorded_once_for_deltas_and_exports(self):
+        coke = make_product('Coke', 'CC50')
+        make_product('Fanta', 'FA50')
+        version = current_catalog_version()
+        index = ProductIndex()
+        index.lookup('CC50')
+        deleted = coke.pk
+        coke.delete()
+        index.invalidate()
+
+        tombstone, = Tombstone.objects.all()
+        self.assertEqual((tombstone.model, tombstone.object_id), ('inventory.product', deleted))
+        self.assertEqual(tombstone.catalog_version, current_catalog_version())
+        self.assertEqual(list(product_tombstones()), [tombstone])
+        self.assertEqual(catalog_changes(version)['removed'], [deleted])
+        self.assertIsNone(index.lookup('CC50'))
+
+
+class ProductIndexTests(TestCase):
+    def test_lookup_by_barcode_and_sku(self):
+        coke = make_product('Coke', 'CC50')
+        ProductBarcode.objects.create(product=coke, barcode='999')
+        index = ProductIndex()
+        self.assertEqual(index.lookup('999').id, coke.pk)
+        self.assertEqual(index.lookup('CC50').id, coke.pk)
+
+    def test_picks_up_a_late_commit_below_the_version_seen(self):
+        coke = make_product('Coke', 'CC50')
+        index = ProductIndex()
+        index.lookup('CC50')
+        # A write that took the current version but committed after the index read it.
+        Product.objects.filter(pk=coke.pk).update(name='Coke Zero', catalog_version=current_catalog_version())
+        bump_catalog_version()
+        index.invalidate()
+        self.assertEqual(index.lookup('CC50').name, 'Coke Zero')
+
+
+class ReserveStockTests(TestCase):
+    def setUp(self):
+        self.coke = make_product('Coke', 'CC50', stock=10)
+        self.fanta = make_product('Fanta', 'FA50', stock=3)
+
+    def stock(self):
+        return dict(Product.objects.values_list('sku', 'stock_quantity'))
+
+    def test_takes_every_line_and_updates_status(self):
+        reserve_stock([(self.coke.pk, 4), (self.fanta.pk, 3)])
+        self.assertEqual(self.stock(), {'CC50': 6, 'FA50': 0})
+        self.assertEqual(Product.objects.get(pk=self.fanta.pk).stock_status, 'out_of_stock')
+
+    def test_one_short_line_takes_nothing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock({self.coke.pk: 2, self.fanta.pk: 4})
+        self.assertEqual(self.stock(), {'CC50': 10, 'FA50': 3})
+        self.assertEqual(raised.exception.shortages, [
+            {'product_id': self.fanta.pk, 'name': 'Fanta', 'requested': 4, 'available': 3},
+        ])
+
+    def test_repeated_lines_are_summed_before_the_guard(self):
+        with self.assertRaises(InsufficientStock):
+            reserve_stock([(self.fanta.pk, 2), (self.fanta.pk, 2)])
+        self.assertEqual(self.stock()['FA50'], 3)
+
+    def test_unknown_product_is_a_shortage(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock({self.coke.pk: 1, 999999: 1})
+        self.assertEqual(raised.exception.shortages[0]['available'], 0)
+        self.assertEqual(self.stock()['CC50'], 10)
 
-# Create your tests here.
+    def test_release_returns_stock(self):
+        reserve_stock({self.coke.pk: 4})
+        release_stock({self.coke.pk: 4})
+        self.assertEqual(self.stock()['CC50'], 10)
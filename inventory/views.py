@@ -443,6 +443,8 @@ from .forms import ProductForm, ProductCategoryForm
 import datetime
 from django.http import HttpResponse
 
+from core.exports import EXPORTS, parquet_available, serve_export
+
 
 import csv
 import io
@@ -603,157 +605,51 @@ def product_import_template(request):
     return response
 
 
+# The CSV columns, filters and date ranges these accept are declared in
+# inventory/exports.py.
+
 @login_required
 def product_bulk_export(request):
-    """Export all products as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"products_{datetime.date.today().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "id",
-            "name",
-            "sku",
-            "category",
-            "cost_price",
-            # "selling_price",
-            "stock_quantity",
-            "minimum_stock",
-            "status",
-            "stock_status",
-            "created_at",
-            "updated_at",
-        ]
-    )
-
-    products = Product.objects.select_related("category").all().order_by("name")
-    for p in products:
-        writer.writerow(
-            [
-                p.id,
-                p.name,
-                p.sku or "",
-                p.category.name if p.category else "",
-                p.cost_price,
-                # p.selling_price,
-                p.stock_quantity,
-                p.minimum_stock,
-                p.status,
-                p.stock_status,
-                p.created_at,
-                p.updated_at,
-            ]
-        )
-
-    return response
+    """Export products as CSV."""
+    return serve_export(request, "products")
 
 
 @login_required
 def category_bulk_export(request):
-    """Export all product categories as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"categories_{datetime.date.today().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(["id", "name", "description", "color_code", "icon", "created_at", "updated_at"])
-
-    for c in ProductCategory.objects.all().order_by("name"):
-        writer.writerow(
-            [c.id, c.name, c.description, c.color_code, c.icon, c.created_at, c.updated_at]
-        )
-
-    return response
+    """Export product categories as CSV."""
+    return serve_export(request, "categories")
 
 
 @login_required
 def inventory_transactions_export(request):
-    """Export all inventory transactions as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"inventory_transactions_{datetime.date.today().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "id",
-            "product_name",
-            "product_sku",
-            "transaction_type",
-            "quantity",
-            "reference",
-            "notes",
-            "created_by",
-            "created_at",
-        ]
-    )
-
-    txns = InventoryTransaction.objects.select_related("product").all().order_by("-created_at")
-    for t in txns:
-        writer.writerow(
-            [
-                t.id,
-                t.product.name if t.product else "",
-                t.product.sku if t.product else "",
-                t.transaction_type,
-                t.quantity,
-                t.reference,
-                t.notes,
-                t.created_by,
-                t.created_at,
-            ]
-        )
-
-    return response
+    """Export inventory transactions as CSV."""
+    return serve_export(request, "stock_movements")
 
 
 @login_required
 def stock_adjustments_export(request):
-    """Export all stock adjustments as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"stock_adjustments_{datetime.date.today().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "id",
-            "product_name",
-            "product_sku",
-            "adjustment_type",
-            "quantity",
-            "reason",
-            "reference_number",
-            "performed_by",
-            "created_at",
-        ]
-    )
+    """Export stock adjustments as CSV."""
+    return serve_export(request, "stock_adjustments")
 
-    adjustments = StockAdjustment.objects.select_related("product").all().order_by("-created_at")
-    for adj in adjustments:
-        writer.writerow(
-            [
-                adj.id,
-                adj.product.name if adj.product else "",
-                adj.product.sku if adj.product else "",
-                adj.adjustment_type,
-                adj.quantity,
-                adj.reason,
-                adj.reference_number,
-                adj.performed_by,
-                adj.created_at,
-            ]
-        )
 
-    return response
+EXPORT_SECTIONS = [
+    ("inventory", "Inventory Exports", "Download your product and stock data."),
+    ("sales", "Sales & Payments Exports", "Download your sales transactions and payments."),
+]
 
 
 @login_required
 def export_center(request):
     """Central page where user can export inventory & sales data."""
+    sections = []
+    for key, title, subtitle in EXPORT_SECTIONS:
+        datasets = [d for d in EXPORTS.values() if d.section == key and d.listed]
+        if datasets:
+            sections.append({"key": key, "title": title, "subtitle": subtitle, "datasets": datasets})
+
     context = {
+        "sections": sections,
+        "parquet_available": parquet_available(),
         "user_role": getattr(request.user, "role", None),
         "user_name": request.user.get_full_name() or request.user.username,
     }
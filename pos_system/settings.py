@@ -95,4 +95,36 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-AUTH_USER_MODEL = 'accounts.CustomUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# Dashboard widgets and their invalidation tokens (core.dashboard) are cached
+# here. The local-memory cache is per process: with several workers a
+# change made in one reaches the others' dashboards only when their copies
+# expire (within a minute). Point this at a shared cache to make it
+# immediate, e.g. {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+# 'LOCATION': 'redis://127.0.0.1:6379'}.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# POS
+POS_ORDER_NUMBER_BLOCK_SIZE = 50  # order numbers reserved per worker/terminal at a time
+POS_IDEMPOTENCY_KEY_TTL_HOURS = 24  # how long a stored response can be replayed
+# Orders are bucketed into trading days (POSOrder.business_date) in this
+# timezone; sales before the cutoff hour count towards the previous day.
+POS_BUSINESS_TIMEZONE = 'Africa/Lagos'
+POS_BUSINESS_DAY_CUTOFF_HOUR = 0
+# Live dashboard feed (sales.events). Empty uses the in-process bus, which
+# only reaches dashboards served by the same worker process.
+POS_EVENT_BUS = ''
+# Stream the feed over Server-Sent Events (sales/api/live/). Only turn this
+# on when serving through ASGI (pos_system.asgi): under WSGI each open
+# dashboard would hold a worker for good. When off, dashboards poll.
+POS_LIVE_FEED = False
+# Background exports (core.export_jobs) are written under MEDIA_ROOT/exports
+# and deleted after this many hours. With the worker thread off, run
+# `manage.py run_export_jobs` (from cron, or with --loop) to process them.
+POS_EXPORT_WORKER_THREAD = True
+POS_EXPORT_RETENTION_HOURS = 24
@@ -0,0 +1,63 @@
+# sales/aggregation.py
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from .models import POSOrder
+
+SUMMARY_METHODS = ['pos', 'transfer', 'cash', 'mobile_money']
+
+
+def _empty_day():
+    return {
+        'total_revenue': Decimal('0.00'),
+        'total_transactions': 0,
+        'methods': {method: {'revenue': Decimal('0.00'), 'count': 0} for method in SUMMARY_METHODS},
+    }
+
+
+def daily_breakdown(dates):
+    """
+    Completed-order revenue and counts per payment method for each day in
+    ``dates``, from one grouped query.
+
+    Returns ``{date: {'total_revenue', 'total_transactions', 'methods':
+    {method: {'revenue', 'count'}}}}`` with every requested day and every
+    method in SUMMARY_METHODS present (zero when there were no sales).
+    Other methods that were used (e.g. credit) are included as well.
+    """
+    dates = set(dates)
+    result = {date: _empty_day() for date in dates}
+    if not dates:
+        return result
+
+    rows = (
+        POSOrder.objects.filter(status='completed', business_date__in=dates)
+        .values('business_date', 'payment_method')
+        .annotate(revenue=Sum('final_amount'), count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        day = result[row['business_date']]
+        revenue = row['revenue'] or Decimal('0.00')
+        day['total_revenue'] += revenue
+        day['total_transactions'] += row['count']
+        day['methods'][row['payment_method']] = {'revenue': revenue, 'count': row['count']}
+    return result
+
+
+def summary_fields(day, amount_suffix='revenue'):
+    """
+    Flatten one day of ``daily_breakdown`` into summary model fields.
+
+    DailySalesSummary names its amounts ``*_revenue``; SaleSummary uses
+    ``amount_suffix='sales'`` for ``total_sales``/``cash_sales`` etc.
+    """
+    fields = {
+        f'total_{amount_suffix}': day['total_revenue'],
+        'total_transactions': day['total_transactions'],
+    }
+    for method in SUMMARY_METHODS:
+        fields[f'{method}_{amount_suffix}'] = day['methods'][method]['revenue']
+        fields[f'{method}_transactions'] = day['methods'][method]['count']
+    return fields
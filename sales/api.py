@@ -0,0 +1,437 @@
+# sales/api.py
+import asyncio
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET, require_POST
+
+from inventory.catalog import catalog_changes, current_catalog_version
+from inventory.lookup import product_index
+from inventory.models import Product
+from inventory.stock import InsufficientStock
+from core.utils import check_limit_or_block
+from .business_day import business_day_cutoff, business_today
+from .cart import POSCart
+from .checkout import checkout, CheckoutError
+from .events import event_bus, live_feed_enabled, totals_event
+from .idempotency import idempotent
+from .models import DailySalesSummary
+from .numbering import order_numbers, terminal_code
+from .rollups import hourly_heatmap, HEATMAP_METRICS
+from .sync import apply_actions, SYNC_MAX_ACTIONS
+
+
+def _payload(request):
+    """Read a JSON object body, falling back to regular form data."""
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        # A list or scalar body has no fields.
+        return payload if isinstance(payload, dict) else {}
+    return request.POST
+
+
+def _line_json(line):
+    return {
+        'product_id': line.product_id,
+        'sku': line.sku,
+        'name': line.name,
+        'unit_price': str(line.unit_price),
+        'quantity': line.quantity,
+        'total_price': str(line.total_price),
+    }
+
+
+def _totals_json(cart):
+    return {
+        'item_count': cart.item_count,
+        'line_count': len(cart),
+        'subtotal': str(cart.subtotal),
+        'tax_amount': str(cart.tax_amount),
+        'final_total': str(cart.final_total),
+    }
+
+
+def _cart_response(cart, changed=(), removed=(), status=200, **extra):
+    data = {
+        'success': status == 200,
+        'lines': [_line_json(line) for line in changed if line],
+        'removed': list(removed),
+        'totals': _totals_json(cart),
+    }
+    data.update(extra)
+    return JsonResponse(data, status=status)
+
+
+def _product_id(payload):
+    try:
+        return int(payload.get('product_id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _quantity(payload, default=1):
+    try:
+        return int(payload.get('quantity', default))
+    except (TypeError, ValueError):
+        return None
+
+
+@login_required
+@require_GET
+def cart_detail(request):
+    """Full cart contents and totals."""
+    cart = POSCart(request.session)
+    return _cart_response(cart, changed=list(cart))
+
+
+@login_required
+@require_GET
+def cart_totals(request):
+    """Cart totals only."""
+    return _cart_response(POSCart(request.session))
+
+
+@login_required
+@require_POST
+@idempotent
+def cart_add(request):
+    """Add a product (by id or SKU) to the cart and return the changed line."""
+    payload = _payload(request)
+    cart = POSCart(request.session)
+    quantity = _quantity(payload)
+    if not quantity or quantity <= 0:
+        return _cart_response(cart, status=400, error='Quantity must be at least 1')
+
+    products = Product.objects.only('id', 'name', 'sku', 'price', 'stock_quantity')
+    product_id = _product_id(payload)
+    sku = (payload.get('sku') or '').strip()
+    if product_id:
+        product = products.filter(pk=product_id).first()
+    else:
+        product = products.filter(sku=sku).first() if sku else None
+
+    if not product:
+        return _cart_response(cart, status=404, error=f'Product not found: {sku or product_id}')
+
+    if cart.quantity_of(product.id) + quantity > product.stock_quantity:
+        return _cart_response(
+            cart, status=409,
+            error=f'Insufficient stock for {product.name}. Available: {product.stock_quantity}',
+        )
+
+    line = cart.add(product, quantity)
+    return _cart_response(cart, changed=[line])
+
+
+@login_required
+@require_POST
+@idempotent
+def cart_scan(request):
+    """
+    Resolve a scanned barcode, alternate barcode or SKU and add it to the cart.
+
+    Served from the in-process product index, so the only database work on
+    the hot path is saving the session. Stock here is a soft check; the
+    checkout reservation is authoritative. The index holds stock as of the
+    last catalog change, so a line it would refuse is rechecked against the
+    product row.
+    """
+    payload = _payload(request)
+    cart = POSCart(request.session)
+    code = (payload.get('code') or '').strip()
+    quantity = _quantity(payload)
+    if not quantity or quantity <= 0:
+        return _cart_response(cart, status=400, error='Quantity must be at least 1')
+
+    product = product_index.lookup(code)
+    if not product:
+        return _cart_response(cart, status=404, error=f'No product for code: {code}')
+
+    if cart.quantity_of(product.id) + quantity > product.stock_quantity:
+        stock = Product.objects.filter(pk=product.id).values_list('stock_quantity', flat=True).first() or 0
+        if cart.quantity_of(product.id) + quantity > stock:
+            return _cart_response(
+                cart, status=409,
+                error=f'Insufficient stock for {product.name}. Available: {stock}',
+            )
+
+    line = cart.add(product, quantity)
+    return _cart_response(cart, changed=[line])
+
+
+@login_required
+@require_POST
+@idempotent
+def cart_set_quantity(request):
+    """Set the quantity of a cart line; zero removes it."""
+    payload = _payload(request)
+    cart = POSCart(request.session)
+    quantity = _quantity(payload, default=None)
+    product_id = _product_id(payload)
+    line = cart.get(product_id) if product_id else None
+    if quantity is None or line is None:
+        return _cart_response(cart, status=400, error='A cart product_id and quantity are required')
+
+    if quantity > line.quantity:
+        stock = Product.objects.filter(pk=line.product_id).values_list('stock_quantity', flat=True).first() or 0
+        if quantity > stock:
+            return _cart_response(
+                cart, status=409,
+                error=f'Insufficient stock for {line.name}. Available: {stock}',
+            )
+
+    if quantity <= 0:
+        cart.remove(line.product_id)
+        return _cart_response(cart, removed=[line.product_id])
+
+    return _cart_response(cart, changed=[cart.set_quantity(line.product_id, quantity)])
+
+
+@login_required
+@require_POST
+@idempotent
+def cart_remove(request):
+    """Remove a line from the cart."""
+    payload = _payload(request)
+    cart = POSCart(request.session)
+    product_id = _product_id(payload)
+    line = cart.remove(product_id) if product_id else None
+    if line is None:
+        return _cart_response(cart, status=404, error='Item is not in the cart')
+    return _cart_response(cart, removed=[line.product_id])
+
+
+@login_required
+@require_GET
+def catalog(request):
+    """
+    Product catalog for the POS picker.
+
+    Without ``since`` the full active catalog is returned; with it, only
+    the products changed or removed after that version. The ETag is the
+    catalog version, so an unchanged catalog costs a single lookup.
+    """
+    try:
+        since = int(request.GET.get('since') or 0)
+    except ValueError:
+        since = 0
+
+    version = current_catalog_version()
+    etag = f'"catalog-{version}"'
+    if (since and since == version) or request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    data = catalog_changes(since)
+    response = JsonResponse(data)
+    response['ETag'] = f'"catalog-{data["version"]}"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _order_json(order):
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'total_amount': str(order.total_amount),
+        'tax_amount': str(order.tax_amount),
+        'final_amount': str(order.final_amount),
+        'payment_method': order.payment_method,
+        'receipt_url': reverse('sales:print_receipt', args=[order.id]),
+    }
+
+
+@login_required
+@require_POST
+@idempotent
+def checkout_order(request):
+    """
+    Complete a sale in one request.
+
+    The body may carry the whole cart as ``lines`` (``[{product_id,
+    quantity}, ...]``); without it the session cart is checked out.
+    """
+    payload = _payload(request)
+    cart = POSCart(request.session)
+
+    lines = payload.get('lines')
+    from_session = lines is None
+    try:
+        if from_session:
+            lines = [(line.product_id, line.quantity) for line in cart]
+        else:
+            lines = [(line['product_id'], line['quantity']) for line in lines]
+    except (KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Each line needs a product_id and quantity'}, status=400)
+
+    try:
+        check_limit_or_block("orders_per_day")
+        order = checkout(
+            lines,
+            order_number=order_numbers.next_number(terminal_code(request)),
+            cashier=request.user.username,
+            payment_method=payload.get('payment_method') or 'pos',
+            reference_number=payload.get('reference_number') or '',
+            customer_name=payload.get('customer_name') or '',
+            customer_phone=payload.get('customer_phone') or '',
+        )
+    except PermissionDenied as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=403)
+    except InsufficientStock as e:
+        return JsonResponse({'success': False, 'error': str(e), 'shortages': e.shortages}, status=409)
+    except (CheckoutError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if from_session:
+        cart.clear()
+    return JsonResponse({'success': True, 'order': _order_json(order)})
+
+
+@login_required
+@require_POST
+def sync(request):
+    """
+    Apply a batch of queued offline POS actions.
+
+    Body: ``{"actions": [{"key", "action", "data"}, ...]}``, applied in
+    order. The response has one result per action, in the same order.
+    """
+    payload = _payload(request)
+    actions = payload.get('actions')
+    if not isinstance(actions, list) or not all(isinstance(a, dict) for a in actions):
+        return JsonResponse({'success': False, 'error': 'actions must be a list of objects'}, status=400)
+    if len(actions) > SYNC_MAX_ACTIONS:
+        return JsonResponse(
+            {'success': False, 'error': f'At most {SYNC_MAX_ACTIONS} actions per request'}, status=413,
+        )
+
+    results = apply_actions(request, actions, terminal_code(request))
+    return JsonResponse({'success': all(r['success'] for r in results), 'results': results})
+
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def _date_param(request, name):
+    """A YYYY-MM-DD query parameter (None when absent); ValueError when malformed."""
+    value = (request.GET.get(name) or '').strip()
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'{name} must be a date')
+    return day
+
+
+@login_required
+@require_GET
+def sales_heatmap(request):
+    """
+    Day-of-week x hour sales heatmap from the hourly rollup.
+
+    ``from``/``to`` are business dates (default: the last 12 weeks),
+    ``metric`` is revenue, orders or items, and ``payment_method``
+    optionally narrows it. ``day_counts`` says how many of each weekday
+    the range covers, for averaging.
+    """
+    try:
+        end = _date_param(request, 'to') or business_today()
+        start = _date_param(request, 'from') or end - timedelta(days=83)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be valid YYYY-MM-DD'}, status=400)
+    metric = request.GET.get('metric') or 'revenue'
+    if metric not in HEATMAP_METRICS:
+        return JsonResponse({'success': False, 'error': f'metric must be one of {", ".join(HEATMAP_METRICS)}'}, status=400)
+    if start > end:
+        return JsonResponse({'success': False, 'error': 'from must not be after to'}, status=400)
+
+    day_counts = [0] * 7
+    for offset in range((end - start).days + 1):
+        day_counts[(start + timedelta(days=offset)).weekday()] += 1
+
+    return JsonResponse({
+        'success': True,
+        'from': start,
+        'to': end,
+        'metric': metric,
+        'weekdays': WEEKDAYS,
+        # Clock hour of each column; column 0 starts the business day.
+        'hours': [(hour + business_day_cutoff()) % 24 for hour in range(24)],
+        'day_counts': day_counts,
+        'matrix': hourly_heatmap(start, end, metric, request.GET.get('payment_method') or None),
+    })
+
+
+# Seconds between keep-alive comments on an idle live feed, so proxies
+# don't close the connection.
+LIVE_FEED_HEARTBEAT = 15
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+def _today_totals():
+    today = business_today()
+    return totals_event(DailySalesSummary.objects.filter(date=today).first() or DailySalesSummary(date=today))
+
+
+_current_totals = sync_to_async(_today_totals)
+
+
+async def _live_events():
+    bus = event_bus()
+    subscriber = bus.subscribe()
+    _, queue = subscriber
+    try:
+        yield 'retry: 5000\n\n'
+        yield _sse('totals', await _current_totals())
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), LIVE_FEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield _sse(event, data)
+    finally:
+        bus.unsubscribe(subscriber)
+
+
+@login_required
+@require_GET
+async def live_feed(request):
+    """
+    Server-Sent Events stream for the daily dashboard.
+
+    Sends the current ``totals`` on connect, then ``order`` (a completed
+    order), ``totals`` (after each completion or cancellation) and
+    ``low_stock`` (a product reaching its minimum at checkout) as they
+    are published on the event bus. An idle connection is just a
+    suspended coroutine, so it needs ASGI to be cheap: unless
+    ``POS_LIVE_FEED`` is on this answers 204, which tells EventSource
+    not to reconnect, and the dashboard polls live_totals instead.
+    """
+    if not live_feed_enabled():
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(_live_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@require_GET
+def live_totals(request):
+    """Today's ``totals`` event, for dashboards polling instead of streaming."""
+    return JsonResponse({'success': True, 'totals': _today_totals()})
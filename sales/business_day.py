@@ -0,0 +1,59 @@
+# sales/business_day.py
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def business_timezone():
+    return ZoneInfo(getattr(settings, 'POS_BUSINESS_TIMEZONE', settings.TIME_ZONE))
+
+
+def business_day_cutoff():
+    return getattr(settings, 'POS_BUSINESS_DAY_CUTOFF_HOUR', 0)
+
+
+def _business_time(value):
+    # Local time in POS_BUSINESS_TIMEZONE, shifted back by the cutoff.
+    return value.astimezone(business_timezone()) - timedelta(hours=business_day_cutoff())
+
+
+def business_date(value=None):
+    """
+    The trading day a moment belongs to.
+
+    Local time in POS_BUSINESS_TIMEZONE, shifted back by
+    POS_BUSINESS_DAY_CUTOFF_HOUR, so with a cutoff of 4 a sale at 02:00
+    still counts towards the previous day.
+    """
+    return _business_time(value or timezone.now()).date()
+
+
+def business_today():
+    return business_date()
+
+
+def business_day_bounds(day):
+    """
+    The moments ``[start, end)`` of trading day ``day``: from the cutoff
+    hour on that date to the cutoff hour on the next, in
+    POS_BUSINESS_TIMEZONE. For filtering timestamps that have no
+    business_date of their own.
+    """
+    tz, cutoff = business_timezone(), time(business_day_cutoff())
+    return datetime.combine(day, cutoff, tzinfo=tz), datetime.combine(day + timedelta(days=1), cutoff, tzinfo=tz)
+
+
+def business_clock(value):
+    """``value`` as HH:MM wall-clock time in POS_BUSINESS_TIMEZONE."""
+    return value.astimezone(business_timezone()).strftime('%H:%M')
+
+
+def business_hour(value):
+    """
+    Hour (0-23) of its trading day a moment falls in, shifted like
+    business_date: with a cutoff of 4, 04:00 is hour 0 and 02:00 is hour
+    22 of the previous day.
+    """
+    return _business_time(value).hour
@@ -0,0 +1,141 @@
+# sales/cart.py
+from dataclasses import dataclass, asdict
+from decimal import Decimal
+
+TAX_RATE = Decimal('0.00')
+TWO_PLACES = Decimal('0.01')
+
+
+@dataclass
+class CartLine:
+    """A single product line in the POS cart."""
+    product_id: int
+    sku: str
+    name: str
+    unit_price: Decimal
+    quantity: int
+
+    @property
+    def total_price(self) -> Decimal:
+        return (self.unit_price * self.quantity).quantize(TWO_PLACES)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['unit_price'] = str(self.unit_price)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CartLine':
+        return cls(
+            product_id=int(data['product_id']),
+            sku=data['sku'],
+            name=data['name'],
+            unit_price=Decimal(data['unit_price']),
+            quantity=int(data['quantity']),
+        )
+
+
+class POSCart:
+    """
+    Session-resident cart for the POS screen.
+
+    Nothing touches the database until checkout; the lines live in the
+    session as plain JSON-serialisable dicts keyed by product id.
+    """
+    SESSION_KEY = 'pos_cart'
+
+    def __init__(self, session):
+        self.session = session
+        raw = session.get(self.SESSION_KEY) or {}
+        self.lines = {
+            int(product_id): CartLine.from_dict(line)
+            for product_id, line in raw.items()
+        }
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def get(self, product_id):
+        return self.lines.get(int(product_id))
+
+    def quantity_of(self, product_id) -> int:
+        line = self.get(product_id)
+        return line.quantity if line else 0
+
+    def add(self, product, quantity: int) -> CartLine:
+        """Add quantity of a product, merging into an existing line."""
+        line = self.lines.get(product.id)
+        if line:
+            line.quantity += quantity
+        else:
+            line = CartLine(
+                product_id=product.id,
+                sku=product.sku,
+                name=product.name,
+                unit_price=Decimal(product.price),
+                quantity=quantity,
+            )
+            self.lines[product.id] = line
+        self.save()
+        return line
+
+    def set_quantity(self, product_id, quantity: int):
+        """Set a line's quantity; zero or less removes the line."""
+        product_id = int(product_id)
+        if quantity <= 0:
+            return self.remove(product_id)
+        line = self.lines.get(product_id)
+        if line:
+            line.quantity = quantity
+            self.save()
+        return line
+
+    def remove(self, product_id):
+        line = self.lines.pop(int(product_id), None)
+        if line:
+            self.save()
+        return line
+
+    def clear(self):
+        self.lines = {}
+        self.session.pop(self.SESSION_KEY, None)
+
+    def snapshot(self) -> dict:
+        """The lines as stored in the session, for restore()."""
+        return {str(product_id): line.to_dict() for product_id, line in self.lines.items()}
+
+    def restore(self, snapshot: dict):
+        """Put back the lines from an earlier snapshot()."""
+        self.lines = {int(product_id): CartLine.from_dict(line) for product_id, line in snapshot.items()}
+        if self.lines:
+            self.save()
+        else:
+            self.clear()
+
+    def save(self):
+        self.session[self.SESSION_KEY] = {
+            str(product_id): line.to_dict()
+            for product_id, line in self.lines.items()
+        }
+
+    @property
+    def item_count(self) -> int:
+        return sum(line.quantity for line in self)
+
+    @property
+    def subtotal(self) -> Decimal:
+        return sum((line.total_price for line in self), Decimal('0.00'))
+
+    @property
+    def tax_amount(self) -> Decimal:
+        return (self.subtotal * TAX_RATE).quantize(TWO_PLACES)
+
+    @property
+    def final_total(self) -> Decimal:
+        return self.subtotal + self.tax_amount
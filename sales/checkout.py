@@ -0,0 +1,202 @@
+# sales/checkout.py
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from inventory.models import Product
+from inventory.stock import reserve_stock, release_stock
+from .cart import TAX_RATE, TWO_PLACES
+from .events import publish_on_commit, totals_event
+from .models import POSOrder, POSOrderItem, PaymentTransaction
+from .rollups import record_order
+
+# Hard ceiling on SQL statements inside one checkout transaction. Every step
+# is a fixed number of statements, so this holds for any number of lines
+# (about 18 normally, 31 for the first order of a day when rollup rows are
+# created).
+CHECKOUT_STATEMENT_LIMIT = 40
+
+
+class CheckoutError(Exception):
+    """A checkout request that can't be completed as given."""
+
+
+class StatementBudgetExceeded(CheckoutError):
+    pass
+
+
+@contextmanager
+def statement_budget(limit):
+    """Abort (and so roll back) if more than ``limit`` statements are executed."""
+    executed = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal executed
+        executed += 1
+        if executed > limit:
+            raise StatementBudgetExceeded(f'Checkout exceeded {limit} SQL statements')
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        yield
+
+
+def _merge_lines(lines):
+    quantities = {}
+    for product_id, quantity in lines:
+        product_id, quantity = int(product_id), int(quantity)
+        if quantity <= 0:
+            raise CheckoutError('Quantities must be at least 1')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    if not quantities:
+        raise CheckoutError('Cannot complete an empty order')
+    return quantities
+
+
+def checkout(lines, order_number, cashier, payment_method, reference_number='',
+             customer_name='', customer_phone=''):
+    """
+    Turn a whole cart into a completed order in one transaction.
+
+    ``lines`` is an iterable of ``(product_id, quantity)``. Prices come from
+    the database, not the client. The order, all of its items, the stock
+    decrement, the payment record and the summary counters are written
+    together, within CHECKOUT_STATEMENT_LIMIT statements regardless of how
+    many lines there are.
+
+    Raises CheckoutError for bad input and InsufficientStock if any line
+    can't be met; nothing is written in either case.
+    """
+    if payment_method not in dict(POSOrder.PAYMENT_METHODS):
+        raise CheckoutError(f'Unknown payment method: {payment_method}')
+    quantities = _merge_lines(lines)
+
+    with statement_budget(CHECKOUT_STATEMENT_LIMIT), transaction.atomic():
+        products = {
+            row[0]: row for row in
+            Product.objects.filter(pk__in=list(quantities))
+            .values_list('id', 'price', 'name', 'sku', 'category_id', 'cost_price', 'stock_quantity', 'minimum_stock')
+        }
+        missing = set(quantities) - set(products)
+        if missing:
+            raise CheckoutError(f'Unknown products: {sorted(missing)}')
+
+        items = [
+            POSOrderItem(
+                product_id=product_id,
+                quantity=quantity,
+                unit_price=products[product_id][1],
+                total_price=(products[product_id][1] * quantity).quantize(TWO_PLACES),
+                unit_cost=products[product_id][5],
+                category_id=products[product_id][4],
+            )
+            for product_id, quantity in quantities.items()
+        ]
+        subtotal = sum((item.total_price for item in items), Decimal('0.00'))
+        tax_amount = (subtotal * TAX_RATE).quantize(TWO_PLACES)
+
+        reserve_stock(quantities)
+
+        order = POSOrder.objects.create(
+            order_number=order_number,
+            total_amount=subtotal,
+            tax_amount=tax_amount,
+            final_amount=subtotal + tax_amount,
+            payment_method=payment_method,
+            customer_name=customer_name,
+            customer_phone=customer_phone,
+            cashier=cashier,
+            status='completed',
+        )
+        for item in items:
+            item.order = order
+        POSOrderItem.objects.bulk_create(items)
+
+        PaymentTransaction.objects.create(
+            order=order,
+            payment_method=payment_method,
+            amount=order.final_amount,
+            reference_number=reference_number,
+            status='completed',
+        )
+
+        summary = record_order(order, [
+            {
+                'product_id': item.product_id,
+                'name': products[item.product_id][2],
+                'sku': products[item.product_id][3],
+                'category_id': item.category_id,
+                'quantity': item.quantity,
+                'total_price': item.total_price,
+                'unit_cost': item.unit_cost,
+            }
+            for item in items
+        ])
+
+        publish_on_commit('order', {
+            'id': order.id,
+            'order_number': order.order_number,
+            'final_amount': str(order.final_amount),
+            'payment_method': order.payment_method,
+            'cashier': order.cashier,
+            'customer_name': order.customer_name,
+            'created_at': order.created_at.isoformat(),
+        })
+        publish_on_commit('totals', totals_event(summary))
+        for product_id, quantity in quantities.items():
+            _, _, name, sku, _, _, stock, minimum = products[product_id]
+            # Stock as read before the reservation, so this is the order
+            # that took the product to (or below) its minimum.
+            if stock > minimum >= stock - quantity:
+                publish_on_commit('low_stock', {
+                    'id': product_id,
+                    'name': name,
+                    'sku': sku,
+                    'stock_quantity': stock - quantity,
+                    'minimum_stock': minimum,
+                    'status': 'out_of_stock' if stock - quantity <= 0 else 'low_stock',
+                })
+
+    return order
+
+
+def cancel_order(order_id):
+    """
+    Cancel a completed order: put its stock back, mark its payments
+    cancelled and take it out of the daily summaries, all in one
+    transaction. Raises CheckoutError if the order isn't completed.
+    """
+    with transaction.atomic():
+        order = POSOrder.objects.select_for_update().filter(pk=order_id).first()
+        if order is None or order.status != 'completed':
+            raise CheckoutError('Only completed orders can be cancelled')
+
+        items = list(
+            POSOrderItem.objects.filter(order=order).values(
+                'product_id', 'quantity', 'total_price', 'unit_cost', 'category_id',
+                name=F('product__name'), sku=F('product__sku'),
+                cost_price=F('product__cost_price'), product_category_id=F('product__category_id'),
+            )
+        )
+        for item in items:
+            # Take back the cost and category counted at checkout; items
+            # sold before they were recorded fall back to the product's
+            # current ones.
+            cost_price = item.pop('cost_price')
+            product_category_id = item.pop('product_category_id')
+            if item['unit_cost'] is None:
+                item['unit_cost'] = cost_price
+            if item['category_id'] is None:
+                item['category_id'] = product_category_id
+        release_stock([(item['product_id'], item['quantity']) for item in items])
+
+        order.status = 'cancelled'
+        order.save(update_fields=['status', 'updated_at'])
+        PaymentTransaction.objects.filter(order=order).update(status='cancelled', updated_at=order.updated_at)
+
+        summary = record_order(order, items, sign=-1)
+        publish_on_commit('totals', totals_event(summary))
+
+    return order
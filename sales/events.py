@@ -0,0 +1,114 @@
+# sales/events.py
+import asyncio
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .aggregation import SUMMARY_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Events a slow client may fall behind by before the oldest are dropped.
+SUBSCRIBER_BACKLOG = 100
+
+
+class LocalEventBus:
+    """
+    In-process publish/subscribe for the live dashboard feed.
+
+    Publishing is synchronous and safe from any thread (checkout runs in
+    worker threads under ASGI); each subscriber is an asyncio queue on the
+    event loop that serves its connection. Only subscribers in the same
+    process see an event.
+    """
+
+    def __init__(self, backlog=SUBSCRIBER_BACKLOG):
+        self.backlog = backlog
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, (event, data))
+            except RuntimeError:
+                # The connection's loop has already closed.
+                self._discard((loop, queue))
+
+    @staticmethod
+    def _deliver(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def _discard(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscribe(self):
+        """Register a queue on the running loop; pass it to unsubscribe() when done."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.backlog))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._discard(subscriber)
+
+
+_bus = None
+
+
+def event_bus():
+    """
+    The bus named by ``POS_EVENT_BUS`` (a dotted path to a class with the
+    LocalEventBus interface, e.g. one backed by a shared broker so every
+    worker sees every event), or the in-process bus when unset or it
+    can't be loaded.
+    """
+    global _bus
+    if _bus is None:
+        path = getattr(settings, 'POS_EVENT_BUS', '')
+        bus = None
+        if path:
+            try:
+                bus = import_string(path)()
+            except Exception:
+                logger.exception('Could not load POS_EVENT_BUS %r; using the local event bus', path)
+        _bus = bus or LocalEventBus()
+    return _bus
+
+
+def live_feed_enabled():
+    return getattr(settings, 'POS_LIVE_FEED', False)
+
+
+def publish(event, data):
+    try:
+        event_bus().publish(event, data)
+    except Exception:
+        # The feed is best effort; a sale must never fail because of it.
+        logger.exception('Could not publish %s event', event)
+
+
+def publish_on_commit(event, data):
+    transaction.on_commit(lambda: publish(event, data))
+
+
+def totals_event(summary):
+    """The ``totals`` payload for a DailySalesSummary row."""
+    data = {
+        'date': summary.date.isoformat(),
+        'total_revenue': str(summary.total_revenue),
+        'total_transactions': summary.total_transactions,
+        'top_selling_items': summary.top_selling_items,
+    }
+    for method in SUMMARY_METHODS:
+        data[f'{method}_revenue'] = str(getattr(summary, f'{method}_revenue'))
+        data[f'{method}_transactions'] = getattr(summary, f'{method}_transactions')
+    return data
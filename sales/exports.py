@@ -0,0 +1,103 @@
+# sales/exports.py
+from core.exports import Column, Dataset, local_date, local_time, register
+from .models import POSOrder, POSOrderItem, PaymentTransaction
+
+
+def _order_columns(date_name, time_name):
+    return (
+        Column('order_number'),
+        Column(date_name, 'created_at', local_date),
+        Column(time_name, 'created_at', local_time),
+        Column('customer_name'),
+        Column('customer_phone'),
+        Column('payment_method'),
+        Column('total_amount'),
+        Column('discount_amount'),
+        Column('final_amount'),
+        Column('status'),
+        Column('tax_amount', default=False),
+        Column('business_date', default=False),
+        Column('cashier', default=False),
+    )
+
+
+ORDER_FILTERS = {'status': 'status', 'payment_method': 'payment_method', 'cashier': 'cashier'}
+ORDER_SEARCH = ('order_number', 'customer_name', 'customer_phone')
+
+orders = register(Dataset(
+    key='orders',
+    title='Orders',
+    description='Every order with totals',
+    icon='fas fa-file-invoice',
+    section='sales',
+    filename='orders_all',
+    queryset=POSOrder.objects.all,
+    columns=_order_columns('created_date', 'created_time'),
+    date_field='business_date',
+    filters=ORDER_FILTERS,
+    search=ORDER_SEARCH,
+    changed_field='updated_at',
+    incremental=True,
+))
+
+# The transaction history download: completed orders, as listed there.
+transactions = register(Dataset(
+    key='transactions',
+    title='Transactions',
+    queryset=lambda: POSOrder.objects.filter(status='completed'),
+    columns=_order_columns('date', 'time'),
+    order_by='-created_at',
+    date_field='business_date',
+    filters={'payment_method': 'payment_method', 'cashier': 'cashier'},
+    search=ORDER_SEARCH,
+    listed=False,
+    changed_field='updated_at',
+))
+
+order_items = register(Dataset(
+    key='order_items',
+    title='Order Items',
+    description='Line items for each order',
+    icon='fas fa-list-ul',
+    section='sales',
+    queryset=POSOrderItem.objects.all,
+    columns=(
+        Column('order_number', 'order__order_number'),
+        Column('order_date', 'order__created_at', local_date),
+        Column('product_name', 'product__name'),
+        Column('product_sku', 'product__sku'),
+        Column('quantity'),
+        Column('unit_price'),
+        Column('line_total', 'total_price'),
+        Column('order_status', 'order__status', default=False),
+        Column('payment_method', 'order__payment_method', default=False),
+        Column('category', 'product__category__name', default=False),
+    ),
+    date_field='order__business_date',
+    filters={'status': 'order__status', 'payment_method': 'order__payment_method'},
+    search=('order__order_number', 'product__name', 'product__sku'),
+    changed_field='order__updated_at',
+))
+
+payments = register(Dataset(
+    key='payments',
+    title='Payments',
+    description='All payment transactions',
+    icon='fas fa-wallet',
+    section='sales',
+    queryset=PaymentTransaction.objects.all,
+    columns=(
+        Column('order_number', 'order__order_number'),
+        Column('payment_method'),
+        Column('amount'),
+        Column('reference_number'),
+        Column('transaction_id'),
+        Column('status'),
+        Column('created_at'),
+    ),
+    date_field='order__business_date',
+    filters={'status': 'status', 'payment_method': 'payment_method'},
+    search=('order__order_number', 'reference_number', 'transaction_id'),
+    changed_field='updated_at',
+    incremental=True,
+))
@@ -0,0 +1,137 @@
+# sales/idempotency.py
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 64
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'POS_IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def purge_expired_keys():
+    """Delete stored responses older than the TTL. Returns the number removed."""
+    cutoff = timezone.now() - key_ttl()
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def _request_key(request):
+    return (request.headers.get(HEADER) or request.POST.get(FIELD) or '').strip()
+
+
+def _request_hash(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def claim_key(user, key, path, request_hash=''):
+    """
+    Insert the key before the view runs; the unique constraint makes this
+    the lock. Returns ``(record, True)`` for a fresh claim, or the existing
+    record and False. An expired record is dropped and claimed again.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, path=path, request_hash=request_hash,
+                ), True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            continue
+        if record.created_at >= timezone.now() - key_ttl():
+            return record, False
+        IdempotencyKey.objects.filter(pk=record.pk).delete()
+    return None, False
+
+
+def _replay(record):
+    response = HttpResponse(
+        bytes(record.body), status=record.status_code, content_type=record.content_type or None,
+    )
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _store(record, response):
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        location=response.get('Location', ''),
+        body=response.content,
+    )
+
+
+def idempotent(view_func):
+    """
+    Run a POST at most once per ``Idempotency-Key`` header (or
+    ``idempotency_key`` form field) per user.
+
+    A repeat of a finished request gets the stored response back; a repeat
+    that arrives while the first is still running gets 409, and a key
+    reused for a different path or body gets 422. Requests without a key
+    behave as before. Server errors aren't stored, so those
+    can be retried with the same key.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+        # Read the body before the form data, which would consume it.
+        request_hash = _request_hash(request)
+        key = _request_key(request)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse(
+                {'success': False, 'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=400,
+            )
+
+        record, created = claim_key(request.user, key, request.path, request_hash)
+        if not created:
+            if record is not None and (
+                record.path != request.path
+                or (record.request_hash and record.request_hash != request_hash)
+            ):
+                return JsonResponse(
+                    {'success': False, 'error': f'{HEADER} was already used for another request'},
+                    status=422,
+                )
+            if record is None or record.status_code is None:
+                response = JsonResponse(
+                    {'success': False, 'error': 'This request is already being processed'},
+                    status=409,
+                )
+                response['Retry-After'] = '1'
+                return response
+            return _replay(record)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+
+        if response.streaming or response.status_code >= 500:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+        else:
+            _store(record, response)
+        return response
+
+    return wrapper
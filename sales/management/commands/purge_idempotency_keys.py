@@ -0,0 +1,12 @@
+# sales/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+
+from sales.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete stored idempotent responses older than POS_IDEMPOTENCY_KEY_TTL_HOURS.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired idempotency keys.'))
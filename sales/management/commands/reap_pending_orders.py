@@ -0,0 +1,46 @@
+# sales/management/commands/reap_pending_orders.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.reaper import reap_pending_orders
+
+
+class Command(BaseCommand):
+    help = 'Return stock held by abandoned pending POS orders and delete or archive them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=float, default=24,
+                            help='Only reap pending orders untouched for this long (default: 24).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Orders handled per transaction (default: 500).')
+        parser.add_argument('--archive', action='store_true',
+                            help='Mark orders cancelled instead of deleting them.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be reclaimed without changing anything.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+        if options['older_than_hours'] < 0:
+            raise CommandError('--older-than-hours cannot be negative')
+
+        result = reap_pending_orders(
+            older_than=timedelta(hours=options['older_than_hours']),
+            batch_size=options['batch_size'],
+            archive=options['archive'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Would reclaim {result.orders} pending orders '
+                f'({result.items} items, {result.units} units).'
+            )
+            return
+
+        verb = 'Archived' if options['archive'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.orders} pending orders in {result.batches} batches; '
+            f'{result.items} items and {result.units} units returned to stock.'
+        ))
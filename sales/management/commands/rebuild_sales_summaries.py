@@ -0,0 +1,155 @@
+# sales/management/commands/rebuild_sales_summaries.py
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils.dateparse import parse_date
+
+from core.dashboard import invalidate_dashboard
+from sales.business_day import business_today
+from sales.models import DailySalesSummary, ProductDailySales, SaleSummary, SalesHourlyRollup
+
+
+def rebuild_days(start, end):
+    """
+    Rebuild every summary and rollup table for the business days from
+    start to end (inclusive) in one transaction, with grouped queries and
+    bulk writes. Returns the number of orders counted.
+    """
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    with transaction.atomic():
+        # Lock the summary rows first (in the same order checkout does) so
+        # an order completed mid-rebuild is counted exactly once.
+        DailySalesSummary.objects.bulk_create([DailySalesSummary(date=d) for d in dates], ignore_conflicts=True)
+        SaleSummary.objects.bulk_create([SaleSummary(date=d) for d in dates], ignore_conflicts=True)
+        list(DailySalesSummary.objects.select_for_update().filter(date__range=(start, end)).values_list('id'))
+        list(SaleSummary.objects.select_for_update().filter(date__range=(start, end)).values_list('id'))
+
+        ProductDailySales.rebuild(start, end)
+        summaries = DailySalesSummary.generate_range(start, end)
+        SaleSummary.generate_range(start, end)
+        SalesHourlyRollup.rebuild(start, end)
+    return sum(summary.total_transactions for summary in summaries)
+
+
+def _init_worker():
+    # Set up Django in spawned workers; forked ones already are, and
+    # open their own connections since the parent closed its own first.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the sales summary and rollup tables from the orders. '
+        'The rows are kept current at checkout; run this periodically to reconcile, '
+        'or with --from/--to (and --workers) to backfill history.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Rebuild a single day (YYYY-MM-DD).')
+        parser.add_argument('--days', type=int, default=2,
+                            help='Rebuild this many days back from today (default: 2, i.e. today and yesterday).')
+        parser.add_argument('--from', dest='start', help='First day of a range to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='end', help='Last day of the range (default: today).')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes to split the days across (default: 1, in this process).')
+        parser.add_argument('--chunk-days', type=int, default=31,
+                            help='Days rebuilt per transaction (default: 31).')
+        parser.add_argument('--checkpoint',
+                            help='File recording finished chunks of a --from/--to run, so an '
+                                 'interrupted run resumes where it stopped (default: in the temp directory).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an existing checkpoint and rebuild the whole range.')
+
+    def _parse(self, value, option):
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Invalid {option}: {value}')
+        return date
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 0:
+            raise CommandError('--workers must be positive')
+        if options['chunk_days'] <= 0:
+            raise CommandError('--chunk-days must be positive')
+
+        checkpoint = None
+        if options['start']:
+            start = self._parse(options['start'], '--from')
+            end = self._parse(options['end'], '--to') if options['end'] else business_today()
+            if start > end:
+                raise CommandError('--from must not be after --to')
+            checkpoint = options['checkpoint'] or os.path.join(
+                tempfile.gettempdir(), f'rebuild_sales_summaries-{start}-{end}.json'
+            )
+        elif options['end']:
+            raise CommandError('--to needs --from')
+        elif options['date']:
+            start = end = self._parse(options['date'], '--date')
+        else:
+            if options['days'] <= 0:
+                raise CommandError('--days must be positive')
+            end = business_today()
+            start = end - timedelta(days=options['days'] - 1)
+
+        chunks = []
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        done = set()
+        if checkpoint and not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                done = set(json.load(f)['done'])
+            if done:
+                self.stdout.write(f'Resuming from {checkpoint}: {len(done)} of {len(chunks)} chunk(s) already rebuilt.')
+        pending = [chunk for chunk in chunks if chunk[0].isoformat() not in done]
+
+        total_days = sum((e - s).days + 1 for s, e in pending)
+        rebuilt_days = 0
+        started = time.monotonic()
+
+        def finished(chunk, orders):
+            nonlocal rebuilt_days
+            rebuilt_days += (chunk[1] - chunk[0]).days + 1
+            rate = rebuilt_days / max(time.monotonic() - started, 1e-6)
+            label = f'{chunk[0]}' if chunk[0] == chunk[1] else f'{chunk[0]}..{chunk[1]}'
+            self.stdout.write(f'{label}: {orders} orders ({rebuilt_days}/{total_days} days, {rate:.1f} days/s)')
+            if checkpoint:
+                done.add(chunk[0].isoformat())
+                # Written beside and renamed, so a crash never leaves half a file.
+                with open(f'{checkpoint}.tmp', 'w') as f:
+                    json.dump({'from': start.isoformat(), 'to': end.isoformat(), 'done': sorted(done)}, f)
+                os.replace(f'{checkpoint}.tmp', checkpoint)
+
+        if options['workers'] == 1 or len(pending) == 1:
+            for chunk in pending:
+                finished(chunk, rebuild_days(*chunk))
+        else:
+            # Workers must not share this process's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = {pool.submit(rebuild_days, *chunk): chunk for chunk in pending}
+                try:
+                    for future in as_completed(futures):
+                        finished(futures[future], future.result())
+                except BaseException:
+                    # Keep the checkpoint for a resumed run; don't start more chunks.
+                    pool.shutdown(cancel_futures=True)
+                    raise
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        invalidate_dashboard('sales')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt_days} day(s) in {elapsed:.1f}s ({rebuilt_days / max(elapsed, 1e-6):.1f} days/s).'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_alter_paymenttransaction_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terminal', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Order Number Sequence',
+                'verbose_name_plural': 'Order Number Sequences',
+                'unique_together': {('terminal', 'date')},
+            },
+        ),
+    ]
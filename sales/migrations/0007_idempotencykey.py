@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_ordernumbersequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('path', models.CharField(max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('location', models.CharField(blank=True, max_length=500)),
+                ('body', models.BinaryField(blank=True, default=b'')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+                'unique_together': {('user', 'key')},
+            },
+        ),
+    ]
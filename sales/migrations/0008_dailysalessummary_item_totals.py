@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysalessummary',
+            name='item_totals',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_business_date(apps, schema_editor):
+    POSOrder = apps.get_model('sales', 'POSOrder')
+    tz = ZoneInfo(getattr(settings, 'POS_BUSINESS_TIMEZONE', settings.TIME_ZONE))
+    cutoff = timedelta(hours=getattr(settings, 'POS_BUSINESS_DAY_CUTOFF_HOUR', 0))
+
+    last_id = 0
+    while True:
+        batch = list(POSOrder.objects.filter(pk__gt=last_id).order_by('pk').only('id', 'created_at')[:2000])
+        if not batch:
+            break
+        for order in batch:
+            order.business_date = (order.created_at.astimezone(tz) - cutoff).date()
+        POSOrder.objects.bulk_update(batch, ['business_date'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_dailysalessummary_item_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posorder',
+            name='business_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_business_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='posorder',
+            name='business_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='posorder',
+            index=models.Index(fields=['status', 'business_date', 'payment_method'], name='posorder_status_day_method'),
+        ),
+        migrations.AddIndex(
+            model_name='posorder',
+            index=models.Index(fields=['business_date', 'cashier'], name='posorder_day_cashier'),
+        ),
+    ]
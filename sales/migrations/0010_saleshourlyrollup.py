@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_posorder_business_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('payment_method', models.CharField(max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('orders', models.IntegerField(default=0)),
+                ('items', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Hourly Sales Rollup',
+                'verbose_name_plural': 'Hourly Sales Rollups',
+                'ordering': ['-business_date', 'hour'],
+                'unique_together': {('business_date', 'hour', 'payment_method')},
+            },
+        ),
+    ]
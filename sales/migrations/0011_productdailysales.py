@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_productbarcode'),
+        ('sales', '0010_saleshourlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.productcategory')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Product Daily Sales',
+                'verbose_name_plural': 'Product Daily Sales',
+                'ordering': ['-business_date'],
+                'indexes': [models.Index(fields=['business_date', 'category'], name='productdaily_day_category')],
+                'unique_together': {('business_date', 'product')},
+            },
+        ),
+    ]
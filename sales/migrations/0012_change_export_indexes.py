@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_productdailysales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['updated_at', 'id'], name='payment_changes'),
+        ),
+        migrations.AddIndex(
+            model_name='posorder',
+            index=models.Index(fields=['updated_at', 'id'], name='posorder_changes'),
+        ),
+    ]
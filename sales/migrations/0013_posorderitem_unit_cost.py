@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_change_export_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posorderitem',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Product cost price when sold', max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_productbarcode'),
+        ('sales', '0013_posorderitem_unit_cost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posorderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='Product category when sold', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.productcategory'),
+        ),
+    ]
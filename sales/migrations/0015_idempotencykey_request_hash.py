@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0014_posorderitem_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='request_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -1,6 +1,6 @@
 # sales/models.py
-from django.db import models
-from inventory.models import Product
+from django.db import connections, models, router
+from inventory.models import Product, ProductCategory
 from core.models import SystemSettings
 
 class POSOrder(models.Model):
@@ -34,14 +34,71 @@ class POSOrder(models.Model):
     cashier = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Local trading day of created_at (see sales.business_day); reports
+    # filter on this rather than created_at__date.
+    business_date = models.DateField(editable=False)
     
     class Meta:
         verbose_name = 'POS Order'
         verbose_name_plural = 'POS Orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'business_date', 'payment_method'], name='posorder_status_day_method'),
+            models.Index(fields=['business_date', 'cashier'], name='posorder_day_cashier'),
+            # Change export cursor (core.exports)
+            models.Index(fields=['updated_at', 'id'], name='posorder_changes'),
+        ]
     
     def __str__(self):
         return f"Order #{self.order_number}"
+    
+    def save(self, *args, **kwargs):
+        if self.business_date is None:
+            from .business_day import business_date
+            self.business_date = business_date(self.created_at)
+        super().save(*args, **kwargs)
+
+class OrderNumberSequence(models.Model):
+    """
+    Per-terminal, per-day order counter. Workers reserve numbers from it in
+    blocks (see sales.numbering) rather than one row update per order.
+    """
+    terminal = models.CharField(max_length=20)
+    date = models.DateField()
+    next_value = models.PositiveBigIntegerField(default=1)
+    
+    class Meta:
+        unique_together = ['terminal', 'date']
+        verbose_name = 'Order Number Sequence'
+        verbose_name_plural = 'Order Number Sequences'
+    
+    def __str__(self):
+        return f"{self.terminal} {self.date}: next {self.next_value}"
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a POS request sent with an Idempotency-Key, so that a
+    retried or replayed request gets the same response without running
+    again (see sales.idempotency). Rows expire after
+    POS_IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+    user = models.ForeignKey('accounts.CustomUser', on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)
+    path = models.CharField(max_length=200)
+    request_hash = models.CharField(max_length=64, blank=True)  # sha256 of the request body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # null while in progress
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=500, blank=True)
+    body = models.BinaryField(blank=True, default=b'')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        unique_together = ['user', 'key']
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+    
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
 
 class POSOrderItem(models.Model):
     order = models.ForeignKey(POSOrder, on_delete=models.CASCADE, related_name='items')
@@ -49,6 +106,14 @@ class POSOrderItem(models.Model):
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True,
+        help_text='Product cost price when sold',
+    )
+    category = models.ForeignKey(
+        ProductCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text='Product category when sold',
+    )
     
     class Meta:
         verbose_name = 'POS Order Item'
@@ -112,10 +177,32 @@ class PaymentTransaction(models.Model):
         verbose_name = 'Payment Transaction'
         verbose_name_plural = 'Payment Transactions'
         ordering = ['-created_at']
+        indexes = [
+            # Change export cursor (core.exports)
+            models.Index(fields=['updated_at', 'id'], name='payment_changes'),
+        ]
     
     def __str__(self):
         return f"{self.payment_method} - ₦{self.amount} - {self.status}"
 
+def upsert(model, objs, unique_fields, update_fields):
+    """
+    Insert ``objs``, updating ``update_fields`` of rows that already exist.
+
+    Backends that name the conflicting key (PostgreSQL, SQLite) need
+    ``unique_fields``; MySQL refuses them and its ON DUPLICATE KEY UPDATE
+    goes by whichever unique key conflicts, so ``unique_fields`` must
+    match a unique constraint of ``model``.
+    """
+    features = connections[router.db_for_write(model)].features
+    model.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=unique_fields if features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields,
+    )
+
+
 class SaleSummary(models.Model):
     """
     Daily sales summary for analytics
@@ -144,32 +231,19 @@ class SaleSummary(models.Model):
     @classmethod
     def generate_summary(cls, date):
         """Generate daily sales summary"""
-        from django.db.models import Sum, Count, Q
-        
-        orders = POSOrder.objects.filter(
-            created_at__date=date,
-            status='completed'
-        )
-        
-        summary_data = {
-            'date': date,
-            'total_sales': orders.aggregate(total=Sum('final_amount'))['total'] or 0,
-            'total_transactions': orders.count(),
-        }
-        
-        # Calculate method-specific totals
-        for method in ['cash', 'transfer', 'pos', 'mobile_money']:
-            method_orders = orders.filter(payment_method=method)
-            summary_data[f'{method}_sales'] = method_orders.aggregate(
-                total=Sum('final_amount')
-            )['total'] or 0
-            summary_data[f'{method}_transactions'] = method_orders.count()
+        return cls.generate_range(date, date)[0]
+    
+    @classmethod
+    def generate_range(cls, start, end):
+        """Regenerate the summaries for every day from start to end in bulk"""
+        from datetime import timedelta
+        from .aggregation import daily_breakdown, summary_fields
         
-        summary, created = cls.objects.update_or_create(
-            date=date,
-            defaults=summary_data
-        )
-        return summary
+        dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        breakdown = daily_breakdown(dates)
+        summaries = [cls(date=date, **summary_fields(breakdown[date], amount_suffix='sales')) for date in dates]
+        upsert(cls, summaries, ['date'], list(summary_fields(breakdown[start], amount_suffix='sales')))
+        return summaries
 
 
 # sales/models.py (add to existing models)
@@ -200,6 +274,8 @@ class DailySalesSummary(models.Model):
     
     # Top selling items (stored as JSON)
     top_selling_items = models.JSONField(default=list, blank=True)
+    # Running per-product tallies the top items are ranked from
+    item_totals = models.JSONField(default=dict, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -215,54 +291,162 @@ class DailySalesSummary(models.Model):
     @classmethod
     def generate_summary(cls, date):
         """Generate daily sales summary for a specific date"""
-        from django.db.models import Sum, Count, Q
-        from .models import POSOrder, POSOrderItem
+        return cls.generate_range(date, date)[0]
+    
+    @classmethod
+    def generate_range(cls, start, end):
+        """
+        Regenerate the summaries for every day from start to end in bulk:
+        one grouped query for the totals, one read of the ProductDailySales
+        rollup for the item tallies, and one upsert.
+        """
+        from datetime import timedelta
+        from .aggregation import daily_breakdown, summary_fields
+        from .rollups import money, top_items
+        
+        dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        breakdown = daily_breakdown(dates)
+        
+        # Per-product tallies (from the ProductDailySales rollup), and the
+        # top sellers ranked from them
+        item_totals = {date: {} for date in dates}
+        product_sales = ProductDailySales.objects.filter(
+            business_date__range=(start, end),
+            quantity__gt=0
+        ).values('business_date', 'product_id', 'product__name', 'product__sku', 'quantity', 'revenue')
+        for item in product_sales:
+            item_totals[item['business_date']][str(item['product_id'])] = {
+                'name': item['product__name'],
+                'sku': item['product__sku'],
+                'quantity': item['quantity'],
+                'revenue': money(item['revenue']),
+            }
         
-        # Get orders for the specific date
-        orders = POSOrder.objects.filter(
-            created_at__date=date,
-            status='completed'
+        summaries = [
+            cls(
+                date=date,
+                item_totals=item_totals[date],
+                top_selling_items=top_items(item_totals[date]),
+                **summary_fields(breakdown[date])
+            )
+            for date in dates
+        ]
+        upsert(
+            cls, summaries, ['date'],
+            [*summary_fields(breakdown[start]), 'item_totals', 'top_selling_items', 'updated_at'],
         )
+        return summaries
+
+class SalesHourlyRollup(models.Model):
+    """
+    Completed sales per business day, hour of that day (business_hour)
+    and payment method.
+    Kept current at checkout/cancellation (sales.rollups) so intraday
+    charts and heatmaps never scan orders.
+    """
+    business_date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    payment_method = models.CharField(max_length=20)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    items = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['business_date', 'hour', 'payment_method']
+        verbose_name = 'Hourly Sales Rollup'
+        verbose_name_plural = 'Hourly Sales Rollups'
+        ordering = ['-business_date', 'hour']
+    
+    def __str__(self):
+        return f"{self.business_date} {self.hour:02d}:00 {self.payment_method}"
+    
+    @classmethod
+    def rebuild(cls, date, end=None):
+        """Recompute the rows for a business day (or days up to end) from the completed orders"""
+        from django.db.models import Sum
+        from .business_day import business_hour
         
-        summary_data = {
-            'date': date,
-            'total_revenue': orders.aggregate(total=Sum('final_amount'))['total'] or 0,
-            'total_transactions': orders.count(),
-        }
+        end = end or date
+        totals = {}
+        orders = POSOrder.objects.filter(business_date__range=(date, end), status='completed').values(
+            'id', 'business_date', 'created_at', 'payment_method', 'final_amount'
+        ).annotate(units=Sum('items__quantity'))
+        for order in orders:
+            key = (order['business_date'], business_hour(order['created_at']), order['payment_method'])
+            row = totals.setdefault(key, {'revenue': 0, 'orders': 0, 'items': 0})
+            row['revenue'] += order['final_amount']
+            row['orders'] += 1
+            row['items'] += order['units'] or 0
         
-        # Calculate method-specific totals
-        for method in ['pos', 'transfer', 'cash', 'mobile_money']:
-            method_orders = orders.filter(payment_method=method)
-            summary_data[f'{method}_revenue'] = method_orders.aggregate(
-                total=Sum('final_amount')
-            )['total'] or 0
-            summary_data[f'{method}_transactions'] = method_orders.count()
+        cls.objects.filter(business_date__range=(date, end)).delete()
+        cls.objects.bulk_create([
+            cls(business_date=day, hour=hour, payment_method=method, **row)
+            for (day, hour, method), row in totals.items()
+        ])
+        return len(totals)
+
+class ProductDailySales(models.Model):
+    """
+    Completed sales per business day and product: quantity, revenue and
+    cost. Kept current at checkout/cancellation (sales.rollups), so
+    top-seller and category reports over any range read only this table.
+    """
+    business_date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(ProductCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['business_date', 'product']
+        indexes = [
+            models.Index(fields=['business_date', 'category'], name='productdaily_day_category'),
+        ]
+        verbose_name = 'Product Daily Sales'
+        verbose_name_plural = 'Product Daily Sales'
+        ordering = ['-business_date']
+    
+    def __str__(self):
+        return f"{self.business_date} product #{self.product_id}: {self.quantity}"
+    
+    @classmethod
+    def rebuild(cls, date, end=None):
+        """
+        Recompute the rows for a business day (or days up to end) from the
+        completed order items, with the cost and category each line was
+        sold at (the product's current ones for lines from before those
+        were recorded)
+        """
+        from django.db.models import F, Min, Sum
+        from django.db.models.functions import Coalesce
         
-        # Get top selling items
-        order_items = POSOrderItem.objects.filter(
-            order__created_at__date=date,
+        end = end or date
+        rows = POSOrderItem.objects.filter(
+            order__business_date__range=(date, end),
             order__status='completed'
-        ).values('product__name', 'product__sku').annotate(
+        ).values('order__business_date', 'product_id').annotate(
+            # A product moved to another category during the day stays
+            # under one of that day's categories.
+            sold_category=Min(Coalesce('category_id', 'product__category_id')),
             total_quantity=Sum('quantity'),
-            total_revenue=Sum('total_price')
-        ).order_by('-total_quantity')[:5]
+            total_revenue=Sum('total_price'),
+            total_cost=Sum(F('quantity') * Coalesce('unit_cost', 'product__cost_price')),
+        ).order_by()
         
-        top_items = []
-        for item in order_items:
-            top_items.append({
-                'name': item['product__name'],
-                'sku': item['product__sku'],
-                'quantity': item['total_quantity'],
-                'revenue': float(item['total_revenue'] or 0)
-            })
-        
-        summary_data['top_selling_items'] = top_items
-        
-        summary, created = cls.objects.update_or_create(
-            date=date,
-            defaults=summary_data
-        )
-        return summary
+        cls.objects.filter(business_date__range=(date, end)).delete()
+        created = cls.objects.bulk_create([
+            cls(
+                business_date=row['order__business_date'],
+                product_id=row['product_id'],
+                category_id=row['sold_category'],
+                quantity=row['total_quantity'],
+                revenue=row['total_revenue'],
+                cost=row['total_cost'] or 0,
+            )
+            for row in rows
+        ])
+        return len(created)
 
 class UnusualTransaction(models.Model):
     """
@@ -0,0 +1,83 @@
+# sales/numbering.py
+import re
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .business_day import business_today
+from .models import OrderNumberSequence
+
+ORDER_PREFIX = 'SPOS'
+
+
+def terminal_code(request) -> str:
+    """
+    Short label for the till placing the order.
+
+    Taken from the X-POS-Terminal header (or a ``terminal`` field) when the
+    client sends one, otherwise derived from the logged-in cashier.
+    """
+    raw = request.headers.get('X-POS-Terminal') or request.POST.get('terminal') or ''
+    code = re.sub(r'[^A-Z0-9]', '', raw.upper())[:8]
+    return code or f'U{request.user.pk}'
+
+
+class OrderNumberAllocator:
+    """
+    Hands out order numbers like ``SPOS-20250101-T3-00042``.
+
+    Each worker reserves a block of ``block_size`` numbers per terminal and
+    day with one locked update of OrderNumberSequence, then serves numbers
+    from memory. Blocks never overlap, so numbers are unique across workers;
+    numbers left in a block when a worker restarts are simply skipped.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or getattr(settings, 'POS_ORDER_NUMBER_BLOCK_SIZE', 50)
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def next_number(self, terminal: str) -> str:
+        return self.allocate(terminal, 1)[0]
+
+    def allocate(self, terminal: str, count: int):
+        """
+        Return ``count`` fresh order numbers for a terminal.
+
+        Must be called outside transaction.atomic(): a reserved block that
+        was later rolled back could be handed out again by another worker.
+        """
+        if transaction.get_connection().in_atomic_block:
+            raise RuntimeError('Order numbers must be allocated outside a transaction')
+
+        date = business_today()
+        key = (terminal, date)
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                start, end = self._blocks.get(key, (0, 0))
+                if start >= end:
+                    start, end = self._reserve_block(terminal, date, max(self.block_size, count - len(numbers)))
+                take = min(end - start, count - len(numbers))
+                numbers.extend(range(start, start + take))
+                self._blocks[key] = (start + take, end)
+            # Drop blocks for previous days.
+            for old in [k for k in self._blocks if k[1] != date]:
+                del self._blocks[old]
+
+        stamp = date.strftime('%Y%m%d')
+        return [f'{ORDER_PREFIX}-{stamp}-{terminal}-{n:05d}' for n in numbers]
+
+    def _reserve_block(self, terminal, date, size):
+        with transaction.atomic():
+            sequence, _ = OrderNumberSequence.objects.select_for_update().get_or_create(
+                terminal=terminal, date=date,
+            )
+            start = sequence.next_value
+            OrderNumberSequence.objects.filter(pk=sequence.pk).update(next_value=F('next_value') + size)
+        return start, start + size
+
+
+order_numbers = OrderNumberAllocator()
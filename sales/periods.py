@@ -0,0 +1,181 @@
+# sales/periods.py
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+
+from .aggregation import SUMMARY_METHODS
+from .models import SaleSummary
+
+PERIOD_KINDS = ['day', 'week', 'month', 'range']
+COMPARISONS = ['previous', 'last_year']
+
+
+def _shift_year(day, years=-1):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # 29 February in a non-leap year.
+        return day.replace(year=day.year + years, day=28)
+
+
+def _month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+@dataclass(frozen=True)
+class Period:
+    """
+    An inclusive span of business dates. ``week`` is an ISO week and
+    ``month`` a calendar month; either may end early (to date).
+    """
+    kind: str
+    start: date
+    end: date
+
+    @classmethod
+    def day(cls, day):
+        return cls('day', day, day)
+
+    @classmethod
+    def week(cls, day, to_date=True):
+        start = day - timedelta(days=day.weekday())
+        return cls('week', start, day if to_date else start + timedelta(days=6))
+
+    @classmethod
+    def month(cls, day, to_date=True):
+        return cls('month', day.replace(day=1), day if to_date else _month_end(day))
+
+    @classmethod
+    def range(cls, start, end):
+        return cls('range', start, end)
+
+    @classmethod
+    def last_days(cls, end, days):
+        return cls('range', end - timedelta(days=days - 1), end)
+
+    @property
+    def days(self):
+        return (self.end - self.start).days + 1
+
+    def dates(self):
+        return [self.start + timedelta(days=i) for i in range(self.days)]
+
+    def _clamped(self, start, limit):
+        # Same number of days from ``start``, but not past ``limit``.
+        return Period(self.kind, start, min(start + (self.end - self.start), limit))
+
+    def _month_from(self, start):
+        # A whole month compares with the whole other month, a month to
+        # date with as many days of it.
+        if self.end == _month_end(self.start):
+            return Period(self.kind, start, _month_end(start))
+        return self._clamped(start, _month_end(start))
+
+    def previous(self):
+        """The period before this one, covering the same part of it."""
+        if self.kind == 'month':
+            return self._month_from((self.start - timedelta(days=1)).replace(day=1))
+        if self.kind == 'week':
+            return Period('week', self.start - timedelta(days=7), self.end - timedelta(days=7))
+        return Period(self.kind, self.start - timedelta(days=self.days), self.start - timedelta(days=1))
+
+    def last_year(self):
+        """The same period a year earlier (same ISO week for weeks)."""
+        if self.kind == 'week':
+            year, week, _ = self.start.isocalendar()
+            weeks_last_year = date(year - 1, 12, 28).isocalendar()[1]
+            start = date.fromisocalendar(year - 1, min(week, weeks_last_year), 1)
+            return self._clamped(start, start + timedelta(days=6))
+        if self.kind == 'month':
+            return self._month_from(_shift_year(self.start))
+        return Period(self.kind, _shift_year(self.start), _shift_year(self.end))
+
+
+def _empty_totals():
+    return {
+        'total_sales': Decimal('0.00'),
+        'total_transactions': 0,
+        'methods': {method: {'sales': Decimal('0.00'), 'count': 0} for method in SUMMARY_METHODS},
+    }
+
+
+def _add(totals, row):
+    totals['total_sales'] += row.total_sales
+    totals['total_transactions'] += row.total_transactions
+    for method in SUMMARY_METHODS:
+        totals['methods'][method]['sales'] += getattr(row, f'{method}_sales')
+        totals['methods'][method]['count'] += getattr(row, f'{method}_transactions')
+
+
+def _change(current, base):
+    if not base:
+        return None
+    return (current - base) / base * 100
+
+
+def _compare(totals, base):
+    return {
+        'total_sales': base['total_sales'],
+        'total_transactions': base['total_transactions'],
+        'sales_change': _change(totals['total_sales'], base['total_sales']),
+        'transactions_change': _change(totals['total_transactions'], base['total_transactions']),
+    }
+
+
+def period_sales(periods, compare=COMPARISONS, daily=False):
+    """
+    Sales totals for each of ``periods`` summed from the SaleSummary day
+    rollups, with every period (and comparison period) read in one query.
+
+    Returns one dict per period with ``period``, ``total_sales``,
+    ``total_transactions``, ``average_order`` and per-method ``methods``.
+    ``compare`` adds ``vs_previous`` and/or ``vs_last_year`` with the base
+    totals and percentage changes (None when the base is zero). ``daily``
+    adds a ``days`` list of ``(date, total_sales, total_transactions)``.
+    """
+    compare = [c for c in compare if c in COMPARISONS]
+    spans = []
+    for period in periods:
+        spans.append(period)
+        if 'previous' in compare:
+            spans.append(period.previous())
+        if 'last_year' in compare:
+            spans.append(period.last_year())
+
+    query = Q()
+    for span in spans:
+        query |= Q(date__range=(span.start, span.end))
+    rows = {row.date: row for row in SaleSummary.objects.filter(query)} if spans else {}
+
+    def totals_for(span):
+        totals = _empty_totals()
+        for day in span.dates():
+            if day in rows:
+                _add(totals, rows[day])
+        return totals
+
+    results = []
+    for period in periods:
+        totals = totals_for(period)
+        result = dict(
+            totals,
+            period=period,
+            average_order=(
+                totals['total_sales'] / totals['total_transactions'] if totals['total_transactions'] else Decimal('0.00')
+            ),
+        )
+        if 'previous' in compare:
+            result['vs_previous'] = _compare(totals, totals_for(period.previous()))
+        if 'last_year' in compare:
+            result['vs_last_year'] = _compare(totals, totals_for(period.last_year()))
+        if daily:
+            result['days'] = [
+                (day, rows[day].total_sales, rows[day].total_transactions) if day in rows
+                else (day, Decimal('0.00'), 0)
+                for day in period.dates()
+            ]
+        results.append(result)
+    return results
@@ -0,0 +1,89 @@
+# sales/reaper.py
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from inventory.stock import release_stock
+from .models import POSOrder, POSOrderItem
+
+
+@dataclass
+class ReapResult:
+    orders: int = 0
+    items: int = 0
+    units: int = 0
+    batches: int = 0
+
+
+def stale_pending_orders(older_than):
+    """Pending orders that haven't been touched for ``older_than``."""
+    cutoff = timezone.now() - older_than
+    return POSOrder.objects.filter(status='pending', updated_at__lt=cutoff)
+
+
+def _reap_batch(order_ids, archive):
+    """Release stock for one batch of orders and delete/archive them."""
+    with transaction.atomic():
+        # Re-check under lock so an order completed meanwhile is left alone.
+        order_ids = list(
+            POSOrder.objects.select_for_update()
+            .filter(pk__in=order_ids, status='pending')
+            .values_list('pk', flat=True)
+        )
+        if not order_ids:
+            return 0, 0, 0
+
+        per_product = (
+            POSOrderItem.objects.filter(order_id__in=order_ids)
+            .values('product_id')
+            .annotate(units=Sum('quantity'), lines=Count('id'))
+        )
+        quantities = {row['product_id']: row['units'] for row in per_product}
+        items = sum(row['lines'] for row in per_product)
+
+        release_stock(quantities)
+        orders = POSOrder.objects.filter(pk__in=order_ids)
+        if archive:
+            orders.update(status='cancelled', updated_at=timezone.now())
+        else:
+            orders.delete()
+
+    return len(order_ids), items, sum(quantities.values())
+
+
+def reap_pending_orders(older_than=timedelta(hours=24), batch_size=500, archive=False, dry_run=False):
+    """
+    Reclaim abandoned pending orders.
+
+    Stock held by their items is put back with one UPDATE per batch, then
+    the orders are deleted (items and payments cascade) or, with
+    ``archive``, kept as cancelled. Each batch is its own transaction.
+    """
+    stale = stale_pending_orders(older_than)
+    result = ReapResult()
+
+    if dry_run:
+        totals = POSOrderItem.objects.filter(order__in=stale).aggregate(
+            items=Count('id'), units=Sum('quantity'),
+        )
+        result.orders = stale.count()
+        result.items = totals['items']
+        result.units = totals['units'] or 0
+        return result
+
+    last_id = 0
+    while True:
+        batch = list(
+            stale.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return result
+        last_id = batch[-1]
+        orders, items, units = _reap_batch(batch, archive)
+        result.orders += orders
+        result.items += items
+        result.units += units
+        result.batches += 1
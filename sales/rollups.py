@@ -0,0 +1,205 @@
+# sales/rollups.py
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import ExtractIsoWeekDay
+
+from .aggregation import SUMMARY_METHODS
+from .cart import TWO_PLACES
+from .business_day import business_hour
+from .models import DailySalesSummary, ProductDailySales, SaleSummary, SalesHourlyRollup
+
+TOP_ITEMS = 5
+
+
+def _increment(model, key, deltas):
+    """UPDATE ... SET f = f + delta for one rollup row, creating it if needed."""
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            # Every rollup field defaults to zero, so the deltas are the
+            # starting values.
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another checkout created the row first.
+        model.objects.filter(**key).update(**updates)
+
+
+def money(value):
+    """Decimal amount as the fixed two-place string stored in the tallies."""
+    return str(Decimal(value or 0).quantize(TWO_PLACES))
+
+
+def top_items(item_totals, limit=TOP_ITEMS):
+    """The ``top_selling_items`` list for a day's per-product tallies."""
+    ranked = sorted(item_totals.values(), key=lambda t: (-t['quantity'], t['name']))
+    return [
+        {'name': t['name'], 'sku': t['sku'], 'quantity': t['quantity'], 'revenue': float(Decimal(t['revenue']))}
+        for t in ranked[:limit]
+    ]
+
+
+def _apply_items(item_totals, items, sign):
+    for item in items:
+        key = str(item['product_id'])
+        tally = item_totals.setdefault(key, {
+            'name': item['name'], 'sku': item['sku'], 'quantity': 0, 'revenue': '0.00',
+        })
+        tally['quantity'] += item['quantity'] * sign
+        tally['revenue'] = money(Decimal(tally['revenue']) + item['total_price'] * sign)
+        if tally['quantity'] <= 0:
+            del item_totals[key]
+
+
+def _update_daily(date, deltas, items, sign):
+    # The per-item tallies are JSON, so this row is updated under a row
+    # lock rather than with F() expressions.
+    summary, _ = DailySalesSummary.objects.select_for_update().get_or_create(date=date)
+    for field, delta in deltas.items():
+        setattr(summary, field, getattr(summary, field) + delta)
+    _apply_items(summary.item_totals, items, sign)
+    summary.top_selling_items = top_items(summary.item_totals)
+    summary.save(update_fields=[*deltas, 'item_totals', 'top_selling_items', 'updated_at'])
+    return summary
+
+
+def _by_product(values, output_field):
+    return Case(
+        *[When(product_id=product_id, then=Value(value)) for product_id, value in values.items()],
+        output_field=output_field,
+    )
+
+
+def _update_products(date, items, sign):
+    """
+    Add the order's lines to ProductDailySales with one UPDATE for all
+    products; rows that don't exist yet are inserted in one bulk_create.
+    """
+    totals = {}
+    for item in items:
+        row = totals.setdefault(item['product_id'], {
+            'category_id': item['category_id'], 'quantity': 0, 'revenue': Decimal('0.00'), 'cost': Decimal('0.00'),
+        })
+        row['quantity'] += item['quantity'] * sign
+        row['revenue'] += item['total_price'] * sign
+        row['cost'] += (item['unit_cost'] or 0) * item['quantity'] * sign
+    if not totals:
+        return
+
+    def add_to_existing(product_ids):
+        return ProductDailySales.objects.filter(business_date=date, product_id__in=product_ids).update(
+            quantity=F('quantity') + _by_product(
+                {pk: totals[pk]['quantity'] for pk in product_ids}, IntegerField()),
+            revenue=F('revenue') + _by_product(
+                {pk: totals[pk]['revenue'] for pk in product_ids}, DecimalField(max_digits=12, decimal_places=2)),
+            cost=F('cost') + _by_product(
+                {pk: totals[pk]['cost'] for pk in product_ids}, DecimalField(max_digits=12, decimal_places=2)),
+        )
+
+    product_ids = list(totals)
+    while add_to_existing(product_ids) != len(product_ids):
+        existing = set(
+            ProductDailySales.objects.filter(business_date=date, product_id__in=product_ids)
+            .values_list('product_id', flat=True)
+        )
+        missing = [pk for pk in product_ids if pk not in existing]
+        try:
+            with transaction.atomic():
+                ProductDailySales.objects.bulk_create([
+                    ProductDailySales(business_date=date, product_id=pk, **totals[pk]) for pk in missing
+                ])
+            return
+        except IntegrityError:
+            # Another checkout created some of them first: update those on
+            # the next pass and insert the rest again.
+            product_ids = missing
+
+
+def record_order(order, items, sign=1):
+    """
+    Apply a completed order to the daily summary, hourly and per-product
+    rollup rows.
+
+    ``items`` are dicts with product_id, name, sku, category_id, quantity,
+    total_price and unit_cost. ``sign=-1`` takes a previously counted
+    order back out (cancellation). Must run inside the transaction that
+    changes the order. Returns the updated DailySalesSummary.
+    """
+    from core.dashboard import invalidate_dashboard_on_commit
+
+    date = order.business_date
+    amount = order.final_amount * sign
+    method = order.payment_method if order.payment_method in SUMMARY_METHODS else None
+
+    daily = {'total_revenue': amount, 'total_transactions': sign}
+    sale = {'total_sales': amount, 'total_transactions': sign}
+    if method:
+        daily.update({f'{method}_revenue': amount, f'{method}_transactions': sign})
+        sale.update({f'{method}_sales': amount, f'{method}_transactions': sign})
+
+    summary = _update_daily(date, daily, items, sign)
+    _increment(SaleSummary, {'date': date}, sale)
+    _increment(
+        SalesHourlyRollup,
+        {'business_date': date, 'hour': business_hour(order.created_at), 'payment_method': order.payment_method},
+        {'revenue': amount, 'orders': sign, 'items': sum(item['quantity'] for item in items) * sign},
+    )
+    _update_products(date, items, sign)
+    invalidate_dashboard_on_commit('sales')
+    return summary
+
+
+HEATMAP_METRICS = ['revenue', 'orders', 'items']
+
+
+def hourly_heatmap(start, end, metric='revenue', payment_method=None):
+    """
+    Day-of-week x hour totals of ``metric`` between two business dates
+    (inclusive), summed from SalesHourlyRollup in one grouped query.
+
+    Returns a 7x24 matrix, Monday first.
+    """
+    rows = SalesHourlyRollup.objects.filter(business_date__range=(start, end))
+    if payment_method:
+        rows = rows.filter(payment_method=payment_method)
+    rows = (
+        rows.annotate(weekday=ExtractIsoWeekDay('business_date'))
+        .values('weekday', 'hour')
+        .annotate(total=Sum(metric))
+        .order_by()
+    )
+
+    zero = Decimal('0.00') if metric == 'revenue' else 0
+    matrix = [[zero] * 24 for _ in range(7)]
+    for row in rows:
+        matrix[row['weekday'] - 1][row['hour']] = row['total']
+    return matrix
+
+
+def top_products(start, end, limit=TOP_ITEMS, by='quantity'):
+    """
+    Best sellers between two business dates (inclusive) from
+    ProductDailySales, ranked by ``by`` (quantity or revenue).
+    """
+    ranking = 'total_quantity' if by == 'quantity' else 'total_revenue'
+    return list(
+        ProductDailySales.objects.filter(business_date__range=(start, end))
+        .values('product_id', 'product__name', 'product__sku')
+        .annotate(total_quantity=Sum('quantity'), total_revenue=Sum('revenue'), total_cost=Sum('cost'))
+        .filter(total_quantity__gt=0)
+        .order_by(f'-{ranking}')[:limit]
+    )
+
+
+def category_performance(start, end, limit=TOP_ITEMS):
+    """Quantity, revenue and cost per category between two business dates."""
+    return list(
+        ProductDailySales.objects.filter(business_date__range=(start, end))
+        .values('category_id', 'category__name')
+        .annotate(total_quantity=Sum('quantity'), total_revenue=Sum('revenue'), total_cost=Sum('cost'))
+        .filter(total_quantity__gt=0)
+        .order_by('-total_revenue')[:limit]
+    )
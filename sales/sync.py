@@ -0,0 +1,198 @@
+# sales/sync.py
+import json
+
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.urls import reverse
+
+from core.utils import check_limit_or_block
+from inventory.models import Product
+from inventory.stock import InsufficientStock
+from .cart import POSCart
+from .checkout import checkout, CheckoutError
+from .idempotency import claim_key, MAX_KEY_LENGTH
+from .models import IdempotencyKey
+from .numbering import order_numbers
+
+# Most actions accepted in one sync request, and how many of them share a
+# transaction. Each action also gets its own savepoint, so one failing
+# action doesn't undo the others in its chunk.
+SYNC_MAX_ACTIONS = 200
+SYNC_CHUNK_SIZE = 25
+
+
+class SyncActionError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _quantity(data):
+    try:
+        return int(data.get('quantity', 1))
+    except (TypeError, ValueError):
+        raise SyncActionError(400, 'Quantity must be a number')
+
+
+def _add_item(request, cart, data, order_number):
+    sku = (data.get('selected_product') or data.get('sku') or '').strip()
+    quantity = _quantity(data)
+    product = Product.objects.filter(sku=sku).first() if sku else None
+    if not product:
+        raise SyncActionError(404, f'Product not found with SKU: {sku}')
+    if quantity <= 0:
+        raise SyncActionError(400, 'Quantity must be at least 1')
+    if cart.quantity_of(product.id) + quantity > product.stock_quantity:
+        raise SyncActionError(409, f'Insufficient stock for {product.name}. Available: {product.stock_quantity}')
+    line = cart.add(product, quantity)
+    return {'product_id': line.product_id, 'quantity': line.quantity}
+
+
+def _remove_item(request, cart, data, order_number):
+    try:
+        line = cart.remove(data.get('item_id') or data.get('product_id'))
+    except (TypeError, ValueError):
+        line = None
+    if line is None:
+        raise SyncActionError(404, 'Item is not in the cart')
+    return {'product_id': line.product_id}
+
+
+def _clear_order(request, cart, data, order_number):
+    cart.clear()
+    return {}
+
+
+def _complete_order(request, cart, data, order_number):
+    lines = data.get('lines')
+    try:
+        if lines is None:
+            lines = [(line.product_id, line.quantity) for line in cart]
+        else:
+            lines = [(line['product_id'], line['quantity']) for line in lines]
+    except (KeyError, TypeError):
+        raise SyncActionError(400, 'Each line needs a product_id and quantity')
+
+    try:
+        check_limit_or_block("orders_per_day")
+        order = checkout(
+            lines,
+            order_number=order_number,
+            cashier=request.user.username,
+            payment_method=data.get('payment_method') or 'pos',
+            reference_number=data.get('reference_number') or '',
+            customer_name=data.get('customer_name') or '',
+            customer_phone=data.get('customer_phone') or '',
+        )
+    except PermissionDenied as e:
+        raise SyncActionError(403, str(e))
+    except InsufficientStock as e:
+        raise SyncActionError(409, str(e), shortages=e.shortages)
+    except (CheckoutError, ValueError) as e:
+        raise SyncActionError(400, str(e))
+
+    if data.get('lines') is None:
+        cart.clear()
+    return {
+        'order': {
+            'id': order.id,
+            'order_number': order.order_number,
+            'final_amount': str(order.final_amount),
+            'receipt_url': reverse('sales:print_receipt', args=[order.id]),
+        },
+    }
+
+
+# Same action names as the POS form posts, so queued form bodies can be
+# sent as they are.
+SYNC_ACTIONS = {
+    'add_item': _add_item,
+    'remove_item': _remove_item,
+    'clear_order': _clear_order,
+    'complete_order': _complete_order,
+}
+
+
+def _run(request, cart, action, order_number):
+    handler = SYNC_ACTIONS.get(action.get('action'))
+    if handler is None:
+        return 400, {'error': f"Unknown action: {action.get('action')}"}
+    data = action.get('data') or {}
+    # The cart lives in the session, outside the savepoint.
+    snapshot = cart.snapshot()
+    try:
+        with transaction.atomic():
+            return 200, handler(request, cart, data, order_number)
+    except SyncActionError as e:
+        cart.restore(snapshot)
+        return e.status, dict(e.extra, error=str(e))
+
+
+def _apply(request, cart, action, order_number, path):
+    key = str(action.get('key') or '').strip()
+    if len(key) > MAX_KEY_LENGTH:
+        # Cutting it short could make it collide with another action's key.
+        return 400, {'error': f'Action keys must be at most {MAX_KEY_LENGTH} characters'}
+    if not key:
+        return _run(request, cart, action, order_number)
+
+    record, created = claim_key(request.user, key, path)
+    if not created:
+        if record is None or record.status_code is None:
+            return 409, {'error': 'This action is already being processed', 'retry': True}
+        if record.path == path:
+            status, result = record.status_code, json.loads(bytes(record.body))
+        else:
+            # Already applied by a direct (non-batch) request.
+            status, result = record.status_code, {}
+        return status, dict(result, replayed=True)
+
+    status, result = _run(request, cart, action, order_number)
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=status,
+        content_type='application/json',
+        body=json.dumps(result).encode(),
+    )
+    return status, result
+
+
+def apply_actions(request, actions, terminal):
+    """
+    Apply queued POS actions in order and return one result per action.
+
+    Actions are ``{key, action, data}`` where ``action`` is one of
+    SYNC_ACTIONS and ``data`` holds the fields the POS form would have
+    posted. Work is committed every SYNC_CHUNK_SIZE actions. An action
+    whose key was already applied, here or through the regular
+    endpoints, is reported rather than run again.
+    """
+    cart = POSCart(request.session)
+    results = []
+
+    for start in range(0, len(actions), SYNC_CHUNK_SIZE):
+        chunk = actions[start:start + SYNC_CHUNK_SIZE]
+        # Numbers can't be reserved inside the transaction; unused ones
+        # are skipped, as with any abandoned block.
+        needed = sum(1 for a in chunk if a.get('action') == 'complete_order')
+        numbers = iter(order_numbers.allocate(terminal, needed) if needed else [])
+
+        snapshot = cart.snapshot()
+        try:
+            with transaction.atomic():
+                for action in chunk:
+                    order_number = next(numbers) if action.get('action') == 'complete_order' else None
+                    status, result = _apply(request, cart, action, order_number, request.path)
+                    results.append(dict(
+                        result,
+                        key=action.get('key'),
+                        action=action.get('action'),
+                        status=status,
+                        success=status < 400,
+                    ))
+        except Exception:
+            # The chunk was rolled back, so its cart changes must be too.
+            cart.restore(snapshot)
+            raise
+
+    return results
@@ -1,3 +1,500 @@
-from django.test import TestCase
+import io
+from importlib import import_module
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.db.models.constants import OnConflict
+from django.apps import apps
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import CustomUser
+
+from inventory.models import Product, ProductCategory
+from inventory.stock import release_stock
+from .business_day import business_date, business_hour
+from .cart import POSCart
+from .checkout import (
+    CHECKOUT_STATEMENT_LIMIT, CheckoutError, StatementBudgetExceeded, cancel_order, checkout, statement_budget,
+)
+from .idempotency import claim_key, idempotent
+from .models import (
+    DailySalesSummary, IdempotencyKey, OrderNumberSequence, POSOrder, POSOrderItem, ProductDailySales, SaleSummary,
+)
+from .numbering import OrderNumberAllocator, terminal_code
+from .periods import Period, period_sales
+from .reaper import reap_pending_orders
+from .rollups import _update_products
+from .sync import SYNC_ACTIONS, apply_actions
+
+DAY = date(2026, 3, 14)
+
+
+def make_products():
+    category = ProductCategory.objects.create(name='Drinks')
+    coke = Product.objects.create(
+        name='Coke', sku='CC50', barcode='111', category=category,
+        price=Decimal('500'), cost_price=Decimal('300'), stock_quantity=20, minimum_stock=5,
+    )
+    fanta = Product.objects.create(
+        name='Fanta', sku='FA50', barcode='222', category=category,
+        price=Decimal('450.50'), cost_price=Decimal('250'), stock_quantity=3, minimum_stock=5,
+    )
+    return coke, fanta
+
+
+def make_order(number, amount, method='cash', day=DAY, status='completed'):
+    return POSOrder.objects.create(
+        order_number=number, total_amount=amount, final_amount=amount,
+        payment_method=method, status=status, cashier='cash', business_date=day,
+    )
+
+
+class SummaryUpsertTests(TestCase):
+    def test_generate_range_updates_existing_rows(self):
+        make_order('A-1', Decimal('100.00'))
+        SaleSummary.generate_range(DAY, DAY)
+        make_order('A-2', Decimal('50.00'), method='pos')
+        SaleSummary.generate_range(DAY, DAY)
+
+        summary = SaleSummary.objects.get(date=DAY)
+        self.assertEqual(SaleSummary.objects.count(), 1)
+        self.assertEqual(summary.total_sales, Decimal('150.00'))
+        self.assertEqual(summary.total_transactions, 2)
+        self.assertEqual(summary.pos_sales, Decimal('50.00'))
+
+    def test_no_conflict_target_on_backends_that_refuse_one(self):
+        # MySQL: ON DUPLICATE KEY UPDATE can't name unique fields.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(QuerySet, '_batched_insert', return_value=[]) as insert:
+            SaleSummary.generate_range(DAY, DAY)
+        self.assertEqual(insert.call_args.kwargs['on_conflict'], OnConflict.UPDATE)
+        self.assertIsNone(insert.call_args.kwargs['unique_fields'])
+
+
+class CancellationSummaryTests(TestCase):
+    def test_cancelling_takes_the_order_out_of_the_daily_summary(self):
+        coke, fanta = make_products()
+        checkout([(coke.pk, 2)], 'A-1', 'cash', 'cash')
+        cancelled = checkout([(coke.pk, 1), (fanta.pk, 2)], 'A-2', 'cash', 'pos')
+        summary = DailySalesSummary.objects.get()
+        self.assertEqual((summary.total_revenue, summary.pos_revenue), (Decimal('2401.00'), Decimal('1401.00')))
+
+        cancel_order(cancelled.pk)
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_revenue, Decimal('1000.00'))
+        self.assertEqual(summary.total_transactions, 1)
+        self.assertEqual((summary.pos_revenue, summary.pos_transactions), (Decimal('0.00'), 0))
+        self.assertEqual((summary.cash_revenue, summary.cash_transactions), (Decimal('1000.00'), 1))
+        self.assertEqual(
+            [(item['sku'], item['quantity']) for item in summary.top_selling_items], [('CC50', 2)],
+        )
+
+    def test_only_completed_orders_can_be_cancelled(self):
+        coke, _ = make_products()
+        order = checkout([(coke.pk, 1)], 'A-1', 'cash', 'cash')
+        cancel_order(order.pk)
+        with self.assertRaises(CheckoutError):
+            cancel_order(order.pk)
+        self.assertEqual(DailySalesSummary.objects.get().total_transactions, 0)
+
+
+class ReaperTests(TestCase):
+    def setUp(self):
+        self.coke, self.fanta = make_products()
+        self.pending('P-1', [(self.coke, 3), (self.fanta, 1)])
+        self.pending('P-2', [(self.coke, 2)])
+        self.pending('P-3', [(self.coke, 4)], stale=False)
+        completed = make_order('A-1', Decimal('500'))
+        POSOrder.objects.filter(pk=completed.pk).update(updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    def pending(self, number, lines, stale=True):
+        order = make_order(number, Decimal('0'), status='pending')
+        for product, quantity in lines:
+            POSOrderItem.objects.create(
+                order=order, product=product, quantity=quantity,
+                unit_price=product.price, total_price=product.price * quantity,
+            )
+            Product.objects.filter(pk=product.pk).update(stock_quantity=F('stock_quantity') - quantity)
+        if stale:
+            POSOrder.objects.filter(pk=order.pk).update(updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        return order
+
+    def stock(self):
+        return dict(Product.objects.values_list('sku', 'stock_quantity'))
+
+    def test_abandoned_orders_give_their_stock_back(self):
+        result = reap_pending_orders(batch_size=1)
+        self.assertEqual((result.orders, result.items, result.units, result.batches), (2, 3, 6, 2))
+        self.assertEqual(self.stock(), {'CC50': 16, 'FA50': 3})
+        self.assertEqual(
+            set(POSOrder.objects.values_list('order_number', flat=True)), {'P-3', 'A-1'},
+        )
+
+    def test_archive_keeps_them_cancelled(self):
+        reap_pending_orders(archive=True)
+        self.assertEqual(self.stock(), {'CC50': 16, 'FA50': 3})
+        self.assertEqual(
+            sorted(POSOrder.objects.filter(status='cancelled').values_list('order_number', flat=True)),
+            ['P-1', 'P-2'],
+        )
+
+    def test_dry_run_changes_nothing(self):
+        result = reap_pending_orders(dry_run=True)
+        self.assertEqual((result.orders, result.units), (2, 6))
+        self.assertEqual(self.stock(), {'CC50': 11, 'FA50': 2})
+        self.assertEqual(POSOrder.objects.count(), 4)
+
+
+class PeriodComparisonTests(TestCase):
+    def span(self, period):
+        return period.start, period.end
+
+    def test_previous_month_to_date_stops_at_a_shorter_month_end(self):
+        self.assertEqual(self.span(Period.month(date(2024, 3, 31)).previous()), (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(self.span(Period.month(date(2023, 3, 30)).previous()), (date(2023, 2, 1), date(2023, 2, 28)))
+        self.assertEqual(self.span(Period.month(date(2026, 1, 15)).previous()), (date(2025, 12, 1), date(2025, 12, 15)))
+
+    def test_a_whole_month_compares_with_whole_months(self):
+        february = Period.month(date(2025, 2, 1), to_date=False)
+        self.assertEqual(self.span(february.previous()), (date(2025, 1, 1), date(2025, 1, 31)))
+        self.assertEqual(self.span(february.last_year()), (date(2024, 2, 1), date(2024, 2, 29)))
+        leap = Period.month(date(2024, 2, 1), to_date=False)
+        self.assertEqual(self.span(leap.last_year()), (date(2023, 2, 1), date(2023, 2, 28)))
+
+    def test_last_year_of_a_leap_day(self):
+        self.assertEqual(self.span(Period.day(date(2024, 2, 29)).last_year()), (date(2023, 2, 28), date(2023, 2, 28)))
+        self.assertEqual(
+            self.span(Period.range(date(2024, 2, 29), date(2024, 3, 1)).last_year()),
+            (date(2023, 2, 28), date(2023, 3, 1)),
+        )
+
+    def test_previous_range_and_week(self):
+        self.assertEqual(
+            self.span(Period.range(date(2024, 2, 28), date(2024, 3, 1)).previous()),
+            (date(2024, 2, 25), date(2024, 2, 27)),
+        )
+        self.assertEqual(self.span(Period.week(date(2026, 1, 1)).previous()), (date(2025, 12, 22), date(2025, 12, 25)))
+
+    def test_week_53_falls_back_to_the_last_week_of_a_52_week_year(self):
+        week = Period.week(date(2020, 12, 28), to_date=False)
+        self.assertEqual(self.span(week.last_year()), (date(2019, 12, 23), date(2019, 12, 29)))
+
+    def test_changes_are_percentages_of_the_base(self):
+        for day, sales, count in [
+            (date(2024, 2, 29), '300.00', 3), (date(2024, 2, 28), '200.00', 2), (date(2023, 2, 28), '400.00', 4),
+        ]:
+            SaleSummary.objects.create(date=day, total_sales=Decimal(sales), total_transactions=count)
+        result, = period_sales([Period.day(date(2024, 2, 29))])
+        self.assertEqual(result['average_order'], Decimal('100.00'))
+        self.assertEqual(result['vs_previous']['sales_change'], Decimal('50'))
+        self.assertEqual(result['vs_last_year']['sales_change'], Decimal('-25'))
+        self.assertEqual(result['vs_last_year']['transactions_change'], -25)
+        self.assertIsNone(period_sales([Period.day(date(2024, 3, 2))])[0]['vs_previous']['sales_change'])
+
+
+class LiveFeedTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.client.login(username='cash', password='pw')
+
+    @override_settings(POS_LIVE_FEED=False)
+    def test_feed_off_answers_no_content(self):
+        # 204 stops EventSource reconnecting; the dashboard polls instead.
+        response = self.client.get(reverse('sales:api_live_feed'))
+        self.assertEqual(response.status_code, 204)
+
+    def test_totals_for_polling(self):
+        response = self.client.get(reverse('sales:api_live_totals'))
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['totals']['total_transactions'], 0)
+
+
+class ApiPayloadTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.client.login(username='cash', password='pw')
+
+    def test_non_object_json_body_is_a_bad_request(self):
+        for body in ('[1, 2]', '"actions"', '3'):
+            response = self.client.post(reverse('sales:api_sync'), body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertFalse(response.json()['success'])
+
+    def test_scan_rechecks_stock_the_index_has_not_seen(self):
+        _, fanta = make_products()
+        scan = reverse('sales:api_cart_scan')
+        self.client.post(scan, {'code': '222', 'quantity': 1}, content_type='application/json')
+        # Restocking does not move the catalog version the index follows.
+        release_stock({fanta.pk: 7})
+        response = self.client.post(scan, {'code': '222', 'quantity': 5}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(scan, {'code': '222', 'quantity': 5}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Available: 10', response.json()['error'])
+
+
+class ProductRollupTests(TestCase):
+    def setUp(self):
+        self.coke, self.fanta = make_products()
+
+    def line(self, product, quantity):
+        return {
+            'product_id': product.pk, 'category_id': product.category_id, 'quantity': quantity,
+            'total_price': product.price * quantity, 'unit_cost': product.cost_price,
+        }
+
+    def test_insert_race_keeps_every_line(self):
+        atomic = transaction.atomic
+
+        def racing(*args, **kwargs):
+            if not ProductDailySales.objects.exists():
+                # Another checkout inserts the Coke row just before this one does.
+                ProductDailySales.objects.create(business_date=DAY, product=self.coke, quantity=2)
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(transaction, 'atomic', racing), \
+                mock.patch.object(ProductDailySales.objects, 'bulk_create',
+                                  wraps=ProductDailySales.objects.bulk_create) as insert:
+            _update_products(DAY, [self.line(self.coke, 1), self.line(self.fanta, 3)], 1)
+
+        self.assertEqual(insert.call_count, 2)
+        rows = dict(ProductDailySales.objects.values_list('product_id', 'quantity'))
+        self.assertEqual(rows, {self.coke.pk: 3, self.fanta.pk: 3})
+
+    def test_cancel_reverses_the_cost_recorded_at_checkout(self):
+        order = checkout([(self.coke.pk, 2)], 'A-1', 'cash', 'cash')
+        Product.objects.filter(pk=self.coke.pk).update(cost_price=Decimal('350'))
+        cancel_order(order.pk)
+
+        row = ProductDailySales.objects.get(product=self.coke)
+        self.assertEqual(row.quantity, 0)
+        self.assertEqual(row.cost, Decimal('0.00'))
+
+    def test_rebuild_keeps_the_cost_and_category_sold_at(self):
+        order = checkout([(self.coke.pk, 2)], 'A-1', 'cash', 'cash')
+        snacks = ProductCategory.objects.create(name='Snacks')
+        Product.objects.filter(pk=self.coke.pk).update(cost_price=Decimal('350'), category=snacks)
+        ProductDailySales.rebuild(order.business_date)
+
+        row = ProductDailySales.objects.get(product=self.coke)
+        self.assertEqual(row.cost, Decimal('600.00'))
+        self.assertEqual(row.category_id, self.coke.category_id)
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.coke, self.fanta = make_products()
+        self.request = RequestFactory().post('/sales/api/sync/')
+        self.request.user = CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.request.session = SessionStore()
+
+    def add(self, product, key=None):
+        return {'key': key, 'action': 'add_item', 'data': {'sku': product.sku, 'quantity': 1}}
+
+    def test_overlong_key_is_rejected_not_truncated(self):
+        results = apply_actions(self.request, [self.add(self.coke, 'k' * 65), self.add(self.fanta, 'k' * 64)], 'T1')
+        self.assertEqual([r['status'] for r in results], [400, 200])
+        self.assertEqual([line.product_id for line in POSCart(self.request.session)], [self.fanta.pk])
+
+    def test_rolled_back_chunk_restores_the_cart(self):
+        apply_actions(self.request, [self.add(self.coke)], 'T1')
+
+        def fail(request, cart, data, order_number):
+            raise RuntimeError('database went away')
+
+        with mock.patch.dict(SYNC_ACTIONS, {'fail': fail}), self.assertRaises(RuntimeError):
+            apply_actions(self.request, [self.add(self.fanta), {'action': 'fail'}], 'T1')
+        cart = POSCart(self.request.session)
+        self.assertEqual({line.product_id: line.quantity for line in cart}, {self.coke.pk: 1})
+
+
+@override_settings(POS_BUSINESS_TIMEZONE='Africa/Lagos', POS_BUSINESS_DAY_CUTOFF_HOUR=4)
+class BusinessDayTests(TestCase):
+    def test_hour_shifts_with_the_cutoff(self):
+        # 02:00 and 04:00 in Lagos (UTC+1).
+        late = datetime(2026, 3, 15, 1, tzinfo=timezone.utc)
+        opening = datetime(2026, 3, 15, 3, tzinfo=timezone.utc)
+        self.assertEqual((business_date(late), business_hour(late)), (DAY, 22))
+        self.assertEqual((business_date(opening), business_hour(opening)), (date(2026, 3, 15), 0))
+
+    def test_backfill_puts_orders_either_side_of_the_cutoff_on_their_day(self):
+        backfill = import_module('sales.migrations.0009_posorder_business_date').backfill_business_date
+        moments = {
+            # 03:59 and 04:00 in Lagos on the 15th, then 00:30 on the 16th (before the cutoff).
+            'A-1': datetime(2026, 3, 15, 2, 59, tzinfo=timezone.utc),
+            'A-2': datetime(2026, 3, 15, 3, 0, tzinfo=timezone.utc),
+            'A-3': datetime(2026, 3, 15, 23, 30, tzinfo=timezone.utc),
+        }
+        for number, moment in moments.items():
+            order = make_order(number, Decimal('100'))
+            POSOrder.objects.filter(pk=order.pk).update(created_at=moment, business_date=date(2000, 1, 1))
+
+        backfill(apps, None)
+        self.assertEqual(dict(POSOrder.objects.values_list('order_number', 'business_date')), {
+            'A-1': DAY, 'A-2': date(2026, 3, 15), 'A-3': date(2026, 3, 15),
+        })
+        for number, moment in moments.items():
+            self.assertEqual(POSOrder.objects.get(order_number=number).business_date, business_date(moment))
+
+    def test_heatmap_labels_columns_with_clock_hours(self):
+        CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.client.login(username='cash', password='pw')
+        data = self.client.get(reverse('sales:api_sales_heatmap')).json()
+        self.assertEqual(data['hours'][:2], [4, 5])
+        self.assertEqual(data['hours'][-1], 3)
+
+    def test_heatmap_rejects_malformed_dates(self):
+        CustomUser.objects.create_user('cash', password='pw', role='admin')
+        self.client.login(username='cash', password='pw')
+        for query in ({'from': '01/03/2026'}, {'to': 'yesterday'}, {'to': '2026-02-30'}):
+            response = self.client.get(reverse('sales:api_sales_heatmap'), query)
+            self.assertEqual(response.status_code, 400, query)
+
+
+class CheckoutStatementBudgetTests(TestCase):
+    class Rollback(Exception):
+        pass
+
+    def setUp(self):
+        coke, _ = make_products()
+        self.products = [coke] + [
+            Product.objects.create(
+                name=f'Item {n}', sku=f'IT{n}', category=coke.category,
+                price=Decimal('100'), cost_price=Decimal('60'), stock_quantity=50, minimum_stock=5,
+            )
+            for n in range(20)
+        ]
+
+    def statements(self, products):
+        """Statements one checkout of ``products`` issues, rolled back afterwards."""
+        try:
+            with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                checkout([(product.pk, 1) for product in products], 'A-1', 'cash', 'cash')
+                raise self.Rollback
+        except self.Rollback:
+            pass
+        return len(queries)
+
+    def test_statements_do_not_grow_with_the_cart(self):
+        one = self.statements(self.products[:1])
+        many = self.statements(self.products)
+        self.assertEqual(one, many)
+        self.assertLessEqual(many, CHECKOUT_STATEMENT_LIMIT)
+
+    def test_exceeding_the_budget_writes_nothing(self):
+        with mock.patch('sales.checkout.CHECKOUT_STATEMENT_LIMIT', 3), self.assertRaises(StatementBudgetExceeded):
+            checkout([(self.products[0].pk, 1)], 'A-1', 'cash', 'cash')
+        self.assertFalse(POSOrder.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_quantity, 20)
+
+    def test_budget_counts_statements(self):
+        with self.assertRaises(StatementBudgetExceeded), statement_budget(1):
+            POSOrder.objects.count()
+            POSOrder.objects.count()
+
+
+class OrderNumberTests(TransactionTestCase):
+    # Numbers are allocated outside any transaction, so no TestCase wrapper.
+
+    def setUp(self):
+        self.today = mock.patch('sales.numbering.business_today', return_value=DAY)
+        self.today.start()
+        self.addCleanup(self.today.stop)
+
+    def test_workers_take_whole_blocks_in_turn(self):
+        first, second = OrderNumberAllocator(block_size=3), OrderNumberAllocator(block_size=3)
+        self.assertEqual(first.next_number('T1'), 'SPOS-20260314-T1-00001')
+        self.assertEqual(second.next_number('T1'), 'SPOS-20260314-T1-00004')
+        self.assertEqual(first.allocate('T1', 3), [
+            'SPOS-20260314-T1-00002', 'SPOS-20260314-T1-00003', 'SPOS-20260314-T1-00007',
+        ])
+        self.assertEqual(OrderNumberSequence.objects.get(terminal='T1', date=DAY).next_value, 10)
+
+    def test_new_business_day_starts_again(self):
+        allocator = OrderNumberAllocator(block_size=3)
+        allocator.next_number('T1')
+        self.today.stop()
+        with mock.patch('sales.numbering.business_today', return_value=date(2026, 3, 15)):
+            self.assertEqual(allocator.next_number('T1'), 'SPOS-20260315-T1-00001')
+        self.today.start()
+        self.assertEqual(list(allocator._blocks), [('T1', date(2026, 3, 15))])
+
+    def test_interleaved_workers_never_repeat_a_number(self):
+        workers = [OrderNumberAllocator(block_size=4) for _ in range(3)]
+        numbers = []
+        for i in range(30):
+            numbers += workers[i % 3].allocate('T1', 1 + i % 5)
+        self.assertEqual(len(numbers), len(set(numbers)))
+
+    def test_allocating_inside_a_transaction_is_refused(self):
+        with transaction.atomic(), self.assertRaises(RuntimeError):
+            OrderNumberAllocator().next_number('T1')
+
+    def test_terminal_code_prefers_the_tills_id(self):
+        factory, user = RequestFactory(), mock.Mock(pk=7)
+        for request, code in [
+            (factory.post('/', {'terminal': 'till-2'}, HTTP_X_POS_TERMINAL='t-9x'), 'T9X'),
+            (factory.post('/', {'terminal': 'till-2'}), 'TILL2'),
+            (factory.post('/'), 'U7'),
+        ]:
+            request.user = user
+            self.assertEqual(terminal_code(request), code)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('cash', password='pw')
+        self.calls = 0
+
+        @idempotent
+        def view(request):
+            self.calls += 1
+            return JsonResponse({'success': True, 'call': self.calls}, status=201)
+
+        self.view = view
+
+    def post(self, path='/sales/api/cart/add/', body='{"sku": "CC50"}', key='k-1'):
+        request = RequestFactory().post(path, body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+        request.user = self.user
+        return self.view(request)
+
+    def test_a_completed_key_replays_its_response(self):
+        first = self.post()
+        again = self.post()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((again.status_code, again.content), (201, first.content))
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+
+    def test_a_key_still_in_flight_is_a_conflict(self):
+        claim_key(self.user, 'k-1', '/sales/api/cart/add/')
+        response = self.post()
+        self.assertEqual(response.status_code, 409)
+        # The POS page retries when it sees Retry-After.
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.calls, 0)
+
+    def test_a_key_reused_for_another_request_is_refused(self):
+        self.post()
+        self.assertEqual(self.post(path='/sales/api/cart/remove/').status_code, 422)
+        self.assertEqual(self.post(body='{"sku": "FA50"}').status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_purge_drops_only_expired_keys(self):
+        self.post(key='old')
+        self.post(key='new')
+        IdempotencyKey.objects.filter(key='old').update(created_at=datetime.now(timezone.utc) - timedelta(hours=25))
+        call_command('purge_idempotency_keys', stdout=io.StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+        # An expired key is free to be claimed again.
+        self.post(key='old')
+        self.assertEqual(self.calls, 3)
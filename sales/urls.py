@@ -1,6 +1,6 @@
 # sales/urls.py
 from django.urls import path
-from . import views
+from . import views, api
 
 app_name = 'sales'
 
@@ -9,6 +9,7 @@ urlpatterns = [
     path('receipt/<int:order_id>/', views.print_receipt, name='print_receipt'),
     path('receipt/<int:order_id>/qr/', views.generate_receipt_with_qr, name='receipt_with_qr'),
     path('repeat/<int:order_id>/', views.repeat_sale, name='repeat_sale'),
+    path('orders/<int:order_id>/cancel/', views.cancel_order, name='cancel_order'),
     path('payment-summary/', views.payment_summary, name='payment_summary'),
     path('dashboard/', views.daily_dashboard, name='daily_dashboard'),
     path('yesterday/', views.yesterday_summary, name='yesterday_summary'),
@@ -20,4 +21,18 @@ urlpatterns = [
     path('exports/orders/', views.export_all_orders, name='export_all_orders'),
     path('exports/order-items/', views.export_order_items, name='export_order_items'),
     path('exports/payments/', views.export_payments, name='export_payments'),
+
+    # POS cart JSON API
+    path('api/cart/', api.cart_detail, name='api_cart'),
+    path('api/cart/totals/', api.cart_totals, name='api_cart_totals'),
+    path('api/cart/add/', api.cart_add, name='api_cart_add'),
+    path('api/cart/scan/', api.cart_scan, name='api_cart_scan'),
+    path('api/cart/set-qty/', api.cart_set_quantity, name='api_cart_set_qty'),
+    path('api/cart/remove/', api.cart_remove, name='api_cart_remove'),
+    path('api/catalog/', api.catalog, name='api_catalog'),
+    path('api/checkout/', api.checkout_order, name='api_checkout'),
+    path('api/sync/', api.sync, name='api_sync'),
+    path('api/reports/heatmap/', api.sales_heatmap, name='api_sales_heatmap'),
+    path('api/live/', api.live_feed, name='api_live_feed'),
+    path('api/live/totals/', api.live_totals, name='api_live_totals'),
 ]
@@ -31,140 +31,74 @@ from inventory.models import Product
 from core.models import SystemSettings, CustomField, DynamicFormData
 from .models import POSOrder, POSOrderItem, PaymentTransaction, SaleSummary, DailySalesSummary, UnusualTransaction
 from .forms import POSOrderForm, POSOrderItemForm
+from .cart import POSCart
+from .numbering import order_numbers, terminal_code
+from .checkout import checkout, cancel_order as cancel_completed_order, CheckoutError
+from .idempotency import idempotent
+from .aggregation import daily_breakdown, summary_fields
+from .business_day import business_today
+from .events import live_feed_enabled
+from core.dashboard import refresh_rate
+from inventory.stock import InsufficientStock
 from django.core.exceptions import PermissionDenied
 from core.utils import check_limit_or_block
+from accounts.decorators import manager_required
+from django.views.decorators.http import require_POST
 
 
 @login_required
+@idempotent
 def pos_sales(request):
     """Main POS sales screen with product selection dropdown"""
     # Get system settings
     system_settings = SystemSettings.objects.first()
     
-    # Get active products for selection dropdown
-    products = Product.objects.filter(status='active').order_by('name').values(
-        'id', 'name', 'sku', 'barcode', 'price', 'stock_quantity'
-    )
-    
-    # Debug: Print products to terminal
-    print(f"DEBUG: Found {len(products)} active products")
-    for product in products:
-        print(f"DEBUG: Product - Name: {product['name']}, SKU: {product['sku']}, Barcode: {product['barcode']}")
-    
-    # Create new order if not exists in session
-    if 'current_order_id' not in request.session:
-        order = POSOrder.objects.create(
-            order_number=f"SPOS{timezone.now().strftime('%Y%m%d%H%M%S')}",
-            total_amount=0,
-            final_amount=0,
-            cashier=request.user.username,
-            payment_method='pos'
-        )
-        request.session['current_order_id'] = order.id
-        print(f"DEBUG: Created new order {order.id}")
-    else:
-        order = get_object_or_404(POSOrder, id=request.session['current_order_id'])
-        print(f"DEBUG: Using existing order {order.id}")
-    
-    # Get order items
-    order_items = POSOrderItem.objects.filter(order=order).select_related('product')
-    
-    # Calculate totals - FIXED: Convert to float for multiplication
-    subtotal = sum(float(item.total_price) for item in order_items)
-    tax_amount = subtotal * 0.00  # 7.5% tax - FIXED: Use float
-    final_total = subtotal + tax_amount
+    # The product picker is filled client-side from the cached catalog
+    # (sales:api_catalog), so no product rows are rendered here.
     
-    # Update order with calculated totals
-    order.total_amount = subtotal
-    order.tax_amount = tax_amount
-    order.final_amount = final_total
-    order.save()
+    # The cart lives in the session; nothing is written to the database
+    # until the order is completed.
+    cart = POSCart(request.session)
     
     # Handle form submission for adding items
     if request.method == 'POST':
         action = request.POST.get('action', '')
-        print(f"DEBUG: Action received: {action}")
         
         if action == 'add_item':
             # Get the selected product from the form
             selected_sku = request.POST.get('selected_product', '').strip()
             quantity = int(request.POST.get('quantity', 1))
             
-            print(f"DEBUG: Adding item - Selected SKU: '{selected_sku}', Quantity: {quantity}")
-            
             # Find product by SKU (since we're using SKU as the value in the dropdown)
             product = Product.objects.filter(sku=selected_sku).first()
             
             if not product:
                 messages.error(request, f'Product not found with SKU: {selected_sku}')
-                print(f"DEBUG: Product not found with SKU: {selected_sku}")
-            elif product.stock_quantity < quantity:
+            elif quantity <= 0:
+                messages.error(request, 'Quantity must be at least 1')
+            elif cart.quantity_of(product.id) + quantity > product.stock_quantity:
                 messages.error(request, f'Insufficient stock for {product.name}. Available: {product.stock_quantity}')
-                print(f"DEBUG: Insufficient stock for {product.name}. Available: {product.stock_quantity}")
             else:
-                # Check if item already exists in order
-                existing_item = POSOrderItem.objects.filter(
-                    order=order, product=product
-                ).first()
-                
-                if existing_item:
-                    new_quantity = existing_item.quantity + quantity
-                    if new_quantity > product.stock_quantity:
-                        messages.error(request, f'Insufficient stock for {product.name}. Available: {product.stock_quantity}')
-                        print(f"DEBUG: Insufficient stock after adding. Available: {product.stock_quantity}")
-                    else:
-                        existing_item.quantity = new_quantity
-                        # FIXED: Convert to float for multiplication
-                        existing_item.total_price = float(existing_item.unit_price) * new_quantity
-                        existing_item.save()
-                        # Update stock
-                        product.stock_quantity -= quantity
-                        product.save()
-                        messages.success(request, f'Added {quantity} more {product.name} to cart')
-                        print(f"DEBUG: Added {quantity} more {product.name} to cart (existing item)")
+                already_in_cart = cart.get(product.id) is not None
+                cart.add(product, quantity)
+                if already_in_cart:
+                    messages.success(request, f'Added {quantity} more {product.name} to cart')
                 else:
-                    # Create new item - FIXED: Convert to float for multiplication
-                    POSOrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        quantity=quantity,
-                        unit_price=product.price,
-                        total_price=float(product.price) * quantity
-                    )
-                    # Update stock
-                    product.stock_quantity -= quantity
-                    product.save()
                     messages.success(request, f'Added {quantity} {product.name} to cart')
-                    print(f"DEBUG: Added {quantity} {product.name} to cart (new item)")
         
         elif action == 'remove_item':
-            item_id = request.POST.get('item_id', '')
-            print(f"DEBUG: Removing item with ID: {item_id}")
+            product_id = request.POST.get('item_id', '')
             try:
-                order_item = get_object_or_404(POSOrderItem, id=item_id)
-                # Restore stock
-                order_item.product.stock_quantity += order_item.quantity
-                order_item.product.save()
-                # Delete item
-                order_item.delete()
-                messages.success(request, 'Item removed from cart')
-                print(f"DEBUG: Item {item_id} removed from cart")
-            except:
+                if cart.remove(product_id):
+                    messages.success(request, 'Item removed from cart')
+                else:
+                    messages.error(request, 'Error removing item')
+            except ValueError:
                 messages.error(request, 'Error removing item')
-                print(f"DEBUG: Error removing item {item_id}")
         
         elif action == 'clear_order':
-            # Restore stock for all items
-            for item in order.items.all():
-                item.product.stock_quantity += item.quantity
-                item.product.save()
-                print(f"DEBUG: Restored {item.quantity} stock for {item.product.name}")
-            # Delete order
-            order.delete()
-            # Clear session
-            del request.session['current_order_id']
+            cart.clear()
             messages.info(request, 'Current order cleared')
-            print(f"DEBUG: Order cleared and session deleted")
             return redirect('sales:pos')
         
         elif action == 'complete_order':
@@ -175,39 +109,37 @@ def pos_sales(request):
                 messages.error(request, str(e))
                 return redirect('sales:pos')
 
-            # Get payment method and reference from form
-            payment_method = request.POST.get('payment_method', 'pos')
-            reference_number = request.POST.get('reference_number', '')
-            customer_name = request.POST.get('customer_name', '')
-            customer_phone = request.POST.get('customer_phone', '')
-
-            print(f"DEBUG: Completing order - Payment: {payment_method}, Customer: {customer_name}")
-
-            # Update order
-            order.payment_method = payment_method
-            order.customer_name = customer_name
-            order.customer_phone = customer_phone
-            order.status = 'completed'
-            order.save()
-           
-            # Clear session
-            del request.session['current_order_id']
+            if not cart:
+                messages.error(request, 'Cannot complete an empty order')
+                return redirect('sales:pos')
+
+            try:
+                order = checkout(
+                    [(line.product_id, line.quantity) for line in cart],
+                    order_number=order_numbers.next_number(terminal_code(request)),
+                    cashier=request.user.username,
+                    payment_method=request.POST.get('payment_method', 'pos'),
+                    reference_number=request.POST.get('reference_number', ''),
+                    customer_name=request.POST.get('customer_name', ''),
+                    customer_phone=request.POST.get('customer_phone', ''),
+                )
+            except (CheckoutError, InsufficientStock) as e:
+                messages.error(request, str(e))
+                return redirect('sales:pos')
+
+            cart.clear()
             
             messages.success(request, f'Order #{order.order_number} completed successfully!')
-            print(f"DEBUG: Order {order.order_number} completed successfully!")
             return redirect('sales:print_receipt', order_id=order.id)
         
         # Refresh page to show updated cart
         return redirect('sales:pos')
     
-    print(f"DEBUG: Rendering POS page with {order_items.count()} items in cart")
     context = {
-        'order': order,
-        'order_items': order_items,
-        'subtotal': subtotal,
-        'tax_amount': tax_amount,
-        'final_total': final_total,
-        'products': products,
+        'order_items': list(cart),
+        'subtotal': cart.subtotal,
+        'tax_amount': cart.tax_amount,
+        'final_total': cart.final_total,
         'system_settings': system_settings,
         'user_role': request.user.role,
         'user_name': request.user.get_full_name() or request.user.username,
@@ -338,52 +270,34 @@ def print_receipt(request, order_id):
 
 @login_required
 def repeat_sale(request, order_id):
-    """Create a new order with same items as the original order"""
+    """Load the items of a previous order into the current cart"""
     original_order = get_object_or_404(POSOrder, id=order_id)
-    
-    # Create new order
-    new_order = POSOrder.objects.create(
-        order_number=f"POS{timezone.now().strftime('%Y%m%d%H%M%S')}",
-        total_amount=0,
-        final_amount=0,
-        cashier=request.user.username,
-        payment_method='cash'
-    )
+    cart = POSCart(request.session)
     
     # Copy items
-    for item in original_order.items.all():
-        # Check if product still exists and has sufficient stock
-        if item.product.stock_quantity >= item.quantity:
-            POSOrderItem.objects.create(
-                order=new_order,
-                product=item.product,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                total_price=item.total_price
-            )
-            # Update stock
-            item.product.stock_quantity -= item.quantity
-            item.product.save()
+    for item in original_order.items.select_related('product'):
+        # Check if product still has sufficient stock
+        if item.product.stock_quantity >= cart.quantity_of(item.product_id) + item.quantity:
+            cart.add(item.product, item.quantity)
         else:
             messages.warning(request, f'Insufficient stock for {item.product.name}')
     
-    # Recalculate totals
-    order_items = POSOrderItem.objects.filter(order=new_order)
-    subtotal = sum(item.total_price for item in order_items)
-    tax_amount = subtotal * 0.075
-    final_total = subtotal + tax_amount
-    
-    new_order.total_amount = subtotal
-    new_order.tax_amount = tax_amount
-    new_order.final_amount = final_total
-    new_order.save()
-    
-    # Set as current order
-    request.session['current_order_id'] = new_order.id
-    
     messages.success(request, 'Sale repeated successfully!')
     return redirect('sales:pos')
 
+@login_required
+@manager_required
+@require_POST
+def cancel_order(request, order_id):
+    """Cancel a completed order and return its stock"""
+    try:
+        order = cancel_completed_order(order_id)
+    except CheckoutError as e:
+        messages.error(request, str(e))
+    else:
+        messages.success(request, f'Order #{order.order_number} cancelled and stock returned')
+    return redirect('sales:transaction_history')
+
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
@@ -395,86 +309,48 @@ from .models import POSOrder, SaleSummary
 def payment_summary(request):
     """
     Payment summary view for displaying analytics and sales data.
-    This function dynamically generates summaries for today and the last 7 days.
+    Past days come from the SaleSummary rollup (kept current at checkout
+    and by rebuild_sales_summaries); only today is aggregated live.
+    Nothing is written.
     """
     from django.utils import timezone
     from datetime import timedelta
-    from django.db.models import Sum, Count
 
     # Get today's date
-    today = timezone.now().date()
-
-    # Generate today's summary
-    today_orders = POSOrder.objects.filter(created_at__date=today, status='completed')
-    today_summary_data = {
-        'date': today,
-        'total_sales': today_orders.aggregate(total=Sum('final_amount'))['total'] or 0,
-        'total_transactions': today_orders.count(),
-    }
+    today = business_today()
 
-    # Calculate method-specific totals for today
-    for method in ['pos', 'transfer', 'cash', 'mobile_money']:
-        method_orders = today_orders.filter(payment_method=method)
-        today_summary_data[f'{method}_sales'] = method_orders.aggregate(
-            total=Sum('final_amount')
-        )['total'] or 0
-        today_summary_data[f'{method}_transactions'] = method_orders.count()
-
-    # Save or update today's summary in the database
-    today_summary, created = SaleSummary.objects.update_or_create(
-        date=today,
-        defaults=today_summary_data
-    )
-
-    # Generate summaries for the last 7 days
-    recent_dates = [today - timedelta(days=i) for i in range(7)]
-    recent_summaries = []
-    for date in recent_dates:
-        orders = POSOrder.objects.filter(created_at__date=date, status='completed')
-        summary_data = {
-            'date': date,
-            'total_sales': orders.aggregate(total=Sum('final_amount'))['total'] or 0,
-            'total_transactions': orders.count(),
-        }
-
-        # Calculate method-specific totals for each day
-        for method in ['pos', 'transfer', 'cash', 'mobile_money']:
-            method_orders = orders.filter(payment_method=method)
-            summary_data[f'{method}_sales'] = method_orders.aggregate(
-                total=Sum('final_amount')
-            )['total'] or 0
-            summary_data[f'{method}_transactions'] = method_orders.count()
-
-        # Save or update the summary in the database
-        summary, _ = SaleSummary.objects.update_or_create(
-            date=date,
-            defaults=summary_data
-        )
-        recent_summaries.append(summary)
-
-    # Fetch recent summaries (last 7 days) for display
-    recent_summaries = SaleSummary.objects.filter(
-        date__gte=today - timedelta(days=7)
-    ).order_by('-date')
-
-    # Calculate payment method distribution for today
-    payment_methods = POSOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).values('payment_method').annotate(
-        total=Sum('final_amount'),
-        count=Count('id')
-    ).order_by('-total')
+    # Today, live, with every payment method in one grouped query
+    today_breakdown = daily_breakdown([today])[today]
+    today_summary = SaleSummary(date=today, **summary_fields(today_breakdown, amount_suffix='sales'))
 
-    # Calculate percentages for payment methods
-    total_amount = sum(pm['total'] or 0 for pm in payment_methods)
-    for pm in payment_methods:
-        pm['percentage'] = round(((pm['total'] or 0) / total_amount) * 100, 2) if total_amount > 0 else 0
+    # Previous 7 days from the rollup; days without a row had no sales
+    stored = {
+        summary.date: summary
+        for summary in SaleSummary.objects.filter(date__gte=today - timedelta(days=7), date__lt=today)
+    }
+    recent_summaries = [today_summary] + [
+        stored.get(date) or SaleSummary(date=date)
+        for date in (today - timedelta(days=i) for i in range(1, 8))
+    ]
 
-    # Map payment method codes to human-readable names
+    # Payment method distribution for today
     PAYMENT_METHOD_CHOICES = dict(POSOrder.PAYMENT_METHODS)
-    for pm in payment_methods:
-        pm['display_name'] = PAYMENT_METHOD_CHOICES.get(pm['payment_method'], "Unknown")
+    total_amount = today_breakdown['total_revenue']
+    payment_methods = sorted(
+        (
+            {
+                'payment_method': method,
+                'display_name': PAYMENT_METHOD_CHOICES.get(method, "Unknown"),
+                'total': figures['revenue'],
+                'count': figures['count'],
+                'percentage': round((figures['revenue'] / total_amount) * 100, 2) if total_amount > 0 else 0,
+            }
+            for method, figures in today_breakdown['methods'].items()
+            if figures['count']
+        ),
+        key=lambda pm: pm['total'],
+        reverse=True,
+    )
 
     # Context dictionary with detailed explanation of each variable
     context = {
@@ -510,48 +386,12 @@ from .forms import POSOrderForm, POSOrderItemForm
 @login_required
 def daily_dashboard(request):
     """Today's sales dashboard"""
-    today = timezone.now().date()
-    
-    # Get or create today's summary
-    summary, created = DailySalesSummary.objects.get_or_create(
-        date=today,
-        defaults={
-            'total_revenue': 0,
-            'total_transactions': 0,
-            'cash_revenue': 0,
-            'cash_transactions': 0,
-            'transfer_revenue': 0,
-            'transfer_transactions': 0,
-            'pos_revenue': 0,
-            'pos_transactions': 0,
-            'mobile_money_revenue': 0,
-            'mobile_money_transactions': 0,
-        }
-    )
-    
-    # Always regenerate summary to get latest data
-    orders = POSOrder.objects.filter(created_at__date=today, status='completed')
-    
-    summary.total_revenue = orders.aggregate(total=Sum('final_amount'))['total'] or 0
-    summary.total_transactions = orders.count()
+    today = business_today()
     
-    # Calculate method-specific totals
-    for method in ['pos', 'transfer', 'cash', 'mobile_money']:
-        method_orders = orders.filter(payment_method=method)
-        summary_data = method_orders.aggregate(total=Sum('final_amount'), count=Count('id'))
-        setattr(summary, f'{method}_revenue', summary_data['total'] or 0)
-        setattr(summary, f'{method}_transactions', summary_data['count'] or 0)
-    
-    summary.save()
-    
-    # Get top selling items for today
-    top_selling_items = POSOrderItem.objects.filter(
-        order__created_at__date=today,
-        order__status='completed'
-    ).values('product__name', 'product__sku').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('total_price')
-    ).order_by('-total_quantity')[:5]
+    # Kept current at checkout/cancellation (sales.rollups); reading it is
+    # a single lookup.
+    summary = DailySalesSummary.objects.filter(date=today).first() or DailySalesSummary(date=today)
+    top_selling_items = summary.top_selling_items
     
     # Get low stock products
     low_stock_products = Product.objects.filter(
@@ -560,7 +400,7 @@ def daily_dashboard(request):
     
     # Get today's orders for real-time updates
     today_orders = POSOrder.objects.filter(
-        created_at__date=today,
+        business_date=today,
         status='completed'
     ).order_by('-created_at')
     
@@ -569,6 +409,8 @@ def daily_dashboard(request):
         'top_selling_items': top_selling_items,
         'low_stock_products': low_stock_products,
         'today_orders': today_orders,
+        'live_feed': live_feed_enabled(),
+        'poll_interval': refresh_rate(),
         'user_role': request.user.role,
         'user_name': request.user.get_full_name() or request.user.username,
     }
@@ -577,49 +419,19 @@ def daily_dashboard(request):
 @login_required
 def yesterday_summary(request):
     """Yesterday's sales summary"""
-    yesterday = timezone.now().date() - timedelta(days=1)
-    
-    # Get or create yesterday's summary
-    summary, created = DailySalesSummary.objects.get_or_create(
-        date=yesterday,
-        defaults={
-            'total_revenue': 0,
-            'total_transactions': 0,
-            'cash_revenue': 0,
-            'cash_transactions': 0,
-            'transfer_revenue': 0,
-            'transfer_transactions': 0,
-            'pos_revenue': 0,
-            'pos_transactions': 0,
-            'mobile_money_revenue': 0,
-            'mobile_money_transactions': 0,
-        }
-    )
-    
-    # Always regenerate summary to get latest data
-    orders = POSOrder.objects.filter(created_at__date=yesterday, status='completed')
+    yesterday = business_today() - timedelta(days=1)
     
-    summary.total_revenue = orders.aggregate(total=Sum('final_amount'))['total'] or 0
-    summary.total_transactions = orders.count()
-    
-    # Calculate method-specific totals
-    for method in ['pos', 'transfer', 'cash', 'mobile_money']:
-        method_orders = orders.filter(payment_method=method)
-        summary_data = method_orders.aggregate(total=Sum('final_amount'), count=Count('id'))
-        setattr(summary, f'{method}_revenue', summary_data['total'] or 0)
-        setattr(summary, f'{method}_transactions', summary_data['count'] or 0)
-    
-    summary.save()
+    summary = DailySalesSummary.objects.filter(date=yesterday).first() or DailySalesSummary(date=yesterday)
     
     # Get yesterday's orders
     yesterday_orders = POSOrder.objects.filter(
-        created_at__date=yesterday,
+        business_date=yesterday,
         status='completed'
     ).order_by('-created_at')
     
     # Get unusual transactions for yesterday
     unusual_transactions = UnusualTransaction.objects.filter(
-        order__created_at__date=yesterday
+        order__business_date=yesterday
     ).select_related('order')
     
     # Apply filters if any
@@ -810,13 +622,14 @@ from django.utils.dateparse import parse_date  # Import parse_date from Django u
 
 import csv
 
+from core.exports import serve_export
 from .models import POSOrder, POSOrderItem, PaymentTransaction
 
 
 @login_required
 def transaction_history(request):
     """Show recent POS orders with search and day filter."""
-    today = timezone.localdate()
+    today = business_today()
     date_str = request.GET.get("date") or ""
     search_query = request.GET.get("q") or ""
 
@@ -829,7 +642,7 @@ def transaction_history(request):
     orders = POSOrder.objects.filter(status="completed").order_by("-created_at")
 
     if selected_date:
-        orders = orders.filter(created_at__date=selected_date)
+        orders = orders.filter(business_date=selected_date)
 
     if search_query:
         orders = orders.filter(
@@ -849,9 +662,8 @@ def transaction_history(request):
 @login_required
 def export_transactions(request):
     """Export filtered POS orders (same filters as transaction_history)."""
-    today = timezone.localdate()
+    today = business_today()
     date_str = request.GET.get("date") or ""
-    search_query = request.GET.get("q") or ""
 
     if date_str:
         # Use parse_date to convert the date string into a date object
@@ -859,180 +671,29 @@ def export_transactions(request):
     else:
         selected_date = today
 
-    orders = POSOrder.objects.filter(status="completed").order_by("-created_at")
+    params = request.GET.copy()
+    params["from"] = params["to"] = selected_date.isoformat()
+    return serve_export(request, "transactions", params, f"transactions_{selected_date.isoformat()}.csv")
 
-    if selected_date:
-        orders = orders.filter(created_at__date=selected_date)
-
-    if search_query:
-        orders = orders.filter(
-            Q(order_number__icontains=search_query)
-            | Q(customer_name__icontains=search_query)
-            | Q(customer_phone__icontains=search_query)
-        )
-
-    response = HttpResponse(content_type="text/csv")
-    filename = f"transactions_{selected_date.isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "order_number",
-            "date",
-            "time",
-            "customer_name",
-            "customer_phone",
-            "payment_method",
-            "total_amount",
-            "discount_amount",
-            "final_amount",
-            "status",
-        ]
-    )
-
-    for order in orders:
-        dt = timezone.localtime(order.created_at)
-        writer.writerow(
-            [
-                order.order_number,
-                dt.date().isoformat(),
-                dt.time().strftime("%H:%M:%S"),
-                order.customer_name or "",
-                order.customer_phone or "",
-                order.payment_method,
-                order.total_amount,
-                order.discount_amount,
-                order.final_amount,
-                order.status,
-            ]
-        )
-
-    return response
 
 
 
+# The CSV columns, filters and date ranges these accept are declared in
+# sales/exports.py.
 
 @login_required
 def export_all_orders(request):
-    """Export all POS orders as CSV (summary)."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"orders_all_{timezone.now().date().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "order_number",
-            "created_date",
-            "created_time",
-            "customer_name",
-            "customer_phone",
-            "payment_method",
-            "total_amount",
-            "discount_amount",
-            "final_amount",
-            "status",
-        ]
-    )
-
-    orders = POSOrder.objects.all().order_by("-created_at")
-    for order in orders:
-        dt = timezone.localtime(order.created_at)
-        writer.writerow(
-            [
-                order.order_number,
-                dt.date().isoformat(),
-                dt.time().strftime("%H:%M:%S"),
-                order.customer_name or "",
-                order.customer_phone or "",
-                order.payment_method,
-                order.total_amount,
-                order.discount_amount,
-                order.final_amount,
-                order.status,
-            ]
-        )
-
-    return response
+    """Export POS orders as CSV (summary)."""
+    return serve_export(request, "orders")
 
 
 @login_required
 def export_order_items(request):
-    """Export all order line items as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"order_items_{timezone.now().date().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "order_number",
-            "order_date",
-            "product_name",
-            "product_sku",
-            "quantity",
-            "unit_price",
-            "line_total",
-        ]
-    )
-
-    items = POSOrderItem.objects.select_related("order", "product").all().order_by(
-        "-order__created_at"
-    )
-    for item in items:
-        order = item.order
-        product = item.product
-        dt = timezone.localtime(order.created_at)
-        writer.writerow(
-            [
-                order.order_number,
-                dt.date().isoformat(),
-                product.name if product else "",
-                product.sku if product else "",
-                item.quantity,
-                item.unit_price,
-                item.total_price,
-            ]
-        )
-
-    return response
+    """Export order line items as CSV."""
+    return serve_export(request, "order_items")
 
 
 @login_required
 def export_payments(request):
-    """Export all payment transactions as CSV."""
-    response = HttpResponse(content_type="text/csv")
-    filename = f"payments_{timezone.now().date().isoformat()}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "order_number",
-            "payment_method",
-            "amount",
-            "reference_number",
-            "transaction_id",
-            "status",
-            "created_at",
-        ]
-    )
-
-    payments = PaymentTransaction.objects.select_related("order").all().order_by(
-        "-created_at"
-    )
-    for p in payments:
-        writer.writerow(
-            [
-                p.order.order_number if p.order else "",
-                p.payment_method,
-                p.amount,
-                p.reference_number,
-                p.transaction_id,
-                p.status,
-                p.created_at,
-            ]
-        )
-
-    return response
+    """Export payment transactions as CSV."""
+    return serve_export(request, "payments")
@@ -0,0 +1,117 @@
+// static/js/catalog-store.js
+
+/**
+ * IndexedDB-backed copy of the POS product catalog.
+ *
+ * The server hands out a version number with every catalog response;
+ * we keep the last one and only ask for rows changed since then.
+ */
+const CatalogStore = (() => {
+  const DB_NAME = "nura_pos_catalog";
+  const DB_VERSION = 1;
+  const PRODUCTS = "products";
+  const META = "meta";
+
+  let dbPromise = null;
+
+  function openDb() {
+    if (dbPromise) return dbPromise;
+    dbPromise = new Promise((resolve, reject) => {
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        if (!db.objectStoreNames.contains(PRODUCTS)) {
+          const store = db.createObjectStore(PRODUCTS, { keyPath: "id" });
+          store.createIndex("sku", "sku", { unique: false });
+          store.createIndex("barcode", "barcode", { unique: false });
+        }
+        if (!db.objectStoreNames.contains(META)) {
+          db.createObjectStore(META);
+        }
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+    return dbPromise;
+  }
+
+  function promisify(request) {
+    return new Promise((resolve, reject) => {
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+      tx.onabort = () => reject(tx.error);
+    });
+  }
+
+  async function getVersion() {
+    const db = await openDb();
+    const tx = db.transaction(META, "readonly");
+    return (await promisify(tx.objectStore(META).get("version"))) || 0;
+  }
+
+  async function all() {
+    const db = await openDb();
+    const tx = db.transaction(PRODUCTS, "readonly");
+    const products = await promisify(tx.objectStore(PRODUCTS).getAll());
+    return products.sort((a, b) => a.name.localeCompare(b.name));
+  }
+
+  /**
+   * Apply a catalog response: a full snapshot replaces everything,
+   * a delta upserts changed rows and drops removed/inactive ones.
+   */
+  async function apply(data) {
+    const db = await openDb();
+    const tx = db.transaction([PRODUCTS, META], "readwrite");
+    const products = tx.objectStore(PRODUCTS);
+
+    if (data.full) {
+      products.clear();
+    }
+    (data.products || []).forEach((product) => {
+      if (product.status === "active") {
+        products.put(product);
+      } else {
+        products.delete(product.id);
+      }
+    });
+    (data.removed || []).forEach((id) => products.delete(id));
+    tx.objectStore(META).put(data.version, "version");
+
+    await transactionDone(tx);
+  }
+
+  /**
+   * Bring the local catalog up to date. Returns true if anything changed.
+   * Offline, the cached catalog is simply kept as-is.
+   */
+  async function sync(url) {
+    const version = await getVersion();
+    const target = version ? `${url}?since=${version}` : url;
+
+    let response;
+    try {
+      response = await fetch(target, {
+        credentials: "same-origin",
+        cache: "no-store",
+        headers: { Accept: "application/json" },
+      });
+    } catch (e) {
+      console.warn("Catalog sync skipped (offline?)", e);
+      return false;
+    }
+
+    if (response.status === 304 || !response.ok) return false;
+    await apply(await response.json());
+    return true;
+  }
+
+  return { all, apply, getVersion, sync };
+})();
@@ -1,6 +1,55 @@
 // static/js/offline-queue.js
 
 const OFFLINE_QUEUE_KEY = "nura_pos_offline_queue_v1";
+const IDEMPOTENCY_FIELD = "idempotency_key";
+const TERMINAL_KEY = "nura_pos_terminal_id";
+const TERMINAL_FIELD = "terminal";
+
+/**
+ * Fresh key for one logical action. The server runs a POST at most once
+ * per key, so a replayed or retried action can't be applied twice.
+ */
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2, 12);
+}
+
+/**
+ * Give every idempotency_key hidden input on the page a fresh key
+ */
+function stampIdempotencyKeys(root) {
+  (root || document).querySelectorAll(`input[name='${IDEMPOTENCY_FIELD}']`).forEach((input) => {
+    input.value = newIdempotencyKey();
+  });
+}
+
+/**
+ * This till's id, made up once and kept in localStorage. Sent as
+ * X-POS-Terminal (or the terminal field) so order numbers are allocated
+ * per till rather than per cashier.
+ */
+function posTerminalId() {
+  let id = null;
+  try {
+    id = localStorage.getItem(TERMINAL_KEY);
+    if (!id) {
+      id = "T" + Math.random().toString(36).slice(2, 9).toUpperCase();
+      localStorage.setItem(TERMINAL_KEY, id);
+    }
+  } catch (e) {
+    console.error("Error reading terminal id", e);
+  }
+  return id || "";
+}
+
+/**
+ * Fill every terminal hidden input on the page with this till's id
+ */
+function stampTerminalFields(root) {
+  (root || document).querySelectorAll(`input[name='${TERMINAL_FIELD}']`).forEach((input) => {
+    input.value = posTerminalId();
+  });
+}
 
 /**
  * Read queue from localStorage
@@ -36,6 +85,99 @@ function enqueueOfflineAction(action) {
   saveOfflineQueue(queue);
 }
 
+/**
+ * Form posts to these pages are POS actions and go to the server in
+ * batches through the sync endpoint rather than one request each.
+ */
+const SYNC_URL = "/sales/api/sync/";
+const SYNC_BATCH_PATHS = ["/sales/pos/"];
+const SYNC_BATCH_SIZE = 50;
+
+function isBatchable(item) {
+  return SYNC_BATCH_PATHS.includes(new URL(item.url, window.location.origin).pathname);
+}
+
+function toSyncAction(item) {
+  const data = Object.fromEntries(new URLSearchParams(item.body || ""));
+  const action = data.action;
+  delete data.action;
+  delete data.csrfmiddlewaretoken;
+  delete data[IDEMPOTENCY_FIELD];
+  delete data[TERMINAL_FIELD];
+  return { key: item.idempotencyKey, action: action, data: data };
+}
+
+function pageCsrfToken() {
+  const input = document.querySelector("input[name='csrfmiddlewaretoken']");
+  return input ? input.value : "";
+}
+
+/**
+ * Send one queued action as it was originally posted.
+ * Returns true if it should stay in the queue.
+ */
+async function sendQueuedItem(item) {
+  const response = await fetch(item.url, {
+    method: item.method || "POST",
+    headers: {
+      "Content-Type": "application/x-www-form-urlencoded",
+      "X-Requested-With": "XMLHttpRequest",
+      "X-CSRFToken": item.csrfToken || "",
+      "X-POS-Terminal": posTerminalId(),
+      "Idempotency-Key": item.idempotencyKey,
+    },
+    body: item.body,
+    credentials: "include",
+  });
+
+  if (!response.ok) {
+    console.warn("Offline action failed, keeping in queue:", item, response.status);
+    return true;
+  }
+  console.log("Offline action synced:", item.type);
+  return false;
+}
+
+/**
+ * Send a run of queued POS actions in one request.
+ * Returns the items that should stay in the queue: the first one the
+ * server asked to retry and everything after it, so they replay in order
+ * (any of them already applied are answered from their keys).
+ */
+async function sendQueuedBatch(items) {
+  const response = await fetch(SYNC_URL, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "X-Requested-With": "XMLHttpRequest",
+      "X-CSRFToken": pageCsrfToken() || items[0].csrfToken || "",
+      "X-POS-Terminal": posTerminalId(),
+    },
+    body: JSON.stringify({ actions: items.map(toSyncAction) }),
+    credentials: "include",
+  });
+
+  if (!response.ok) {
+    console.warn("Offline batch failed, keeping in queue:", items.length, "items", response.status);
+    return items;
+  }
+
+  const data = await response.json();
+  for (let i = 0; i < data.results.length; i++) {
+    const result = data.results[i];
+    if (result.retry || result.status >= 500) {
+      console.log("Offline batch synced:", i, "of", items.length, "items");
+      return items.slice(i);
+    }
+    if (!result.success) {
+      // Rejected by the server (e.g. out of stock); retrying won't help.
+      console.warn("Offline action rejected:", result.action, result.error);
+    }
+  }
+  console.log("Offline batch synced:", items.length, "of", items.length, "items");
+  return [];
+}
+
 /**
  * Try to process the offline queue when online
  */
@@ -47,30 +189,42 @@ async function processOfflineQueue() {
 
   console.log("Processing offline queue:", queue.length, "items");
 
+  // Items queued before keys existed get one now, saved before sending,
+  // so every later retry reuses it.
+  queue.forEach((item) => {
+    if (!item.idempotencyKey) item.idempotencyKey = newIdempotencyKey();
+  });
+  saveOfflineQueue(queue);
+
   const newQueue = [];
+  let i = 0;
 
-  for (const item of queue) {
-    try {
-      const response = await fetch(item.url, {
-        method: item.method || "POST",
-        headers: {
-          "Content-Type": "application/x-www-form-urlencoded",
-          "X-Requested-With": "XMLHttpRequest",
-          "X-CSRFToken": item.csrfToken || "",
-        },
-        body: item.body,
-        credentials: "include",
-      });
+  // Replay strictly in order: consecutive POS actions go out as one batch
+  // (up to SYNC_BATCH_SIZE), anything else on its own.
+  while (i < queue.length) {
+    const batch = [];
+    while (i + batch.length < queue.length && batch.length < SYNC_BATCH_SIZE && isBatchable(queue[i + batch.length])) {
+      batch.push(queue[i + batch.length]);
+    }
 
-      if (!response.ok) {
-        console.warn("Offline action failed, keeping in queue:", item, response.status);
-        newQueue.push(item); // keep it for retry
+    try {
+      if (batch.length) {
+        const keep = await sendQueuedBatch(batch);
+        if (keep.length) {
+          // Later actions may depend on the ones kept: stop here.
+          newQueue.push(...keep, ...queue.slice(i + batch.length));
+          break;
+        }
+        i += batch.length;
       } else {
-        console.log("Offline action synced:", item.type);
+        if (await sendQueuedItem(queue[i])) newQueue.push(queue[i]);
+        i += 1;
       }
     } catch (e) {
-      console.error("Error syncing offline action:", e);
-      newQueue.push(item); // keep it for retry
+      // Connection dropped again: keep this and everything after it.
+      console.error("Error syncing offline queue:", e);
+      newQueue.push(...queue.slice(i));
+      break;
     }
   }
 
@@ -111,10 +265,13 @@ function setupOfflineForms() {
       const csrfToken = csrfInput ? csrfInput.value : "";
       const formType = form.dataset.offlineType || "generic";
 
+      const keyInput = form.querySelector(`input[name='${IDEMPOTENCY_FIELD}']`);
+      const idempotencyKey = (keyInput && keyInput.value) || newIdempotencyKey();
       const body = formToUrlEncoded(form);
 
       enqueueOfflineAction({
         type: formType,
+        idempotencyKey: idempotencyKey,
         url: actionUrl,
         method: form.getAttribute("method") || "POST",
         csrfToken: csrfToken,
@@ -122,6 +279,9 @@ function setupOfflineForms() {
         createdAt: new Date().toISOString(),
       });
 
+      // The next submit of this form is a new action
+      stampIdempotencyKeys(form);
+
       // Simple user feedback (you can style this nicer)
       alert("You are offline. Your action has been saved and will sync when you're back online.");
 
@@ -133,6 +293,8 @@ function setupOfflineForms() {
 
 // Setup on load
 window.addEventListener("load", () => {
+  stampIdempotencyKeys();
+  stampTerminalFields();
   setupOfflineForms();
   processOfflineQueue();
 });
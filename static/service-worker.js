@@ -1,6 +1,6 @@
 // static/service-worker.js
 
-const CACHE_NAME = "nura-pos-cache-v1";
+const CACHE_NAME = "nura-pos-cache-v4";
 const OFFLINE_URL = "/offline/";  // we'll add a Django view for this
 
 // Adjust these to your key assets
@@ -14,6 +14,7 @@ const APP_SHELL = [
   "/static/core/css/styles.css",          // adjust to your main CSS
   "/static/js/pwa.js",
   "/static/js/offline-queue.js",
+  "/static/js/catalog-store.js",
   "/static/core/icons/icon-192.png",
   "/static/core/icons/icon-512.png",
 ];
@@ -42,6 +43,7 @@ self.addEventListener("activate", (event) => {
 
 /**
  * Strategy:
+ * - /sales/api/ requests: network only
  * - HTML requests: network-first (fallback to cache, then offline page)
  * - Static (CSS, JS, images): cache-first (fallback to network)
  */
@@ -53,6 +55,12 @@ self.addEventListener("fetch", (event) => {
     return;
   }
 
+  // JSON APIs are always live; the catalog keeps its own copy in IndexedDB
+  // (see catalog-store.js), so never serve these from the cache.
+  if (new URL(request.url).pathname.startsWith("/sales/api/")) {
+    return;
+  }
+
   const acceptHeader = request.headers.get("accept") || "";
   const isHTML = acceptHeader.includes("text/html");
 